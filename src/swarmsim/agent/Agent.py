@@ -26,6 +26,7 @@ import numpy as np
 
 from ..agent.control.StaticController import zero_controller
 from ..config import get_class_from_dict, filter_unexpected_fields
+from ..util.population import StateAttribute
 
 # typing
 from typing import Any
@@ -82,25 +83,37 @@ class Agent:
 
     _always_shallow_copy = ["world"]
 
+    #: The :py:class:`~swarmsim.util.population.PopulationState` this agent is registered with, if any.
+    _population_state = None
+    #: This agent's row in :py:attr:`_population_state`.
+    _population_index = -1
+
+    #: Agent's position in the world.
+    pos = StateAttribute(vector=True)
+    #: Change in position since last step
+    dpos = StateAttribute(vector=True)
+    #: Agent's heading in radians. 0 is facing frame right.
+    angle = StateAttribute()
+    #: Change in heading since last step.
+    dtheta = StateAttribute()
+    #: Colliders should set to True if a collision was detected.
+    collision_flag = StateAttribute()
+    stopped_duration = StateAttribute()
+
     def __init__(self, config, world, name=None, group=0, initialize=True) -> None:
         self.marked_for_deletion = False
         #: Agent config.
         self.config = config
-        #: Agent's position in the world.
-        self.pos: np.ndarray = np.asarray(config.position, dtype=np.float64)
+        self.pos = np.asarray(config.position, dtype=np.float64)
         #: Agent's name.
         self.name: str | None = name or config.name
-        #: Change in position since last step
-        self.dpos: np.ndarray = np.zeros(len(self.pos))
-        #: Agent's heading in radians. 0 is facing frame right.
+        self.dpos = np.zeros(len(self.pos))
         self.angle = config.angle
-        #: Change in heading since last step.
         self.dtheta = 0
         #: List of this agent's sensors.
         self.sensors: list = []
         #: The :py:class:`Controller <swarmsim.agent.control.Controller>` for this agent.
         self.controller = zero_controller(2)
-        #: Colliders should set to True if a collision was detected.
         self.collision_flag = False
         #: If True, the agent should be solid.
         self.collides = config.collides
@@ -191,7 +204,8 @@ class Agent:
             self.sensors.append(sensor_cls(agent=self, **sensor_config))
 
     def step(self, *args, **kwargs) -> None:
-        self.pos = np.asarray(self.pos, dtype='float64')
+        if self._population_state is None:  # stored positions are always float64
+            self.pos = np.asarray(self.pos, dtype='float64')
 
     def draw(self, screen, offset=((0, 0), 1.0)) -> None:
         pass
@@ -202,11 +216,11 @@ class Agent:
 
     def getPosition(self):
         """Alias for :py:attr:`~swarmsim.agent.Agent.Agent.pos`."""
-        return np.asarray(self.pos, dtype='float64')
+        return self.pos
 
     def getVelocity(self):
         """Alias for :py:attr:`~swarmsim.agent.Agent.Agent.dpos`."""
-        return np.asarray(self.dpos, dtype='float64')
+        return self.dpos
 
     @property
     def position(self):
@@ -357,9 +371,17 @@ class Agent:
         result = cls.__new__(cls)
         memo = {}
         memo[id(self)] = result
+        state = self._population_state
         for key, value in self.__dict__.items():
             if key in cls._always_shallow_copy:
                 setattr(result, key, value)  # keep reference to same world, etc.
+            elif key in ('_population_state', '_population_index'):
+                continue
             else:
                 setattr(result, key, copy.deepcopy(value, memo))
+        if state is not None:
+            # the copy is not part of the population, so it gets its own copy of the stored values
+            i = self._population_index
+            for name, buf in state.buffers.items():
+                result.__dict__[f"_{name}"] = buf[i].copy() if buf.ndim > 1 else buf.item(i)
         return result
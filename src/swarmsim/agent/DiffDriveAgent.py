@@ -3,7 +3,7 @@ import numpy as np
 
 from dataclasses import dataclass, field
 from ..config import filter_unexpected_fields, associated_type
-from .MazeAgent import MazeAgent, MazeAgentConfig, SPA, State
+from .MazeAgent import MazeAgent, MazeAgentConfig
 
 # typing
 from typing import Any, override
@@ -58,12 +58,7 @@ class DifferentialDriveAgent(MazeAgent):
             vl, vr = self.controller.get_actions(self)
 
         if self.track_io:
-            sensor_state = self.sensors[0].current_state
-            self.history.append(SPA(
-                State(*self.pos, self.angle),
-                sensor_state,
-                (vl, vr),
-            ))
+            self.record_io(world, self.sensors[0].current_state, (vl, vr))
 
         vl = self.delay_1(vl)
         vr = self.delay_2(vr)
@@ -103,7 +98,8 @@ class DifferentialDriveAgent(MazeAgent):
             # TODO: remove this
             check_for_world_boundaries(self)
 
-        self.handle_collisions(world)
+        if not world.defer_agent_collisions:
+            self.handle_collisions(world)
 
         # Calculate the 'real' dx, dy after collisions have been calculated.
         # This is what we use for velocity in our equations
@@ -111,10 +107,43 @@ class DifferentialDriveAgent(MazeAgent):
         # timer = timer.check_watch()
 
         for sensor in self.sensors:
-            sensor.step(world=world)
+            with world.profiler.section('sensor', type(sensor).__name__):
+                sensor.step(world=world)
             if sensor.goal_detected:
                 self.goal_seen = True
 
+    @override
+    @classmethod
+    def supports_step_batch(cls) -> bool:
+        return cls.step is DifferentialDriveAgent.step
+
+    @override
+    def get_batch_action(self, world):
+        """Get this agent's delayed wheel speeds ``(vl, vr)`` for :py:meth:`step_batch`."""
+        if world.goals and world.goals[0].agent_achieved_goal(self) or self.detection_id == 2:
+            if self.stop_at_goal:
+                vl, vr = 0, 0
+            else:
+                vl, vr = self.controller.get_actions(self)
+        else:
+            vl, vr = self.controller.get_actions(self)
+
+        if self.track_io:
+            self.record_io(world, self.sensors[0].current_state, (vl, vr))
+
+        return self.delay_1(vl), self.delay_2(vr)
+
+    @override
+    @classmethod
+    def integrate_batch(cls, agents, rows, actions):
+        # convert wheelspeeds vl, vr to v, omega and integrate like the unicycle agent
+        vl, vr = actions[:, 0], actions[:, 1]
+        radius = agents[0]._population_state.buffers['radius'][rows]
+        wheel_radius = np.array([a.wheel_radius for a in agents], dtype=np.float64)
+        omega = (vl - vr) / (radius * 2)
+        v = wheel_radius / 2 * (vl + vr)
+        return super().integrate_batch(agents, rows, np.stack((v, omega), axis=1))
+
     def simulate_error(self, err_type="Death"):
         if err_type == "Death":
             self.controller = [0 for _ in self.controller]
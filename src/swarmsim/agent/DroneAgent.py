@@ -2,7 +2,7 @@ import numpy as np
 
 from dataclasses import dataclass, field
 from ..config import filter_unexpected_fields, associated_type
-from .MazeAgent import MazeAgent, MazeAgentConfig, SPA, State
+from .MazeAgent import MazeAgent, MazeAgentConfig
 
 # typing
 from typing import Any, override
@@ -57,12 +57,7 @@ class DroneAgent(MazeAgent):
             delta_x, delta_y, da = self.controller.get_actions(self)
 
         if self.track_io:
-            sensor_state = self.sensors[0].current_state
-            self.history.append(SPA(
-                State(*self.pos, self.angle),
-                sensor_state,
-                (delta_x, delta_y, da),
-            ))
+            self.record_io(world, self.sensors[0].current_state, (delta_x, delta_y, da))
 
         self.dx = delta_x * np.cos(self.angle) - delta_y * np.cos(self.angle)
         self.dy = delta_x * np.sin(self.angle) - delta_y * np.sin(self.angle)
@@ -90,7 +85,8 @@ class DroneAgent(MazeAgent):
             # TODO: remove this
             check_for_world_boundaries(self)
 
-        self.handle_collisions(world)
+        if not world.defer_agent_collisions:
+            self.handle_collisions(world)
 
         # Calculate the 'real' dx, dy after collisions have been calculated.
         # This is what we use for velocity in our equations
@@ -98,10 +94,53 @@ class DroneAgent(MazeAgent):
         # timer = timer.check_watch()
 
         for sensor in self.sensors:
-            sensor.step(world=world)
+            with world.profiler.section('sensor', type(sensor).__name__):
+                sensor.step(world=world)
             if sensor.goal_detected:
                 self.goal_seen = True
 
+    @override
+    @classmethod
+    def supports_step_batch(cls) -> bool:
+        return cls.step is DroneAgent.step
+
+    @override
+    def get_batch_action(self, world):
+        """Get this agent's ``(delta_x, delta_y, da)`` for :py:meth:`step_batch`."""
+        if world.goals and world.goals[0].agent_achieved_goal(self) or self.detection_id == 2:
+            if self.stop_at_goal:
+                delta_x, delta_y, da = 0, 0, 0
+            else:
+                delta_x, delta_y, da = self.controller.get_actions(self)
+        else:
+            delta_x, delta_y, da = self.controller.get_actions(self)
+
+        if self.track_io:
+            self.record_io(world, self.sensors[0].current_state, (delta_x, delta_y, da))
+
+        return delta_x, delta_y, da
+
+    @override
+    @classmethod
+    def integrate_batch(cls, agents, rows, actions):
+        delta_x, delta_y, da = actions[:, 0], actions[:, 1], actions[:, 2]
+        idiosyncrasies = np.array([a.idiosyncrasies for a in agents], dtype=np.float64)
+        dt = np.array([a.dt for a in agents], dtype=np.float64)
+        angle = agents[0]._population_state.buffers['angle'][rows]
+
+        cos, sin = np.cos(angle), np.sin(angle)
+        dx = delta_x * cos - delta_y * cos
+        dy = delta_x * sin - delta_y * sin
+        for agent, x, y in zip(agents, dx.tolist(), dy.tolist()):
+            agent.dx, agent.dy = x, y
+
+        dtheta = da * idiosyncrasies[:, -1] * dt
+        # same as orientation_uvec(offset=self.angle) in step()
+        orient = np.stack((np.cos(angle * 2), np.sin(angle * 2)), axis=1)
+        delta = (delta_x - delta_y)[:, None] * orient * idiosyncrasies
+
+        return cls.apply_motion_batch(agents, rows, delta, dtheta)
+
     def simulate_error(self, err_type="Death"):
         if err_type == "Death":
             self.controller = [0 for _ in self.controller]
@@ -44,15 +44,16 @@ from typing import NamedTuple
 from dataclasses import dataclass, field
 from collections import namedtuple, deque
 
-import pygame
 import numpy as np
 
 from ..config import filter_unexpected_fields, associated_type
 from .StaticAgent import StaticAgent, StaticAgentConfig
 from ..util import statistics_tools as st
 from .control.Controller import Controller
+from ..util.population import StateAttribute
 
 # # typing
+from collections.abc import Sequence
 from typing import Any, override
 # from ..world.World import World
 # from ..world.RectangularWorld import RectangularWorldConfig
@@ -116,6 +117,9 @@ class MazeAgentConfig(StaticAgentConfig):
 class MazeAgent(StaticAgent):
     SEED = -1
 
+    #: bool: If True, the agent no longer moves.
+    dead = StateAttribute()
+
     def __init__(self, config: MazeAgentConfig, world, name=None, initialize=True) -> None:
         """Agent w/ Unicycle Dynamics which can move based on sensor info.
 
@@ -183,13 +187,31 @@ class MazeAgent(StaticAgent):
         self.trace_color = config.trace_color
         self.trace_path = deque(maxlen=config.trace_length)
 
-        self.history = []
         self.track_io = getattr(config, "track_io", False)
+        #: tuple[float, float]: The ``(v, omega)`` chosen by the controller on the last step, before any delay.
+        self.last_action = (0.0, 0.0)
 
         if initialize:
             self.setup_controller_from_config()
             self.setup_sensors_from_config()
 
+    @property
+    def history(self) -> Sequence[SPA]:
+        """The ``track_io`` records of this agent, as a read-only sequence of :py:class:`SPA`.
+
+        Records are stored in the world's :py:attr:`~swarmsim.world.World.World.io_history`;
+        this is a :py:class:`~swarmsim.util.iohistory.HistoryView` of them.
+        """
+        io_history = getattr(self.world, 'io_history', None)
+        slot = getattr(self, '_io_slot', None)
+        if io_history is None or slot is None or slot >= len(io_history.names):
+            return ()
+        return io_history.view(slot)
+
+    def record_io(self, world, perception, action):
+        """Add this step's state, ``perception`` and ``action`` to the world's ``io_history``."""
+        world.io_history.record(self, world.total_steps, (*self.pos, self.angle), perception, action)
+
     @override
     def step(self, world=None, check_for_world_boundaries=None, check_for_agent_collisions=None) -> None:
         world = world or self.world
@@ -211,14 +233,10 @@ class MazeAgent(StaticAgent):
             # self.set_color_by_id(3)
         else:
             v, omega = self.controller.get_actions(self)
+        self.last_action = (v, omega)
 
         if self.track_io:
-            sensor_state = self.sensors[0].current_state
-            self.history.append(SPA(
-                State(*self.pos, self.angle),
-                sensor_state,
-                (v, omega),
-            ))
+            self.record_io(world, self.sensors[0].current_state, (v, omega))
 
         v = self.delay_1(v)
         omega = self.delay_2(omega)
@@ -249,7 +267,8 @@ class MazeAgent(StaticAgent):
             # TODO: remove this
             check_for_world_boundaries(self)
 
-        self.handle_collisions(world)
+        if not world.defer_agent_collisions:
+            self.handle_collisions(world)
 
         # Calculate the 'real' dx, dy after collisions have been calculated.
         # This is what we use for velocity in our equations
@@ -257,10 +276,170 @@ class MazeAgent(StaticAgent):
         # timer = timer.check_watch()
 
         for sensor in self.sensors:
-            sensor.step(world=world)
+            with world.profiler.section('sensor', type(sensor).__name__):
+                sensor.step(world=world)
             if sensor.goal_detected:
                 self.goal_seen = True
 
+    @classmethod
+    def supports_step_batch(cls) -> bool:
+        """Returns True if agents of this class can be stepped together with :py:meth:`step_batch`.
+
+        Subclasses which override :py:meth:`step` are stepped one at a time instead.
+        """
+        return cls.step is MazeAgent.step
+
+    def get_batch_action(self, world):
+        """Get this agent's delayed ``(v, omega)`` for :py:meth:`step_batch`.
+
+        Does the same goal checks and ``track_io`` recording as :py:meth:`step`.
+        """
+        if world.goals and world.goals[0].agent_achieved_goal(self) or self.detection_id == 2:
+            if self.stop_at_goal:
+                v, omega = 0, 0
+            else:
+                v, omega = self.controller.get_actions(self)
+        else:
+            v, omega = self.controller.get_actions(self)
+        self.last_action = (v, omega)
+
+        if self.track_io:
+            self.record_io(world, self.sensors[0].current_state, (v, omega))
+
+        return self.delay_1(v), self.delay_2(omega)
+
+    @classmethod
+    def integrate_batch(cls, agents, rows, actions):
+        """Apply the unicycle dynamics of :py:meth:`step` to many agents at once.
+
+        Parameters
+        ----------
+        agents : list[MazeAgent]
+            The agents to move. Must be registered with the same population state.
+        rows : numpy.ndarray[int]
+            The row of each agent in its :py:class:`~swarmsim.util.population.PopulationState`.
+        actions : numpy.ndarray
+            ``(n, 2)`` array of ``(v, omega)`` for each agent.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            False for agents which were killed by a catastrophic collision this step.
+        """
+        v, omega = actions[:, 0], actions[:, 1]
+        idiosyncrasies = np.array([a.idiosyncrasies for a in agents], dtype=np.float64)
+        dt = np.array([a.dt for a in agents], dtype=np.float64)
+        state = agents[0]._population_state
+
+        # same midpoint rule as step(), with the omega ~= 0 case handled by masking
+        dtheta = omega * idiosyncrasies[:, -1] * dt
+        turning = np.abs(omega) > 1e-9
+        safe_omega = np.where(turning, omega, 1.0)
+        s = np.where(turning, 2 * np.sin(dtheta / 2) * v / safe_omega, v * dt)
+        heading = state.buffers['angle'][rows] + dtheta / 2
+        delta = s[:, None] * np.stack((np.cos(heading), np.sin(heading)), axis=1) * idiosyncrasies
+
+        iD = np.where(turning, np.abs(v / safe_omega) * 2, float("inf"))
+        for agent, d in zip(agents, iD.tolist()):
+            agent.iD = d
+
+        return cls.apply_motion_batch(agents, rows, delta, dtheta)
+
+    @staticmethod
+    def apply_motion_batch(agents, rows, delta, dtheta):
+        """Move agents by ``delta`` and turn them by ``dtheta``, honoring ``stopped_duration``.
+
+        Stopped agents count down their ``stopped_duration`` instead of moving.
+        Stopped agents with ``catastrophic_collisions`` die and are neither turned nor moved.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            False for agents which died this step.
+        """
+        buffers = agents[0]._population_state.buffers
+        stopped = buffers['stopped_duration'][rows] > 0
+        catastrophic = np.array([a.catastrophic_collisions for a in agents], dtype=bool)
+        died = stopped & catastrophic
+        alive = ~died
+
+        buffers['stopped_duration'][rows[stopped]] -= 1
+        buffers['pos'][rows[~stopped]] += delta[~stopped]
+        buffers['dtheta'][rows] = dtheta
+        buffers['angle'][rows[alive]] += dtheta[alive]
+        buffers['collision_flag'][rows[alive]] = False
+        buffers['dead'][rows[died]] = True
+        return alive
+
+    @classmethod
+    def step_batch(cls, agents, world, check_for_world_boundaries=None, check_for_world_boundaries_batch=None):
+        """Step many agents of this class at once.
+
+        This is equivalent to calling :py:meth:`step` on each agent, except that every agent
+        chooses its action and moves before any agent resolves collisions or senses.
+        The dynamics are computed by :py:meth:`integrate_batch`.
+
+        Parameters
+        ----------
+        agents : list[MazeAgent]
+            Agents of this class which are registered with ``world.population_state``.
+        world : RectangularWorld
+            The world the agents live in.
+        check_for_world_boundaries : Callable, optional
+            Called with each agent after it moves.
+        check_for_world_boundaries_batch : Callable, optional
+            If given, called once with the list of agents that moved, instead of
+            calling ``check_for_world_boundaries`` for each agent.
+        """
+        for agent in agents:
+            super(MazeAgent, agent).step(world=world)
+        agents = [agent for agent in agents if not agent.dead]
+        if not agents:
+            return
+
+        buffers = world.population_state.buffers
+        rows = np.array([agent._population_index for agent in agents], dtype=np.intp)
+        actions = np.array([agent.get_batch_action(world) for agent in agents], dtype=np.float64)
+        old_pos = buffers['pos'][rows]  # fancy indexing makes a copy
+
+        alive = cls.integrate_batch(agents, rows, actions)
+
+        if check_for_world_boundaries_batch is not None:
+            check_for_world_boundaries_batch([agent for agent, ok in zip(agents, alive) if ok])
+            check_for_world_boundaries = None
+        world.update_broadphase()  # everyone moved at once
+        for agent, ok in zip(agents, alive):
+            if not ok:
+                agent.body_color = (200, 200, 200)
+                continue
+            if check_for_world_boundaries is not None:
+                check_for_world_boundaries(agent)
+            if not world.defer_agent_collisions:
+                agent.handle_collisions(world)
+                world.update_broadphase(agent)
+
+        # Calculate the 'real' dx, dy after collisions have been calculated.
+        buffers['dpos'][rows[alive]] = buffers['pos'][rows[alive]] - old_pos[alive]
+
+        # sensors which support it are stepped together, grouped by type
+        sensor_groups = {}
+        for agent, ok in zip(agents, alive):
+            if not ok:
+                continue
+            for sensor in agent.sensors:
+                supports_batch = getattr(type(sensor), 'supports_step_batch', None)
+                if supports_batch is not None and supports_batch():
+                    sensor_groups.setdefault(type(sensor), []).append(sensor)
+                else:
+                    with world.profiler.section('sensor', type(sensor).__name__):
+                        sensor.step(world=world)
+        for sensor_cls, sensors in sensor_groups.items():
+            with world.profiler.section('sensor', sensor_cls.__name__):
+                sensor_cls.step_batch(sensors, world)
+        for agent, ok in zip(agents, alive):
+            if ok and any(sensor.goal_detected for sensor in agent.sensors):
+                agent.goal_seen = True
+
     @override
     def draw(self, screen, offset=((0, 0), 1.0)) -> None:
         pan, zoom = np.asarray(offset[0]), offset[1]  # type:ignore[reportUnusedVariable]
@@ -291,7 +470,7 @@ class MazeAgent(StaticAgent):
         for _i in range(max_attempts):
             if refresh:
                 self.aabb = self.make_aabb()
-            candidates = [other for other in world.population if self != other
+            candidates = [other for other in world.collision_candidates(self.aabb) if self != other
                                and self.aabb.intersects_bb(other.make_aabb() if refresh else other.aabb)]
             collided = []
             if not candidates:
@@ -316,6 +495,7 @@ class MazeAgent(StaticAgent):
             if not collided:
                 return
             if self.debug and world._screen_cache:
+                import pygame
                 world.draw(world._screen_cache)
                 pygame.display.flip()
 
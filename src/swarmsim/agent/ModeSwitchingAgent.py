@@ -1,6 +1,5 @@
 from dataclasses import dataclass, field
 
-import pygame
 import numpy as np
 
 from ..agent.Agent import Agent, BaseAgentConfig
@@ -43,6 +42,7 @@ class SwitchingAgent(Agent):
 
     @override
     def on_key_press(self, event):
+        import pygame
         if self.switch_on_key and event.type == pygame.KEYDOWN:
             if event.key == getattr(pygame, f'K_{self.switch_on_key}'):
                 self.switch()
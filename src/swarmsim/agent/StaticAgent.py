@@ -20,7 +20,6 @@
 
 from functools import lru_cache, cached_property
 
-import pygame
 import numpy as np
 from shapely.geometry import Polygon
 from shapely import transform, get_coordinates
@@ -31,6 +30,7 @@ from copy import deepcopy
 from .Agent import Agent, BaseAgentConfig
 from ..util.collider.AABB import AABB
 from ..util.collider.Collider import CircularCollider, PolyCollider
+from ..util.population import StateAttribute
 
 # typing
 from typing import override
@@ -65,6 +65,9 @@ class StaticAgentConfig(BaseAgentConfig):
 class StaticAgent(Agent):
     DEBUG = False
 
+    #: float: The radius of the agent.
+    radius = StateAttribute()
+
     def __init__(self, config: StaticAgentConfig, world: RectangularWorld, name=None, initialize=True) -> None:
         super().__init__(config, world, name, initialize=False)
 
@@ -111,7 +114,6 @@ class StaticAgent(Agent):
                 msg = f"Unknown points_shift type: {config.anchor_point}"
                 raise ValueError(msg)
 
-        #: float: The radius of the agent.
         self.radius = self.get_simple_poly_radius() or config.agent_radius or 0.5
         self.dt = world.dt  #: float: Copy the world's dt at agent creation.
         self.is_highlighted = False
@@ -169,6 +171,7 @@ class StaticAgent(Agent):
 
     @override
     def draw(self, screen, offset=((0, 0), 1.0)) -> None:
+        import pygame
         pan, zoom = np.asarray(offset[0]), offset[1]
         super().draw(screen)
 
@@ -189,6 +192,7 @@ class StaticAgent(Agent):
             self.debug_draw(screen, offset)
 
     def draw_direction(self, screen, offset=((0, 0), 1.0)):
+        import pygame
         pan, zoom = np.asarray(offset[0]), offset[1]
         # "Front" direction vector
         pos = np.asarray(self.getPosition()) * zoom + pan
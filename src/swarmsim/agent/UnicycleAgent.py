@@ -1,6 +1,5 @@
 from dataclasses import dataclass, field
 
-import pygame
 import numpy as np
 
 from ..config import filter_unexpected_fields, associated_type
@@ -52,6 +51,7 @@ class UnicycleAgent(MazeAgent):
         return self.collider
 
     def draw_trace(self, screen):
+        import pygame
         for pos in self.trace_path:
             pygame.draw.circle(screen, self.trace_color, pos, 2)
 
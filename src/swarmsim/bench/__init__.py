@@ -0,0 +1,8 @@
+"""Headless benchmarks.
+
+Run ``python -m swarmsim.bench --help`` for usage.
+
+.. automodule:: swarmsim.bench.scenarios
+.. automodule:: swarmsim.bench.runner
+
+"""
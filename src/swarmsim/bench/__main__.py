@@ -0,0 +1,147 @@
+"""Command-line entry point: ``python -m swarmsim.bench``.
+
+Runs every scenario at every size and writes the results as JSON.
+Each case runs in its own process unless ``--in-process`` is given.
+
+With ``--imports``, instead times how long a fresh interpreter takes to import swarmsim
+and step a small world of each scenario, and lists the heavy optional dependencies it imported.
+Give ``--import-budget`` to exit with an error if any scenario takes longer than that.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .scenarios import SCENARIOS
+
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                             cwd=Path(__file__).parent, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def meta():
+    import numpy as np
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def summarize(result):
+    if 'error' in result:
+        return f"{result['scenario']:>16} n={result['n']:<6} ERROR: {result['error']}"
+    phases = ' '.join(f"{k}={v / max(result['steps'], 1) * 1e3:.2f}ms" for k, v in result['phase_seconds'].items())
+    peak = result['peak_memory_bytes']
+    peak = 'n/a' if peak is None else f"{peak / 2**20:.0f}MiB"
+    return (f"{result['scenario']:>16} n={result['n']:<6} {result['steps_per_second']:9.2f} steps/s "
+            f"setup={result['setup_seconds']:.2f}s peak={peak} | {phases}")
+
+
+def check_imports(args):
+    from .runner import measure_imports
+
+    configs_dir = None if args.configs is None else str(args.configs)
+    results = []
+    for scenario in args.scenarios:
+        # the first run warms the filesystem and bytecode caches
+        measure_imports(scenario, configs_dir=configs_dir, timeout=args.timeout)
+        result = measure_imports(scenario, configs_dir=configs_dir, timeout=args.timeout)
+        results.append(result)
+        if 'error' in result:
+            print(f"{scenario:>16} ERROR: {result['error']}", file=sys.stderr)
+        else:
+            print(f"{scenario:>16} {result['seconds']:.3f}s {result['modules']} modules, "
+                  f"heavy: {', '.join(result['heavy_modules']) or 'none'}", file=sys.stderr)
+
+    report = json.dumps({'meta': meta(), 'imports': results}, indent=2)
+    if args.out is None:
+        print(report)
+    else:
+        args.out.write_text(report)
+
+    over = [r for r in results if 'error' in r or (args.import_budget is not None and r['seconds'] > args.import_budget)]
+    if over:
+        print(f"{len(over)} scenario(s) failed or went over the import budget of {args.import_budget}s", file=sys.stderr)
+        sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m swarmsim.bench', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000, 10000])
+    parser.add_argument('--steps', type=int, default=100, help="steps to time per case")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--step-mode', choices=['sequential', 'batch'], default=None,
+                        help="override the world's step_mode")
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help="stop a case early after this many seconds of stepping")
+    parser.add_argument('--timeout', type=float, default=None, help="kill a case's process after this many seconds")
+    parser.add_argument('--configs', type=Path, default=None, help="path to the demo/configs folder")
+    parser.add_argument('-o', '--out', type=Path, default=None, help="write JSON here instead of stdout")
+    parser.add_argument('--in-process', action='store_true', help="run every case in this process")
+    parser.add_argument('--imports', action='store_true', help="measure import and startup time instead")
+    parser.add_argument('--import-budget', type=float, default=None,
+                        help="with --imports, fail if startup takes longer than this many seconds")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--launched-at', type=float, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.child is not None:
+        from .runner import run_case
+        print(json.dumps(run_case(**json.loads(args.child), launched_at=args.launched_at)))
+        return
+
+    if args.imports:
+        return check_imports(args)
+
+    from .runner import run_case, run_case_subprocess
+
+    results = []
+    for scenario in args.scenarios:
+        for n in args.sizes:
+            case = {
+                'scenario': scenario,
+                'n': n,
+                'steps': args.steps,
+                'seed': args.seed,
+                'step_mode': args.step_mode,
+                'max_seconds': args.max_seconds,
+                'configs_dir': None if args.configs is None else str(args.configs),
+            }
+            if args.in_process:
+                try:
+                    result = run_case(**case, launched_at=time.time())
+                except Exception as err:  # noqa: BLE001
+                    result = {**case, 'error': repr(err)}
+            else:
+                result = run_case_subprocess(timeout=args.timeout, **case)
+            results.append(result)
+            print(summarize(result), file=sys.stderr, flush=True)
+
+    report = json.dumps({'meta': meta(), 'results': results}, indent=2)
+    if args.out is None:
+        print(report)
+    else:
+        args.out.write_text(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Run a single benchmark case and measure it.
+
+.. autofunction:: run_case
+.. autofunction:: run_case_subprocess
+.. autofunction:: measure_imports
+.. autofunction:: peak_memory
+
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .scenarios import SCENARIOS
+
+#: The world step phases which are timed, in the order :py:meth:`World.step` calls them.
+PHASES = ('spawners', 'agents', 'objects', 'metrics')
+
+#: Optional or GUI-only dependencies which a headless run shouldn't need to import.
+HEAVY_MODULES = ('pygame', 'matplotlib', 'ripser', 'circle_fit', 'cv2', 'PIL', 'pandas', 'sklearn', 'thorpy')
+
+
+def peak_memory():
+    """Get the peak resident set size of this process in bytes, or ``None`` if it can't be measured."""
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes, macOS reports bytes
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+def run_case(scenario, n, steps=100, seed=0, step_mode=None, max_seconds=None, configs_dir=None, launched_at=None):
+    """Build a scenario with ``n`` agents, step it headless, and measure it.
+
+    The world's :py:class:`~swarmsim.util.profiler.StepProfiler` is enabled,
+    and its summary is included in the results as ``'profile'``.
+
+    Parameters
+    ----------
+    scenario : str
+        A key of :py:data:`~swarmsim.bench.scenarios.SCENARIOS`.
+    n : int
+        Number of agents to spawn.
+    steps : int, default=100
+        Number of world steps to time.
+    step_mode : str, optional
+        Overrides the world config's ``step_mode``, i.e. ``'sequential'`` or ``'batch'``.
+    max_seconds : float, optional
+        Stop stepping early once this much time has been spent stepping.
+    launched_at : float, optional
+        ``time.time()`` at which the process was launched, for measuring startup time.
+
+    Returns
+    -------
+    dict
+        JSON-serializable results.
+    """
+    import_start = time.perf_counter()
+    from ..world.World import World_from_config  # noqa: F401  (imports most of the package)
+    import_time = time.perf_counter() - import_start
+
+    config = SCENARIOS[scenario](n, seed=seed, configs_dir=configs_dir)
+    config.flags = {**config.flags, 'profile': 1}
+    if step_mode is not None:
+        config.step_mode = step_mode
+
+    start = time.perf_counter()
+    world = config.create_world()
+    world.setup()
+    setup_time = time.perf_counter() - start
+
+    done = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        world.step()
+        done += 1
+        if max_seconds is not None and time.perf_counter() - start > max_seconds:
+            break
+    elapsed = time.perf_counter() - start
+    profile = world.profiler.to_dict()
+
+    return {
+        'scenario': scenario,
+        'n': n,
+        'n_spawned': len(world.population),
+        'step_mode': getattr(world.config, 'step_mode', None),
+        'seed': seed,
+        'steps': done,
+        'seconds': elapsed,
+        'steps_per_second': done / elapsed if elapsed > 0 else None,
+        'phase_seconds': {phase: profile['phase'][phase]['total_seconds'] for phase in PHASES},
+        'profile': profile,
+        'setup_seconds': setup_time,
+        'import_seconds': import_time,
+        'startup_seconds': None if launched_at is None else time.time() - launched_at - elapsed,
+        'peak_memory_bytes': peak_memory(),
+    }
+
+
+def run_case_subprocess(timeout=None, **case):
+    """Run :py:func:`run_case` in a fresh interpreter, so memory and startup are measured in isolation.
+
+    Returns the result dict, or a dict with an ``'error'`` key if the child failed.
+    """
+    cmd = [sys.executable, '-m', 'swarmsim.bench', '--child', json.dumps(case), '--launched-at', repr(time.time())]
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env)
+    except subprocess.TimeoutExpired:
+        return {**case, 'error': f"timed out after {timeout} seconds"}
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        err = proc.stderr.strip().splitlines()
+        return {**case, 'error': err[-1] if err else f"exit code {proc.returncode}"}
+    return json.loads(lines[-1])
+
+
+def import_probe(start, scenario, n=10, configs_dir=None):
+    # run in a fresh interpreter by measure_imports(). start is when the interpreter began running code.
+    config = SCENARIOS[scenario](n, configs_dir=configs_dir)
+    world = config.create_world()
+    world.setup()
+    world.step()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'scenario': scenario,
+        'seconds': elapsed,
+        'modules': len(sys.modules),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }))
+
+
+def measure_imports(scenario='conftest', n=10, configs_dir=None, timeout=None):
+    """Time importing swarmsim, building a small scenario world and taking one step, in a fresh interpreter.
+
+    Returns
+    -------
+    dict
+        ``seconds`` taken, the number of ``modules`` imported,
+        and which of :py:data:`HEAVY_MODULES` were imported.
+    """
+    code = ("import time; start = time.perf_counter(); "
+            "from swarmsim.bench.runner import import_probe; "
+            f"import_probe(start, {scenario!r}, {n!r}, {configs_dir!r})")
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=timeout, env=env)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        err = proc.stderr.strip().splitlines()
+        return {'scenario': scenario, 'error': err[-1] if err else f"exit code {proc.returncode}"}
+    return json.loads(lines[-1])
+
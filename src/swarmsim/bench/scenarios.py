@@ -0,0 +1,139 @@
+"""Benchmark scenarios.
+
+Each scenario is a function ``(n, seed, configs_dir) -> RectangularWorldConfig``
+which builds a world with ``n`` agents. The spawn region and world grow with ``n``
+so that agent density stays about the same as in the original scenario.
+
+``conftest`` is loaded from ``demo/configs/conftest``. ``turbopi-milling`` and
+``flockbots-icra`` are written in an old config format which no longer loads, so
+they are rebuilt here with the same robots, sensors and layout, in meters.
+
+.. autodata:: SCENARIOS
+
+"""
+
+import copy
+import math
+from pathlib import Path
+
+import numpy as np
+
+#: Default location of the ``demo/configs`` folder in a source checkout.
+DEFAULT_CONFIGS_DIR = Path(__file__).resolve().parents[3] / 'demo' / 'configs'
+
+# the TurboPi robot from demo/configs/conftest/turbopi.yaml
+TURBOPI = {
+    'type': 'MazeAgent',
+    'agent_radius': 0.1,
+    'sensors': [{
+        'type': 'BinaryFOVSensor',
+        'theta': 0.45,
+        'distance': 1.0,
+        'goal_sensing_range': 1.0,
+        'wall_sensing_range': 1.0,
+        'bias': 0,
+        'store_history': False,
+    }],
+    'controller': {'type': 'Controller', 'controller': [0.02, 0.5, 0.02, -0.5]},
+    'stop_at_goal': False,
+    'body_color': [255, 0, 0],
+    'body_filled': True,
+}
+
+# the flockbot from demo/configs/flockbots-icra/flockbot_novelty.yaml,
+# converted from body lengths to meters (1 body length = 0.15 m)
+FLOCKBOT = {
+    'type': 'MazeAgent',
+    'agent_radius': 0.075,
+    'sensors': [{
+        'type': 'BinaryFOVSensor',
+        'theta': 0.1,
+        'distance': 2.0,
+        'detect_goal_with_added_state': True,
+        'goal_sensing_range': 4.4,
+        'false_negative': 0.10,
+        'false_positive': 0.05,
+        'bias': 4,
+        'store_history': False,
+    }],
+    'controller': {'type': 'Controller', 'controller': [0.2, 0.7, 0.2, -0.7]},
+    'stop_at_goal': False,
+    'body_color': [255, 0, 0],
+    'body_filled': True,
+}
+
+
+def _square(center, side):
+    lo = np.asarray(center, dtype=np.float64) - side / 2
+    hi = lo + side
+    return [[lo[0], lo[1]], [lo[0], hi[1]], [hi[0], hi[1]], [hi[0], lo[1]]]
+
+
+def _uniform_spawner(n, agent, center, side):
+    return {
+        'type': 'UniformAgentSpawner',
+        'n': n,
+        'agent': copy.deepcopy(agent),  # the config system pops 'type' from agent dicts
+        'region': _square(center, side),
+        'facing': 'away',
+        'avoid_overlap': True,
+    }
+
+
+def conftest(n, seed=0, configs_dir=None):
+    """``demo/configs/conftest/world.yaml``, with its point spawner replaced by a uniform spawner."""
+    from ..world import config_from_yaml
+
+    configs_dir = Path(configs_dir or DEFAULT_CONFIGS_DIR)
+    config = config_from_yaml(configs_dir / 'conftest' / 'world.yaml')
+    agent = config.spawners[0]['agent']
+    # 6 agents in the original; keep roughly 0.16 m² per agent
+    side = 0.4 * math.sqrt(n)
+    size = max(float(config.size[0]), side * 3)
+    config.size = (size, size)
+    config.spawners = [_uniform_spawner(n, agent, (size / 2, size / 2), side)]
+    config.seed = seed
+    return config
+
+
+def turbopi_milling(n, seed=0, configs_dir=None):
+    """TurboPi milling: 10 agents in a 1.2 m square in the middle of an 8 m world."""
+    from ..world.RectangularWorld import RectangularWorldConfig
+    from ..metrics.Circliness import Circliness
+
+    side = 1.2 * math.sqrt(n / 10)
+    size = max(8.0, side * 8 / 1.2)
+    return RectangularWorldConfig(
+        size=(size, size),
+        time_step=0.025,
+        collide_walls=False,
+        show_walls=False,
+        seed=seed,
+        spawners=[_uniform_spawner(n, TURBOPI, (size / 2, size / 2), side)],
+        metrics=[Circliness(avg_history_max=450)],
+    )
+
+
+def flockbots_icra(n, seed=0, configs_dir=None):
+    """Flockbot goal search: 20 noisy-sensor agents spawned far from a cylinder goal."""
+    from ..world.RectangularWorld import RectangularWorldConfig
+    from ..world.goals.Goal import CylinderGoal
+
+    side = 1.0 * math.sqrt(n / 20)
+    size = max(15.0, side * 15)
+    return RectangularWorldConfig(
+        size=(size, size),
+        time_step=0.13,
+        collide_walls=True,
+        seed=seed,
+        spawners=[_uniform_spawner(n, FLOCKBOT, (size / 3, size * 2 / 3), side)],
+        goals=[CylinderGoal(size * 2 / 3, size / 3, 0.075, range=3.0)],
+    )
+
+
+#: Scenario builders by name.
+SCENARIOS = {
+    'conftest': conftest,
+    'turbopi-milling': turbopi_milling,
+    'flockbots-icra': flockbots_icra,
+}
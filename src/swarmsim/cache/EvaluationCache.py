@@ -0,0 +1,369 @@
+"""A content-addressed cache of simulation results.
+
+Results are looked up by a hash of everything that decides them:
+the world config, the genome, the seed and the version of the code.
+Evaluating a genome that was already evaluated, i.e. a survivor from a previous generation,
+then costs a lookup instead of a rollout.
+
+The cache is a folder holding a SQLite index and a few pack files, to which results are appended.
+Many processes, i.e. :py:class:`~swarmsim.util.processing.multicoreprocessing.MultiWorldSimulation`
+workers, can read and write the same cache at once.
+
+.. code-block:: python
+
+    cache = EvaluationCache('out/cache', max_bytes=2**30)
+    keys = [cache.key(world_config, genome, seed) for genome in genomes]
+    found = cache.get_many(keys)  # {key: result} for keys that are cached
+    ...
+    cache.put_many({key: result for key, result in zip(missing_keys, results)})
+
+This supersedes :py:class:`~swarmsim.cache.ExternalSimulationArchive.ExternalSimulationArchive`.
+
+.. warning:: Results are stored pickled. Only open caches you trust.
+
+.. autofunction:: canonical_key
+.. autoclass:: EvaluationCache
+    :members:
+
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+from pathlib import Path
+
+import numpy as np
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    pack INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS packs (
+    pack INTEGER PRIMARY KEY,
+    size INTEGER NOT NULL,
+    dead INTEGER NOT NULL
+);
+"""
+
+
+def _canonical(obj):
+    # json.dumps() default= hook for things json can't encode
+    if isinstance(obj, np.ndarray):
+        return {'__ndarray__': obj.dtype.str, 'shape': obj.shape, 'data': obj.tolist()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {'__type__': type(obj).__qualname__, **{f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}}
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=repr)
+    if isinstance(obj, (Path, bytes)):
+        return str(obj)
+    if callable(obj):
+        return f"{getattr(obj, '__module__', '')}.{getattr(obj, '__qualname__', type(obj).__qualname__)}"
+    if hasattr(obj, '__dict__'):
+        return {'__type__': type(obj).__qualname__, **vars(obj)}
+    return repr(obj)
+
+
+def canonical_key(world_config, genome=None, seed=None, version='', **extra):
+    """Hash a world config, genome, seed and code version into a key for :py:class:`EvaluationCache`.
+
+    The key only depends on their values, not on object identity or dict order.
+
+    Parameters
+    ----------
+    world_config : AbstractWorldConfig | dict
+        The world config, before the genome and seed are put into it.
+    genome : Sequence[float], optional
+    seed : int, optional
+    version : str
+        Version of the code. Results cached by other versions are not found.
+    **extra
+        Anything else that changes the result, i.e. which outputs were extracted.
+
+    Returns
+    -------
+    str
+        A hex sha256 digest.
+    """
+    if hasattr(world_config, 'as_dict'):
+        world_config = world_config.as_dict()
+    if genome is not None:
+        genome = np.asarray(genome, dtype=np.float64)
+    data = {'config': world_config, 'genome': genome, 'seed': seed, 'version': version, 'extra': extra}
+    text = json.dumps(data, sort_keys=True, default=_canonical, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _materialize(value):
+    # copy shared memory arrays, which only pickle as a reference to memory that may be freed
+    if isinstance(value, dict):
+        return {k: _materialize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_materialize(v) for v in value)
+    if hasattr(value, 'unlink') and hasattr(value, 'array'):
+        return np.array(value.array)
+    return value
+
+
+def _code_version():
+    try:
+        from importlib.metadata import version
+        return version('swarmsim')
+    except Exception:  # noqa: BLE001
+        return 'unknown'
+
+
+class EvaluationCache:
+    """A cache of simulation results on disk, looked up by :py:func:`canonical_key`.
+
+    Parameters
+    ----------
+    path : str | Path
+        Folder of the cache. Created if needed.
+    max_bytes : int, optional
+        Once the results stored take more than this, the least recently used ones are evicted.
+    version : str, optional
+        Version of the code, part of every :py:meth:`key`. Defaults to the installed ``swarmsim`` version.
+    pack_bytes : int, default=64 MiB
+        Start a new pack file once the current one is this large.
+    timeout : float, default=60.0
+        Seconds to wait for another process to finish writing before giving up.
+
+    An instance can be pickled and sent to worker processes; each opens its own connection.
+    """
+
+    def __init__(self, path, max_bytes=None, version=None, pack_bytes=64 * 2**20, timeout=60.0):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.version = _code_version() if version is None else version
+        self.pack_bytes = pack_bytes
+        self.timeout = timeout
+        self._db = None
+        self._pid = None
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.db  # noqa: B018  (creates the index)
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """This process's connection to the index."""
+        if self._db is None or self._pid != os.getpid():  # connections can't be shared with forked processes
+            self._db = sqlite3.connect(self.path / 'index.sqlite', timeout=self.timeout, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._db
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_db'] = state['_pid'] = None
+        return state
+
+    def close(self):
+        """Close this process's connection. It is reopened if the cache is used again."""
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+        self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def key(self, world_config, genome=None, seed=None, **extra):
+        """Get the key of a result. See :py:func:`canonical_key`."""
+        return canonical_key(world_config, genome, seed, self.version, **extra)
+
+    def _pack_path(self, pack):
+        return self.path / f"{pack:06d}.pack"
+
+    def _write(self):
+        # a transaction which holds the write lock, so only one process appends to the packs at a time
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        return db
+
+    def get_many(self, keys):
+        """Look up many results at once.
+
+        Returns
+        -------
+        dict
+            ``{key: result}`` for each key which is cached. Missing keys are left out.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        rows = []
+        for i in range(0, len(keys), 500):  # stay under SQLite's limit on query parameters
+            chunk = keys[i:i + 500]
+            rows += self.db.execute(
+                f"SELECT key, pack, offset, length FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                chunk).fetchall()
+        found = {}
+        files = {}
+        try:
+            for key, pack, offset, length in sorted(rows, key=lambda row: row[1:3]):
+                if pack not in files:
+                    try:
+                        files[pack] = open(self._pack_path(pack), 'rb')  # noqa: SIM115
+                    except FileNotFoundError:  # compacted away by another process since the lookup
+                        files[pack] = None
+                if files[pack] is None:
+                    continue
+                files[pack].seek(offset)
+                data = files[pack].read(length)
+                if len(data) == length:
+                    found[key] = pickle.loads(data)
+        finally:
+            for f in files.values():
+                if f is not None:
+                    f.close()
+        if found:
+            now = time.time()
+            try:
+                self.db.executemany('UPDATE entries SET last_used = ? WHERE key = ?', [(now, key) for key in found])
+            except sqlite3.OperationalError:  # busy; recency is only a hint
+                pass
+        return found
+
+    def get(self, key, default=None):
+        """Look up one result, or get ``default`` if it isn't cached."""
+        return self.get_many([key]).get(key, default)
+
+    def put_many(self, results):
+        """Store many results at once. Keys which are already cached are overwritten.
+
+        Parameters
+        ----------
+        results : dict
+            ``{key: result}``. Results can be anything picklable, i.e. dicts of arrays.
+        """
+        if not results:
+            return
+        now = time.time()
+        items = [(key, pickle.dumps(_materialize(value), protocol=pickle.HIGHEST_PROTOCOL), now)
+                 for key, value in results.items()]
+        db = self._write()
+        try:
+            self._forget(db, [key for key, _, _ in items])
+            self._append(db, items)
+            if self.max_bytes is not None:
+                self._evict(db)
+            stale = self._compact(db)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        for pack in stale:
+            self._pack_path(pack).unlink(missing_ok=True)
+
+    def put(self, key, result):
+        """Store one result."""
+        self.put_many({key: result})
+
+    def _forget(self, db, keys):
+        # delete entries, counting their bytes as dead space in their packs
+        rows = []
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows += db.execute(f"SELECT pack, length FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                               chunk).fetchall()
+        db.executemany('UPDATE packs SET dead = dead + ? WHERE pack = ?', [(length, pack) for pack, length in rows])
+        db.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in keys])
+
+    def _append(self, db, items):
+        # write (key, blob, last_used) items to the end of the newest pack. Needs the write lock.
+        pack, size = db.execute('SELECT pack, size FROM packs ORDER BY pack DESC LIMIT 1').fetchone() or (-1, 0)
+        f = None
+        rows = []
+        try:
+            for key, blob, last_used in items:
+                if pack < 0 or size and size + len(blob) > self.pack_bytes:
+                    if f is not None:
+                        f.close()
+                        f = None
+                    db.execute('UPDATE packs SET size = ? WHERE pack = ?', (size, pack))
+                    pack, size = pack + 1, 0
+                    db.execute('INSERT INTO packs VALUES (?, 0, 0)', (pack,))
+                if f is None:
+                    f = open(self._pack_path(pack), 'ab')  # noqa: SIM115
+                    f.truncate(size)  # drop anything left by a writer which crashed before committing
+                f.write(blob)
+                rows.append((key, pack, size, len(blob), last_used))
+                size += len(blob)
+        finally:
+            if f is not None:
+                f.close()
+        db.execute('UPDATE packs SET size = ? WHERE pack = ?', (size, pack))
+        db.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?)', rows)
+
+    def _evict(self, db):
+        # forget the least recently used entries until the total fits in max_bytes
+        excess = db.execute('SELECT COALESCE(SUM(length), 0) FROM entries').fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        for key, length in db.execute('SELECT key, length FROM entries ORDER BY last_used'):
+            evicted.append(key)
+            excess -= length
+            if excess <= 0:
+                break
+        self._forget(db, evicted)
+
+    def _compact(self, db):
+        # move the live entries out of older packs which are mostly dead space. Returns the packs to delete.
+        newest = db.execute('SELECT MAX(pack) FROM packs').fetchone()[0]
+        stale = [pack for (pack,) in db.execute(
+            'SELECT pack FROM packs WHERE pack < ? AND dead * 2 >= size', (newest,)).fetchall()]
+        for pack in stale:
+            entries = db.execute('SELECT key, offset, length, last_used FROM entries WHERE pack = ? ORDER BY offset',
+                                 (pack,)).fetchall()
+            items = []
+            with open(self._pack_path(pack), 'rb') as f:
+                for key, offset, length, last_used in entries:
+                    f.seek(offset)
+                    items.append((key, f.read(length), last_used))
+            db.execute('DELETE FROM entries WHERE pack = ?', (pack,))
+            db.execute('DELETE FROM packs WHERE pack = ?', (pack,))
+            self._append(db, items)
+        return stale
+
+    def __contains__(self, key):
+        return self.db.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone() is not None
+
+    def __len__(self):
+        return self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    @property
+    def nbytes(self):
+        """Total size of the results stored, in bytes."""
+        return self.db.execute('SELECT COALESCE(SUM(length), 0) FROM entries').fetchone()[0]
+
+    def clear(self):
+        """Delete every result."""
+        db = self._write()
+        try:
+            packs = [row[0] for row in db.execute('SELECT pack FROM packs')]
+            db.execute('DELETE FROM entries')
+            db.execute('DELETE FROM packs')
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        for pack in packs:
+            self._pack_path(pack).unlink(missing_ok=True)
+
+    def __repr__(self):
+        return f"EvaluationCache({str(self.path)!r}, {len(self)} results, {self.nbytes} bytes)"
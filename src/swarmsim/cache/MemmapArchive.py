@@ -0,0 +1,274 @@
+"""An append-only archive of behavior vectors and frame images, stored as memory-mapped arrays.
+
+All behaviors are one ``(M, d)`` float64 array on disk, and all frames are one ``(M, H, W)`` uint8 array,
+so opening an archive is instant however many entries it has, and slicing it only reads what's sliced.
+
+.. code-block:: python
+
+    archive = MemmapArchive('out/archive', mode='a', frame_shape=(50, 50))
+    archive.append('gen0/ind3', behavior, frame)  # frames are downsampled to frame_shape
+    ...
+    archive = MemmapArchive('out/archive')  # read-only
+    archive.behaviors[:, 0].mean()
+    behavior, frame = archive['gen0/ind3']
+
+The archive is a folder with:
+
+``behaviors.f8``, ``frames.u8``
+    The raw arrays. They are grown in chunks, so they may be longer than the number of entries.
+``keys.txt``
+    One key per line, in entry order.
+``meta.json``
+    The number of entries and the array shapes. It's updated last, so a crashed writer
+    leaves the archive as it was at the last :py:meth:`~MemmapArchive.flush`.
+
+Only one process should append to an archive at a time. Any number can read it.
+
+.. autoclass:: MemmapArchive
+    :members:
+
+.. autofunction:: downsample
+
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+def downsample(frame, shape):
+    """Shrink a 2D image to ``shape`` by averaging the pixels which fall into each output pixel.
+
+    Images which are smaller than ``shape`` along an axis are sampled instead.
+    """
+    frame = np.asarray(frame)
+    if frame.ndim == 3:  # color
+        frame = frame[..., :3].mean(axis=2)
+    out = frame.astype(np.float64)
+    for axis, size in enumerate(shape):
+        n = out.shape[axis]
+        if n == size:
+            continue
+        if n < size:
+            out = np.take(out, np.arange(size) * n // size, axis=axis)
+            continue
+        edges = np.arange(size) * n // size
+        counts = np.diff(np.append(edges, n))
+        out = np.add.reduceat(out, edges, axis=axis) / np.expand_dims(counts, 1 - axis)
+    return np.clip(np.rint(out), 0, 255).astype(np.uint8)
+
+
+class MemmapArchive:
+    """An append-only archive of ``(key, behavior, frame)`` entries.
+
+    Parameters
+    ----------
+    path : str | Path
+        Folder of the archive.
+    mode : str, default='r'
+        ``'r'`` to read an existing archive, or ``'a'`` to append to it, creating it if needed.
+    behavior_dim : int, optional
+        Length of each behavior vector. By default, taken from the first one appended.
+    frame_shape : tuple[int, int], optional
+        ``(H, W)`` of the stored frames. Frames of other sizes are :py:func:`downsample` d.
+        By default, taken from the first frame appended.
+        An archive with no frame shape stores no frames.
+    chunk : int, default=1024
+        Grow the files by at least this many entries at a time.
+    """
+
+    def __init__(self, path, mode='r', behavior_dim=None, frame_shape=None, chunk=1024):
+        if mode not in ('r', 'a'):
+            msg = f"mode must be 'r' or 'a', not {mode!r}"
+            raise ValueError(msg)
+        self.path = Path(path)
+        self.mode = mode
+        self.chunk = chunk
+        meta_path = self.path / 'meta.json'
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+        elif mode == 'a':
+            self.path.mkdir(parents=True, exist_ok=True)
+            meta = {'count': 0, 'behavior_dim': None, 'frame_shape': None}
+        else:
+            msg = f"No archive at {self.path}"
+            raise FileNotFoundError(msg)
+        #: int: Number of entries.
+        self.count = meta['count']
+        #: int | None: Length of each behavior vector.
+        self.behavior_dim = meta['behavior_dim'] if meta['behavior_dim'] is not None else behavior_dim
+        frame_shape = meta['frame_shape'] if meta['frame_shape'] is not None else frame_shape
+        #: tuple[int, int] | None: ``(H, W)`` of each frame.
+        self.frame_shape = None if frame_shape is None else tuple(frame_shape)
+        self._keys = self._read_keys()
+        self._index = None
+        self._behaviors = self._frames = None
+
+    def _read_keys(self):
+        keys_path = self.path / 'keys.txt'
+        if not keys_path.exists():
+            return []
+        with open(keys_path, encoding='utf-8') as f:
+            keys = f.read().split('\n')[:self.count]
+        if self.mode == 'a':  # drop keys written after the last flush
+            with open(keys_path, 'w', encoding='utf-8') as f:
+                f.write(''.join(key + '\n' for key in keys))
+        return keys
+
+    def _map(self, name, dtype, row_shape, rows=None):
+        path = self.path / name
+        row_bytes = int(np.prod(row_shape)) * np.dtype(dtype).itemsize
+        if rows is not None:  # grow the file to fit this many rows
+            with open(path, 'ab') as f:
+                if f.tell() < rows * row_bytes:
+                    f.truncate(rows * row_bytes)
+        if not path.exists() or not row_bytes:
+            return None
+        capacity = os.path.getsize(path) // row_bytes
+        if capacity == 0:
+            return None
+        return np.memmap(path, dtype=dtype, mode='r+' if self.mode == 'a' else 'r', shape=(capacity, *row_shape))
+
+    def _maps(self):
+        if self._behaviors is None and self.behavior_dim is not None:
+            self._behaviors = self._map('behaviors.f8', np.float64, (self.behavior_dim,))
+        if self._frames is None and self.frame_shape is not None:
+            self._frames = self._map('frames.u8', np.uint8, self.frame_shape)
+
+    @property
+    def behaviors(self) -> np.ndarray:
+        """``(M, d)`` float64 array of every behavior vector, mapped from disk."""
+        self._maps()
+        if self._behaviors is None:
+            return np.empty((self.count, self.behavior_dim or 0))
+        return self._behaviors[:self.count]
+
+    @property
+    def frames(self) -> np.ndarray | None:
+        """``(M, H, W)`` uint8 array of every frame, mapped from disk, or ``None`` if the archive has no frames."""
+        self._maps()
+        if self.frame_shape is None:
+            return None
+        if self._frames is None:
+            return np.zeros((self.count, *self.frame_shape), dtype=np.uint8)
+        return self._frames[:self.count]
+
+    @property
+    def keys(self) -> list[str]:
+        """The key of each entry, in order."""
+        return self._keys
+
+    def index_of(self, key):
+        """Get the row of the last entry appended with ``key``. Raises :py:class:`KeyError` if there is none."""
+        if self._index is None:
+            self._index = {k: i for i, k in enumerate(self._keys)}
+        return self._index[key]
+
+    def __contains__(self, key):
+        try:
+            self.index_of(key)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        """Get the ``(behavior, frame)`` of an entry by key. ``frame`` is ``None`` if the archive has no frames."""
+        i = self.index_of(key)
+        frames = self.frames
+        return self.behaviors[i], None if frames is None else frames[i]
+
+    def append(self, key, behavior, frame=None):
+        """Add an entry. Appending a key again shadows its old entry."""
+        self.extend([key], [behavior], None if frame is None else [frame])
+
+    def extend(self, keys, behaviors, frames=None):
+        """Add many entries at once.
+
+        Parameters
+        ----------
+        keys : Sequence[str]
+            Keys may not contain newlines.
+        behaviors : array_like
+            ``(n, d)`` behavior vectors.
+        frames : Sequence[array_like], optional
+            One 2D image per entry. Frames which aren't ``frame_shape`` are :py:func:`downsample` d.
+        """
+        if self.mode != 'a':
+            raise OSError("Archive is open read-only. Open it with mode='a' to append.")
+        keys = [str(key) for key in keys]
+        if any('\n' in key for key in keys):
+            raise ValueError("Archive keys can't contain newlines.")
+        behaviors = np.asarray(behaviors, dtype=np.float64).reshape(len(keys), -1)
+        if self.behavior_dim is None:
+            self.behavior_dim = behaviors.shape[1]
+        elif behaviors.shape[1] != self.behavior_dim:
+            msg = f"Expected behaviors of length {self.behavior_dim}, got {behaviors.shape[1]}"
+            raise ValueError(msg)
+        if frames is not None:
+            if len(frames) != len(keys):
+                msg = f"Got {len(keys)} keys but {len(frames)} frames"
+                raise ValueError(msg)
+            if self.frame_shape is None:
+                self.frame_shape = tuple(np.shape(frames[0])[:2])
+            frames = [np.asarray(frame) for frame in frames]
+            frames = np.stack([frame if frame.shape == self.frame_shape and frame.dtype == np.uint8
+                               else downsample(frame, self.frame_shape) for frame in frames])
+
+        start, end = self.count, self.count + len(keys)
+        self._grow(end)
+        self._behaviors[start:end] = behaviors
+        if self.frame_shape is not None:
+            self._frames[start:end] = 0 if frames is None else frames
+        with open(self.path / 'keys.txt', 'a', encoding='utf-8') as f:
+            f.write(''.join(key + '\n' for key in keys))
+        self._keys.extend(keys)
+        if self._index is not None:
+            self._index.update((key, i) for i, key in enumerate(keys, start))
+        self.count = end
+
+    def _grow(self, rows):
+        self._maps()
+        arrays = [self._behaviors] + ([self._frames] if self.frame_shape is not None else [])
+        capacity = min(0 if array is None else len(array) for array in arrays)
+        if rows <= capacity:
+            return
+        rows = max(rows, capacity * 2, self.chunk)
+        self._flush_arrays()
+        self._behaviors = self._map('behaviors.f8', np.float64, (self.behavior_dim,), rows)
+        if self.frame_shape is not None:
+            self._frames = self._map('frames.u8', np.uint8, self.frame_shape, rows)
+
+    def _flush_arrays(self):
+        for array in (self._behaviors, self._frames):
+            if array is not None:
+                array.flush()
+
+    def flush(self):
+        """Write everything appended so far to disk, and record it in ``meta.json``."""
+        if self.mode != 'a':
+            return
+        self._flush_arrays()
+        meta = {'count': self.count, 'behavior_dim': self.behavior_dim,
+                'frame_shape': None if self.frame_shape is None else list(self.frame_shape)}
+        tmp = self.path / 'meta.json.tmp'
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.path / 'meta.json')
+
+    def close(self):
+        """:py:meth:`flush` and unmap the arrays."""
+        self.flush()
+        self._behaviors = self._frames = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"MemmapArchive({str(self.path)!r}, {self.count} entries, behavior_dim={self.behavior_dim}, frame_shape={self.frame_shape})"
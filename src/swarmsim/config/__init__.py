@@ -15,6 +15,9 @@ It also provides the interface for registering third-party types/classes.
 .. autoclass:: LazyKnownModules
     :members: world_types, agent_types, dictlike_types, initialized_natives
 
+.. autoclass:: LazyImport
+.. autoclass:: LazyDict
+
 .. autodata:: swarmsim.config.store
 
 Functions
@@ -42,6 +45,7 @@ Decorators
 
 """
 
+import importlib
 from dataclasses import fields
 
 
@@ -125,6 +129,65 @@ def filter_unexpected_fields(cls):
     return cls
 
 
+class LazyImport:
+    """A registry entry which is imported the first time it is looked up.
+
+    Registering built-in classes this way means a config which only uses a few of them
+    doesn't import every module (and heavy dependency) in the package.
+
+    Parameters
+    ----------
+    module : str
+        Module to import. Relative names are relative to :py:mod:`swarmsim.config`.
+    *names : str
+        Attributes of the module to get. With one name, the entry resolves to that attribute.
+        With several, it resolves to a tuple of them, i.e. ``(AgentClass, AgentConfigClass)``.
+
+    Examples
+    --------
+
+    .. code-block:: python
+
+       LazyImport('..sensors.BinaryFOVSensor', 'BinaryFOVSensor')
+    """
+    __slots__ = ('module', 'names')
+
+    def __init__(self, module: str, *names: str):
+        self.module = module
+        self.names = names
+
+    def load(self):
+        module = importlib.import_module(self.module, __name__)
+        values = tuple(getattr(module, name) for name in self.names)
+        return values[0] if len(values) == 1 else values
+
+    def __repr__(self):
+        return f"LazyImport({self.module!r}, {', '.join(map(repr, self.names))})"
+
+
+class LazyDict(dict):
+    """A dict which replaces :py:class:`LazyImport` values with what they import when they are looked up."""
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        if isinstance(value, LazyImport):
+            value = value.load()
+            super().__setitem__(key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return LazyDict(super().items())
+
+
 class LazyKnownModules:
     """Holds the registry of known classes
 
@@ -136,10 +199,12 @@ class LazyKnownModules:
     The registry will be initialized with all the built-in classes
     just before the first access of any of its known types.
     This is to avoid circular imports.
+    Built-in classes are registered as :py:class:`LazyImport` entries,
+    so each is only imported when a config first asks for it by name.
     """
     def __init__(self):
-        self._world_types = {}
-        self._agent_types = {}
+        self._world_types = LazyDict()
+        self._agent_types = LazyDict()
         self._dictlike_types = {}
         self._controllers = {}
         self._behaviors = {}
@@ -163,7 +228,7 @@ class LazyKnownModules:
 
     def add_dictlike_namespace(self, key: str):
         if key not in self._dictlike_types:
-            self._dictlike_types[key] = {}
+            self._dictlike_types[key] = LazyDict()
 
     def initialize_natives(self):
         if self.initialized_natives:
@@ -177,81 +242,62 @@ class LazyKnownModules:
         self.add_native_spawners()
 
     def add_native_world_types(self):
-        from ..world.RectangularWorld import RectangularWorld, RectangularWorldConfig
-
-        self._world_types['RectangularWorld'] = (RectangularWorld, RectangularWorldConfig)
+        self._world_types['RectangularWorld'] = LazyImport(
+            '..world.RectangularWorld', 'RectangularWorld', 'RectangularWorldConfig')
 
     def add_native_sensors(self):
-        from ..sensors.BinaryFOVSensor import BinaryFOVSensor
-        from ..sensors.BinaryLOSSensor import BinaryLOSSensor
-        from ..sensors.GenomeDependentSensor import GenomeBinarySensor
-        from ..sensors.RegionalSensor import RegionalSensor
-        from ..sensors.StaticSensor import StaticSensor
-
         self.add_dictlike_namespace('sensors')
 
-        self._dictlike_types['sensors']['BinaryFOVSensor'] = BinaryFOVSensor
-        self._dictlike_types['sensors']['BinaryLOSSensor'] = BinaryLOSSensor
-        self._dictlike_types['sensors']['GenomeBinarySensor'] = GenomeBinarySensor
-        self._dictlike_types['sensors']['RegionalSensor'] = RegionalSensor
-        self._dictlike_types['sensors']['StaticSensor'] = StaticSensor
+        sensors = self._dictlike_types['sensors']
+        sensors['BinaryFOVSensor'] = LazyImport('..sensors.BinaryFOVSensor', 'BinaryFOVSensor')
+        sensors['BinaryLOSSensor'] = LazyImport('..sensors.BinaryLOSSensor', 'BinaryLOSSensor')
+        sensors['GenomeBinarySensor'] = LazyImport('..sensors.GenomeDependentSensor', 'GenomeBinarySensor')
+        sensors['RegionalSensor'] = LazyImport('..sensors.RegionalSensor', 'RegionalSensor')
+        sensors['StaticSensor'] = LazyImport('..sensors.StaticSensor', 'StaticSensor')
 
     def add_native_controllers(self):
-        from ..agent.control.Controller import Controller
-        from ..agent.control.StaticController import StaticController
-        from ..agent.control.BinaryController import BinaryController
-        from ..agent.control.AgentMethodController import AgentMethodController
-        from ..agent.control.HomogeneousController import HomogeneousController
-
         self.add_dictlike_namespace('controller')
 
-        self._dictlike_types['controller']['Controller'] = Controller
-        self._dictlike_types['controller']['StaticController'] = StaticController
-        self._dictlike_types['controller']['BinaryController'] = BinaryController
-        self._dictlike_types['controller']['AgentMethodController'] = AgentMethodController
-        self._dictlike_types['controller']['HomogeneousController'] = HomogeneousController
+        controllers = self._dictlike_types['controller']
+        controllers['Controller'] = LazyImport('..agent.control.Controller', 'Controller')
+        controllers['StaticController'] = LazyImport('..agent.control.StaticController', 'StaticController')
+        controllers['BinaryController'] = LazyImport('..agent.control.BinaryController', 'BinaryController')
+        controllers['AgentMethodController'] = LazyImport('..agent.control.AgentMethodController', 'AgentMethodController')
+        controllers['HomogeneousController'] = LazyImport('..agent.control.HomogeneousController', 'HomogeneousController')
 
     def add_native_metrics(self):
         from .. import metrics
 
         self.add_dictlike_namespace('metrics')
 
-        native_metrics = {name: getattr(metrics, name) for name in metrics.__all__}
+        # swarmsim.metrics imports some metrics on first access, so look them up through it
+        native_metrics = {name: LazyImport('..metrics', name) for name in metrics.__all__}
         self._dictlike_types['metrics'].update(native_metrics)
 
     def add_native_agent_types(self):
 
         # actual agents
-        from ..agent.DiffDriveAgent import DifferentialDriveAgent, DifferentialDriveAgentConfig
-        # from ..agent.HumanAgent import HumanDrivenAgent, HumanDrivenAgentConfig
-        from ..agent.StaticAgent import StaticAgent, StaticAgentConfig
-        from ..agent.MazeAgent import MazeAgent, MazeAgentConfig
-
-        self._agent_types['MazeAgent'] = (MazeAgent, MazeAgentConfig)
-        self._agent_types['DiffDriveAgent'] = (DifferentialDriveAgent, DifferentialDriveAgentConfig)
-        # self._agent_types['HumanDrivenAgent'] = (HumanDrivenAgent, HumanDrivenAgentConfig)
-        self._agent_types['StaticAgent'] = (StaticAgent, StaticAgentConfig)
+        self._agent_types['MazeAgent'] = LazyImport('..agent.MazeAgent', 'MazeAgent', 'MazeAgentConfig')
+        self._agent_types['DiffDriveAgent'] = LazyImport(
+            '..agent.DiffDriveAgent', 'DifferentialDriveAgent', 'DifferentialDriveAgentConfig')
+        # self._agent_types['HumanDrivenAgent'] = LazyImport('..agent.HumanAgent', 'HumanDrivenAgent', 'HumanDrivenAgentConfig')
+        self._agent_types['StaticAgent'] = LazyImport('..agent.StaticAgent', 'StaticAgent', 'StaticAgentConfig')
 
         # world objects also use the agent creation system
-        from ..world.objects.StaticObject import StaticObject, StaticObjectConfig
-        from ..world.objects.DetectionRegion import DetectionRegion, DetectionRegionConfig
-        # from ..world.objects.TriggerRegion import TriggerRegion, TriggerRegionConfig
-
-        self._agent_types['StaticObject'] = (StaticObject, StaticObjectConfig)
-        self._agent_types['DetectionRegion'] = (DetectionRegion, DetectionRegionConfig)
-        # self._agent_types['TriggerRegion'] = (TriggerRegion, TriggerRegionConfig)
+        self._agent_types['StaticObject'] = LazyImport(
+            '..world.objects.StaticObject', 'StaticObject', 'StaticObjectConfig')
+        self._agent_types['DetectionRegion'] = LazyImport(
+            '..world.objects.DetectionRegion', 'DetectionRegion', 'DetectionRegionConfig')
+        # self._agent_types['TriggerRegion'] = LazyImport('..world.objects.TriggerRegion', 'TriggerRegion', 'TriggerRegionConfig')
 
     def add_native_spawners(self):
-        from ..world.spawners.AgentSpawner import AgentSpawner, UniformAgentSpawner, PointAgentSpawner
-        from ..world.spawners.ExcelSpawner import ExcelSpawner
-
         self.add_dictlike_namespace('spawners')
 
-        self._dictlike_types['spawners']['AgentSpawner'] = AgentSpawner
-        self._dictlike_types['spawners']['ExcelSpawner'] = ExcelSpawner
-        self._dictlike_types['spawners']['PointAgentSpawner'] = PointAgentSpawner
-        self._dictlike_types['spawners']['PointAgentSpawner'] = PointAgentSpawner
-        self._dictlike_types['spawners']['UniformAgentSpawner'] = UniformAgentSpawner
+        spawners = self._dictlike_types['spawners']
+        spawners['AgentSpawner'] = LazyImport('..world.spawners.AgentSpawner', 'AgentSpawner')
+        spawners['ExcelSpawner'] = LazyImport('..world.spawners.ExcelSpawner', 'ExcelSpawner')
+        spawners['PointAgentSpawner'] = LazyImport('..world.spawners.AgentSpawner', 'PointAgentSpawner')
+        spawners['UniformAgentSpawner'] = LazyImport('..world.spawners.AgentSpawner', 'UniformAgentSpawner')
 
 
 #: Holds the registry of known classes.
@@ -53,6 +53,35 @@ class AbstractMetric():
     def calculate(self):
         pass
 
+    @classmethod
+    def supports_trajectory(cls) -> bool:
+        """Returns True if this class's :py:meth:`calculate` has a matching :py:meth:`calculate_trajectory`.
+
+        Subclasses which override :py:meth:`calculate` but not :py:meth:`calculate_trajectory`
+        are calculated one step at a time instead.
+        """
+        for klass in cls.__mro__:
+            if 'calculate' in vars(klass):
+                return 'calculate_trajectory' in vars(klass)
+        return False
+
+    def calculate_trajectory(self, pos, dpos, angle):
+        """Calculate this metric for many recorded steps at once, for :py:func:`~swarmsim.metrics.replay.replay`.
+
+        Parameters
+        ----------
+        pos, dpos : numpy.ndarray
+            ``(T, N, 2)`` positions and velocities of every agent at each step.
+        angle : numpy.ndarray
+            ``(T, N)`` headings.
+
+        Returns
+        -------
+        numpy.ndarray | None
+            The value at each step, or ``None`` if this metric can only be
+            calculated one step at a time with :py:meth:`calculate`.
+        """
+
     # prevent pickling errors
     def __getstate__(self):
         d = self.__dict__.copy()
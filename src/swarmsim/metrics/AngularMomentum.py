@@ -30,6 +30,13 @@ class AngularMomentumBehavior(AbstractMetric):
         average_momentum = sum(momentum_list) / (r * n)
         self.set_value(average_momentum)
 
+    def calculate_trajectory(self, pos, dpos, angle):
+        n = pos.shape[1]
+        r = self.world_radius
+        d = pos - pos.mean(axis=1, keepdims=True)
+        momentum = dpos[..., 0] * d[..., 1] - dpos[..., 1] * d[..., 0]
+        return momentum.sum(axis=1) / (r * n)
+
     def center_of_mass(self):
         positions = [
             [
@@ -17,3 +17,6 @@ class AverageSpeedBehavior(AbstractMetric):
         velocities = [np.linalg.norm(agent.getVelocity()) for agent in self.population]
         average_speed = sum(velocities) / n
         self.set_value(average_speed)
+
+    def calculate_trajectory(self, pos, dpos, angle):
+        return np.linalg.norm(dpos, axis=2).sum(axis=1) / dpos.shape[1]
@@ -6,8 +6,6 @@ import warnings
 import numpy as np
 from typing import List
 
-import pygame.draw
-
 from .AbstractMetric import AbstractMetric
 from ..agent.MazeAgent import MazeAgent
 from ..util.geometry.Point import Point
@@ -41,5 +39,6 @@ class Centroid(AbstractMetric):
         self.set_value(self.centroid)
 
     def draw(self, screen, zoom=1.0):
+        import pygame.draw
         for centroid in self.value_history:
             pygame.draw.circle(screen, (255, 0, 255), centroid, 5, width=0)
@@ -1,6 +1,5 @@
 import itertools
 
-import pygame
 import numpy as np
 from scipy.spatial import Delaunay
 from .AbstractMetric import AbstractMetric
@@ -50,6 +49,7 @@ class Dispersal(AbstractMetric):
         self.set_value(dispersal if dispersal is not None else 0)
 
     def draw(self, screen, offset):
+        import pygame
         pan, zoom = np.asarray(offset[0]), offset[1]
         super().draw(screen, offset)
 
@@ -32,6 +32,15 @@ class GroupRotationBehavior(AbstractMetric):
         normalized_momentum = sum(momentum_list) / n
         self.set_value(normalized_momentum)
 
+    def calculate_trajectory(self, pos, dpos, angle):
+        n = pos.shape[1]
+        if n == 1:
+            return np.zeros(len(pos))
+        d = pos - pos.mean(axis=1, keepdims=True)
+        d = d / np.linalg.norm(d, axis=2, keepdims=True)
+        momentum = dpos[..., 0] * d[..., 1] - dpos[..., 1] * d[..., 0]
+        return momentum.sum(axis=1) / n
+
     def center_of_mass(self):
         positions = [
             [
@@ -1,7 +1,6 @@
 from .AbstractMetric import AbstractMetric
 import numpy as np
 from ripser import ripser
-import pygame
 
 class PersistentHomology(AbstractMetric):
     def __init__(self, history_size=100, dims=0, draw_cycles=False, max_death=False):
@@ -33,6 +32,7 @@ class PersistentHomology(AbstractMetric):
             self.set_value(np.nan)
 
     def draw(self, screen, offset=((0, 0), 1.0)):
+        import pygame
         # TODO: Implement offset/zoom
         if self.draw_cycles:
             cocycles = self.rips_data["cocycles"]
@@ -43,6 +43,15 @@ class RadialVarianceMetric(AbstractMetric):
         WEIGHT = 20.0
         self.set_value(radial_variance * WEIGHT)
 
+    def calculate_trajectory(self, pos, dpos, angle):
+        n = pos.shape[1]
+        r = self.world_radius
+        distance = np.linalg.norm(pos - pos.mean(axis=1, keepdims=True), axis=2)
+        variance = (distance - distance.mean(axis=1, keepdims=True)) ** 2
+        scaling_factor = (1 / (r * r * n)) if self.regularize else (1 / n)
+        WEIGHT = 20.0
+        return variance.sum(axis=1) * scaling_factor * WEIGHT
+
     def center_of_mass(self):
         positions = np.asarray([agent.getPosition() for agent in self.population])
         return positions.mean(axis=0)
@@ -38,6 +38,14 @@ class ScatterBehavior(AbstractMetric):
 
         self.set_value(scatter)
 
+    def calculate_trajectory(self, pos, dpos, angle):
+        n = pos.shape[1]
+        r = self.world_radius
+        distance = np.linalg.norm(pos - pos.mean(axis=1, keepdims=True), axis=2)
+        if self.regularize:
+            return (distance ** 2).sum(axis=1) / (r * r * n)
+        return distance.sum(axis=1) / n
+
     def center_of_mass(self):
         positions = [
             [
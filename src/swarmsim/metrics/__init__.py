@@ -1,3 +1,14 @@
+"""Houses **metric** submodules.
+
+Metrics measure the behavior of the swarm as the world runs.
+
+Metrics with heavy dependencies (``circle_fit``, ``scipy.spatial``) are only
+imported from their submodules when they are first accessed.
+
+"""
+
+import importlib
+
 from .AbstractMetric import AbstractMetric
 from .AverageSpeed import AverageSpeedBehavior
 from .SubGroupWrapper import SubGroupBehavior
@@ -12,18 +23,20 @@ from .TotalCollisions import TotalCollisionsBehavior
 from .RadialVariance import RadialVarianceMetric
 from .Circliness import Fatness, Fatness2, Tangentness, Circliness, RoutRin
 from .Aggregation import Aggregation
-from .BerlingerCircularity import (
-    InstantLSQCircularity,
-    InstantHyperLSQCircularity,
-    InstantRiemannCircularity,
-    InstantLMCircularity,
-    InstantPrattSVDCircularity,
-    InstantTaubinSVDCircularity,
-    InstantHyperSVDCircularity,
-    InstantKMHCircularity,
-)
 from .DistanceSizeRatio import DistanceSizeRatio
-from .DelaunayDispersal import Dispersal
+
+# metrics imported on first access: name -> submodule
+_LAZY = {
+    "InstantLSQCircularity": "BerlingerCircularity",
+    "InstantHyperLSQCircularity": "BerlingerCircularity",
+    "InstantRiemannCircularity": "BerlingerCircularity",
+    "InstantLMCircularity": "BerlingerCircularity",
+    "InstantPrattSVDCircularity": "BerlingerCircularity",
+    "InstantTaubinSVDCircularity": "BerlingerCircularity",
+    "InstantHyperSVDCircularity": "BerlingerCircularity",
+    "InstantKMHCircularity": "BerlingerCircularity",
+    "Dispersal": "DelaunayDispersal",
+}
 
 __all__ = [
     "AbstractMetric",
@@ -57,3 +70,16 @@ __all__ = [
     "DistanceSizeRatio",
     "Dispersal",
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
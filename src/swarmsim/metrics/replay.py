@@ -0,0 +1,203 @@
+"""Recalculate metrics from a recorded trajectory, without re-running the simulation.
+
+A trajectory recorded by :py:class:`~swarmsim.world.subscribers.TrajectoryRecorder.TrajectoryRecorder`
+or :py:class:`~swarmsim.util.processing.multicoreprocessing.Trajectory` holds the position
+and heading of every agent at each step. :py:func:`replay` feeds it to metrics through a
+:py:class:`ReplayWorld` of stand-in agents, which have no sensors or controllers.
+
+Metrics which implement :py:meth:`~swarmsim.metrics.AbstractMetric.AbstractMetric.calculate_trajectory`,
+such as :py:class:`~swarmsim.metrics.ScatterBehavior.ScatterBehavior`,
+:py:class:`~swarmsim.metrics.RadialVariance.RadialVarianceMetric` and
+:py:class:`~swarmsim.metrics.AngularMomentum.AngularMomentumBehavior`,
+are calculated for every step at once. Others are calculated one step at a time.
+
+.. code-block:: python
+
+    from swarmsim.metrics import ScatterBehavior, Circliness
+    from swarmsim.metrics.replay import replay
+
+    values = replay([ScatterBehavior(), Circliness()], RecordedTrajectory('out/run1'), world_config=world_config)
+    values['Scatter']  # (T,) array
+
+.. autofunction:: replay
+.. autoclass:: ReplayWorld
+    :members:
+.. autoclass:: ReplayAgent
+    :members:
+
+"""
+
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class ReplayAgent:
+    """Stands in for an agent during :py:func:`replay`. Only has the state read by metrics."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.pos = np.zeros(2)
+        self.dpos = np.zeros(2)
+        self.angle = 0.0
+        self.collision_flag = False
+        self.dead = False
+
+    def getPosition(self):
+        return self.pos
+
+    def getVelocity(self):
+        return self.dpos
+
+    def get_heading(self):
+        return self.angle
+
+    def get_x_pos(self):
+        return self.pos[0]
+
+    def get_y_pos(self):
+        return self.pos[1]
+
+    def __repr__(self):
+        return f"ReplayAgent({self.name!r}, pos={self.pos}, angle={self.angle})"
+
+
+class ReplayWorld:
+    """Stands in for a world during :py:func:`replay`.
+
+    Parameters
+    ----------
+    n_agents : int
+        Number of agents.
+    world_config : AbstractWorldConfig, optional
+        The config of the recorded world. Metrics read i.e. its ``radius`` and ``goals``.
+    size : tuple[float, float], optional
+        The size of the recorded world, if ``world_config`` isn't given.
+    """
+
+    def __init__(self, n_agents, world_config=None, size=None):
+        if world_config is None:
+            if size is None:
+                raise ValueError("ReplayWorld needs the world_config or size of the recorded world.")
+            size = np.asarray(size, dtype=np.float64)
+            world_config = SimpleNamespace(size=size, radius=np.linalg.norm(size / 2), goals=[])
+        self.config = world_config
+        size = getattr(world_config, 'size', None)
+        if size is not None:
+            self.w, self.h = size[0], size[1]
+        self.goals = getattr(world_config, 'goals', None) or []
+        self.population = [ReplayAgent(name=str(i)) for i in range(n_agents)]
+        self.total_steps = 0
+        self.highlighted_set = []
+        self.metrics = []
+
+    @property
+    def population_size(self):
+        return len(self.population)
+
+    def set_state(self, step, pos, dpos, angle):
+        """Move every agent to the state at one recorded step."""
+        self.total_steps = step
+        for i, agent in enumerate(self.population):
+            agent.pos = pos[i]
+            agent.dpos = dpos[i]
+            agent.angle = angle[i]
+
+
+def _split(trajectory, columns):
+    # get (pos, dpos, angle) from a (T, N, k) trajectory
+    if hasattr(trajectory, 'to_numpy') and not isinstance(trajectory, np.ndarray):
+        columns = columns or getattr(trajectory, 'columns', None)
+        trajectory = trajectory.to_numpy()
+    trajectory = np.asarray(trajectory, dtype=np.float64)
+    if trajectory.ndim != 3 or trajectory.shape[2] < 2:
+        msg = f"Expected a (T, N, k) trajectory with k >= 2, got shape {trajectory.shape}"
+        raise ValueError(msg)
+    columns = list(columns or ('x', 'y', 'heading')[:trajectory.shape[2]])
+    if len(columns) != trajectory.shape[2]:
+        msg = f"Got {len(columns)} column names for a trajectory with {trajectory.shape[2]} columns"
+        raise ValueError(msg)
+
+    def column(*names):
+        for name in names:
+            if name in columns:
+                return trajectory[:, :, columns.index(name)]
+        return None
+
+    pos = np.stack([column('x'), column('y')], axis=2)
+    angle = column('heading', 'angle')
+    if angle is None:
+        angle = np.zeros(pos.shape[:2])
+    dx, dy = column('dx'), column('dy')
+    if dx is not None and dy is not None:
+        dpos = np.stack([dx, dy], axis=2)
+    else:  # the change since the previous recorded step
+        dpos = np.zeros_like(pos)
+        dpos[1:] = pos[1:] - pos[:-1]
+    return pos, dpos, angle
+
+
+def replay(metrics, trajectory, columns=None, world_config=None, size=None, steps=None, vectorize=True):
+    """Calculate metrics over a recorded trajectory.
+
+    Parameters
+    ----------
+    metrics : list[AbstractMetric]
+        Metrics to calculate. They are reset and attached to a :py:class:`ReplayWorld`,
+        and their ``value_history`` is filled as if they had run in the recorded world.
+    trajectory : array_like | RecordedTrajectory | Trajectory
+        ``(T, N, k)`` recorded states. Anything with ``to_numpy()`` and ``columns``,
+        i.e. a :py:class:`~swarmsim.world.subscribers.TrajectoryRecorder.RecordedTrajectory`, also works.
+    columns : Sequence[str], optional
+        Names of the last axis of ``trajectory``. ``x`` and ``y`` are needed.
+        ``heading`` and ``dx``, ``dy`` are used if present; otherwise headings are 0
+        and velocities are the change in position since the previous recorded step.
+        Defaults to ``('x', 'y', 'heading')``, or the trajectory's own ``columns``.
+    world_config : AbstractWorldConfig, optional
+        The config of the recorded world.
+    size : tuple[float, float], optional
+        The size of the recorded world, if ``world_config`` isn't given.
+    steps : array_like, optional
+        The world step of each recorded step, i.e. ``RecordedTrajectory.steps``. Defaults to ``1..T``.
+    vectorize : bool, default=True
+        If False, calculate every metric one step at a time, even those with ``calculate_trajectory``.
+
+    Returns
+    -------
+    dict[str, numpy.ndarray]
+        The value of each metric at each recorded step, by metric name.
+    """
+    if steps is None and hasattr(trajectory, 'steps') and not isinstance(trajectory, np.ndarray):
+        steps = trajectory.steps
+    pos, dpos, angle = _split(trajectory, columns)
+    n_steps, n_agents = pos.shape[:2]
+    steps = np.arange(1, n_steps + 1) if steps is None else np.asarray(steps)
+
+    world = ReplayWorld(n_agents, world_config, size)
+    world.metrics = list(metrics)
+    for metric in world.metrics:
+        metric.reset()
+        metric.attach_world(world)
+
+    results = {}
+    stepwise = []
+    for metric in world.metrics:
+        values = metric.calculate_trajectory(pos, dpos, angle) if vectorize and metric.supports_trajectory() else None
+        if values is None:
+            stepwise.append(metric)
+            continue
+        history = list(values) if metric.history_size is None else list(values[len(values) - metric.history_size:])
+        metric.value_history = history
+        metric.current_value = history[-1] if history else None
+        results[metric.name] = np.asarray(values)
+
+    if stepwise:
+        collected = {id(metric): [] for metric in stepwise}
+        for t in range(n_steps):
+            world.set_state(int(steps[t]), pos[t], dpos[t], angle[t])
+            for metric in stepwise:
+                metric.calculate()
+                collected[id(metric)].append(metric.current_value)
+        for metric in stepwise:
+            results[metric.name] = np.asarray(collected[id(metric)])
+    return results
@@ -1,6 +1,6 @@
-import pygame
 import numpy as np
 import math
+from itertools import chain
 from .AbstractSensor import AbstractSensor
 from typing import List
 from ..world.goals.Goal import CylinderGoal
@@ -235,13 +235,83 @@ class BinaryFOVSensor(AbstractSensor):
         goal_detected = self.check_goals(world=world)
         if not goal_detected and not only_check_goals:
             self.checkForLOSCollisions(world=world)
+        self.update_history()
+
+    def update_history(self):
         if self.store_history:
             if self.agent.agent_in_sight:
                 self.history.append(int(self.agent.agent_in_sight.name))
             else:
                 self.history.append(-1)
 
+    @classmethod
+    def supports_step_batch(cls) -> bool:
+        """Returns True if sensors of this class can be stepped together with :py:meth:`step_batch`."""
+        return (cls.step is BinaryFOVSensor.step
+                and cls.checkForLOSCollisions is BinaryFOVSensor.checkForLOSCollisions
+                and cls.determineState is BinaryFOVSensor.determineState)
+
+    @classmethod
+    def step_batch(cls, sensors, world):
+        """Step many sensors at once.
+
+        Goal checks and wall sensing are still done per sensor, but agent detection
+        for every sensor is done together by :py:func:`fov_detect`, and the false
+        positive/negative noise is drawn in one go.
+
+        Unlike :py:meth:`checkForLOSCollisions`, which reports the first agent it finds
+        in population order, the detected agent is the nearest one.
+
+        Parameters
+        ----------
+        sensors : list[BinaryFOVSensor]
+            Sensors whose agents are registered with ``world.population_state``.
+        world : World
+            The world the sensors' agents live in.
+        """
+        sensing = []
+        for sensor in sensors:
+            super(BinaryFOVSensor, sensor).step(world=world)
+            if sensor.check_goals(world=world):
+                continue
+            if sensor.walls is not None or sensor.angle is None:
+                sensor.checkForLOSCollisions(world=world)  # not batched
+                continue
+            sensor.time_since_last_sensing += 1
+            if sensor.time_since_last_sensing % sensor.time_step_between_sensing != 0:
+                continue
+            sensor.time_since_last_sensing = 0
+            sensing.append(sensor)
+
+        if sensing:
+            state = world.population_state
+            state.sync(world.population)
+            rows = np.array([sensor.agent._population_index for sensor in sensing], dtype=np.intp)
+            params = np.array([(sensor.angle, sensor.theta, sensor.bias, sensor.r, sensor.fp, sensor.fn)
+                               for sensor in sensing], dtype=np.float64)
+            angle, theta, bias, r, fp, fn = params.T
+            _detected, nearest, _distance = fov_detect(
+                state.pos[rows], state.angle[rows] + angle, theta, bias, r, state.radius[rows], state.pos,
+            )
+            seen = nearest >= 0
+            noise = np.random.random_sample(len(sensing))  # one draw per sensor, as determineState() does
+            reported = np.where(seen, noise >= fn, noise < fp)
+            agents = state.agents
+            for sensor, i, real, report in zip(sensing, nearest.tolist(), seen.tolist(), reported.tolist()):
+                invert = sensor.invert
+                sensor.current_state = int(report != invert)
+                if real and report:
+                    sensor.agent_in_sight = agent = agents[i]
+                    sensor.detection_id = agent.detection_id
+                else:
+                    sensor.agent_in_sight = None
+                    sensor.detection_id = 0
+
+        for sensor in sensors:
+            sensor.update_history()
+
     def draw(self, screen, offset=((0, 0), 1.0)):
+        import pygame
         super(BinaryFOVSensor, self).draw(screen, offset)
         pan, zoom = np.asarray(offset[0]), np.asarray(offset[1])
         zoom: float
@@ -385,3 +455,107 @@ class BinaryFOVSensor(AbstractSensor):
             goal_sensing_range=d["goal_sensing_range"],
             seed=d["seed"] if "seed" in d else None,
         )
+
+
+def fov_detect(origins, headings, theta, bias, r, radius, targets, chunk_size=4096, groups=None, target_groups=None):
+    """Check many field-of-view cones against many circles at once.
+
+    This does the same test as :py:meth:`BinaryFOVSensor.circle_interesect_sensing_cone`
+    for every cone against every target strictly closer than its range ``r``.
+    A target is seen if its center is inside the cone, or if it is within ``radius``
+    of either edge of the cone. A cone never sees a target at its own origin.
+
+    Parameters
+    ----------
+    origins : numpy.ndarray
+        ``(M, 2)`` cone origins.
+    headings : numpy.ndarray
+        ``(M,)`` line of sight angles in radians, before ``bias``.
+    theta : numpy.ndarray
+        ``(M,)`` half-angles of the cones.
+    bias : numpy.ndarray
+        ``(M,)`` rotation of each cone away from its heading.
+    r : numpy.ndarray
+        ``(M,)`` sensing range of each cone.
+    radius : numpy.ndarray
+        ``(M,)`` radius assumed for targets near the edges of each cone.
+    targets : numpy.ndarray
+        ``(N, 2)`` target centers.
+    chunk_size : int, default=4096
+        Number of cones tested at a time, which bounds the memory used when many targets are in range.
+    groups : numpy.ndarray, optional
+        ``(M,)`` integer group of each cone, i.e. which of several independent worlds it is in.
+        If given, cones only see targets in the same group, and ``target_groups`` must be given too.
+    target_groups : numpy.ndarray, optional
+        ``(N,)`` integer group of each target.
+
+    Returns
+    -------
+    detected : numpy.ndarray
+        ``(M,)`` bool, True if the cone sees any target.
+    nearest : numpy.ndarray
+        ``(M,)`` index of the nearest seen target, or -1.
+    distance : numpy.ndarray
+        ``(M,)`` distance to the nearest seen target, or ``inf``.
+    """
+    origins = np.asarray(origins, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    m = len(origins)
+    r, radius = np.broadcast_to(r, (m,)), np.broadcast_to(radius, (m,))
+    theta = np.broadcast_to(theta, (m,))
+    nearest = np.full(m, -1, dtype=np.intp)
+    distance = np.full(m, np.inf)
+    if not m or not len(targets):
+        return nearest >= 0, nearest, distance
+
+    from scipy.spatial import cKDTree
+
+    if groups is not None:
+        # put each group on its own plane, further apart than any cone can see.
+        # distances within a group are unchanged, as the third coordinates cancel out exactly.
+        spacing = float(np.max(r)) + 1.0
+        origins = np.column_stack((origins, np.asarray(groups, dtype=np.float64) * spacing))
+        targets = np.column_stack((targets, np.asarray(target_groups, dtype=np.float64) * spacing))
+    tree = cKDTree(targets)
+    sight = np.broadcast_to(headings + bias, (m,))
+    for start in range(0, m, chunk_size):
+        chunk = slice(start, start + chunk_size)
+        k, t, d = _fov_pairs(tree, origins[chunk], sight[chunk], theta[chunk], r[chunk], radius[chunk])
+        if len(k):
+            order = np.lexsort((t, d, k))
+            k, t, d = k[order] + start, t[order], d[order]
+            first = np.r_[True, k[1:] != k[:-1]]
+            nearest[k[first]] = t[first]
+            distance[k[first]] = d[first]
+    return nearest >= 0, nearest, distance
+
+
+def _fov_pairs(tree, origins, sight, theta, r, radius):
+    # get every (cone, target) pair where the cone sees the target, and the distance between them
+    m = len(origins)
+    # bag every target within range of each cone
+    neighbors = tree.query_ball_point(origins, r)
+    counts = np.fromiter(map(len, neighbors), dtype=np.intp, count=m)
+    k = np.repeat(np.arange(m), counts)
+    t = np.fromiter(chain.from_iterable(neighbors), dtype=np.intp, count=counts.sum())
+    u = tree.data[t, :2] - origins[k, :2]
+    d = np.hypot(u[:, 0], u[:, 1])
+    in_range = d < r[k]
+    k, t, u, d = k[in_range], t[in_range], u[in_range], d[in_range]
+
+    left = sight + theta
+    right = sight - theta
+    sight_x, sight_y = np.cos(sight)[k], np.sin(sight)[k]
+    left_x, left_y = np.cos(left)[k], np.sin(left)[k]
+    right_x, right_y = np.cos(right)[k], np.sin(right)[k]
+    ux, uy = u[:, 0], u[:, 1]
+
+    ahead = ux * sight_x + uy * sight_y > 0
+    cross_l = left_x * uy - left_y * ux
+    cross_r = ux * right_y - uy * right_x
+    inside = np.sign(cross_l) == np.sign(cross_r)
+    # distance from the target center to each edge line of the cone
+    near_l = np.abs(cross_l) < radius[k]
+    near_r = np.abs(cross_r) < radius[k]
+    seen = ahead & (inside | near_l | near_r)
+    return k[seen], t[seen], d[seen]
@@ -1,7 +1,7 @@
-import pygame
 import numpy as np
 import math
 from .AbstractSensor import AbstractSensor
+from ..util.collections import RingBuffer
 from typing import List
 
 
@@ -10,8 +10,9 @@ class BinaryLOSSensor(AbstractSensor):
         super().__init__(agent=agent, parent=parent, draw=draw)
         self.current_state = 0
         self.angle = angle
-        self.history = []
         self.hist_len = history_length
+        # holds up to hist_len + 1 values, same as the list it replaced
+        self.history = RingBuffer(history_length + 1, dtype=np.int8)
         self.width = width
         self.show = draw
 
@@ -24,7 +25,7 @@ class BinaryLOSSensor(AbstractSensor):
         d_hat = d / np.linalg.norm(d)
 
         # Check seen agent from last frame first, to avoid expensive computation
-        if self.agent.agent_in_sight is not None and not self.agent.agent_in_sight.deleted:
+        if self.agent.agent_in_sight is not None and not getattr(self.agent.agent_in_sight, 'deleted', False):
             agent = self.agent.agent_in_sight
             if self.agent_in_sight(agent, p_0, d_hat):
                 self.agent.agent_in_sight = agent
@@ -67,7 +68,51 @@ class BinaryLOSSensor(AbstractSensor):
         super(BinaryLOSSensor, self).step(world=world)
         self.checkForLOSCollisions(world=world)
 
+    @classmethod
+    def supports_step_batch(cls) -> bool:
+        """Returns True if sensors of this class can be stepped together with :py:meth:`step_batch`."""
+        return (cls.step is BinaryLOSSensor.step
+                and cls.checkForLOSCollisions is BinaryLOSSensor.checkForLOSCollisions
+                and cls.agent_in_sight is BinaryLOSSensor.agent_in_sight)
+
+    @classmethod
+    def step_batch(cls, sensors, world):
+        """Step many sensors at once using :py:func:`los_detect`.
+
+        Like :py:meth:`checkForLOSCollisions`, an agent which was seen last step is kept
+        if it is still in sight. Otherwise, the nearest agent hit by the ray is reported,
+        rather than the first one in population order.
+
+        Parameters
+        ----------
+        sensors : list[BinaryLOSSensor]
+            Sensors whose agents are registered with ``world.population_state``.
+        world : World
+            The world the sensors' agents live in.
+        """
+        for sensor in sensors:
+            super(BinaryLOSSensor, sensor).step(world=world)
+        if not sensors:
+            return
+        state = world.population_state
+        state.sync(world.population)
+        agents = [sensor.agent for sensor in sensors]
+        rows = np.array([agent._population_index for agent in agents], dtype=np.intp)
+        offsets = np.array([0.0 if sensor.angle is None else sensor.angle for sensor in sensors], dtype=np.float64)
+        previous = np.array([
+            -1 if (seen := agent.agent_in_sight) is None or seen not in state else seen._population_index
+            for agent in agents
+        ], dtype=np.intp)
+        hits = los_detect(state.pos[rows], state.angle[rows] + offsets, state.pos, state.radius,
+                          exclude=rows, previous=previous)
+        population = state.agents
+        for sensor, agent, hit in zip(sensors, agents, hits.tolist()):
+            agent.agent_in_sight = population[hit] if hit >= 0 else None
+            sensor.current_state = int(hit >= 0)
+            sensor.add_to_history(sensor.current_state)
+
     def draw(self, screen, offset=((0, 0), 1.0)):
+        import pygame
         # TODO: Implement offset
         pan, zoom = np.asarray(offset[0]), np.asarray(offset[1])
         if not self.show:
@@ -100,8 +145,6 @@ class BinaryLOSSensor(AbstractSensor):
         return self.agent.x_pos + math.cos(self.angle + self.agent.angle), self.agent.y_pos + math.sin(self.angle + self.agent.angle)
 
     def add_to_history(self, value):
-        if len(self.history) > self.hist_len:
-            self.history = self.history[1:]
         self.history.append(value)
 
     def as_config_dict(self):
@@ -117,4 +160,67 @@ class BinaryLOSSensor(AbstractSensor):
             parent=None,
             angle=d["angle"],
             history_length=d["history_length"],
-        )
\ No newline at end of file
+        )
+
+
+def los_detect(origins, headings, targets, radii, exclude=None, previous=None, chunk_size=2**22):
+    """Cast many rays against many circles at once.
+
+    This is the same test as :py:meth:`BinaryLOSSensor.agent_in_sight`,
+    done for every ray against every circle.
+
+    Parameters
+    ----------
+    origins : numpy.ndarray
+        ``(M, 2)`` ray origins.
+    headings : numpy.ndarray
+        ``(M,)`` ray directions in radians.
+    targets : numpy.ndarray
+        ``(N, 2)`` circle centers.
+    radii : numpy.ndarray
+        ``(N,)`` circle radii.
+    exclude : numpy.ndarray, optional
+        ``(M,)`` index of a circle each ray should ignore (i.e. its own agent), or -1.
+    previous : numpy.ndarray, optional
+        ``(M,)`` index of the circle each ray hit last time, or -1.
+        If that circle is still hit, it is returned instead of the nearest.
+    chunk_size : int
+        Rough limit on the number of ray-circle tests held in memory at once.
+
+    Returns
+    -------
+    numpy.ndarray
+        ``(M,)`` index of the circle hit by each ray, or -1.
+    """
+    origins = np.asarray(origins, dtype=np.float64)
+    targets = np.asarray(targets, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+    m, n = len(origins), len(targets)
+    hits = np.full(m, -1, dtype=np.intp)
+    if not m or not n:
+        return hits
+    exclude = np.full(m, -1, dtype=np.intp) if exclude is None else np.asarray(exclude, dtype=np.intp)
+    previous = np.full(m, -1, dtype=np.intp) if previous is None else np.asarray(previous, dtype=np.intp)
+    directions = np.column_stack((np.cos(headings), np.sin(headings)))
+    r_2 = radii * radii
+    step = max(1, chunk_size // n)
+    for lo in range(0, m, step):
+        hi = min(m, lo + step)
+        e = targets[None, :, :] - origins[lo:hi, None, :]  # (k, N, 2)
+        a = np.einsum('knd,kd->kn', e, directions[lo:hi])
+        e_2 = np.einsum('knd,knd->kn', e, e)
+        clearance = r_2[None, :] - e_2 + a * a
+        hit = (a >= 0) & (clearance >= 0)
+        ks = np.arange(hi - lo)
+        own = exclude[lo:hi]
+        hit[ks[own >= 0], own[own >= 0]] = False
+        # distance along the ray to where it enters each circle
+        entry = np.where(hit, a - np.sqrt(np.maximum(clearance, 0)), np.inf)
+        nearest = np.argmin(entry, axis=1)
+        chunk_hits = np.where(hit[ks, nearest], nearest, -1)
+        prev = previous[lo:hi]
+        keep = prev >= 0
+        keep[keep] = hit[ks[keep], prev[keep]]
+        chunk_hits[keep] = prev[keep]
+        hits[lo:hi] = chunk_hits
+    return hits
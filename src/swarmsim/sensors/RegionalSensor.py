@@ -1,4 +1,3 @@
-import pygame
 import numpy as np
 import math
 from .AbstractSensor import AbstractSensor
@@ -30,6 +29,7 @@ class RegionalSensor(AbstractSensor):
         self.checkForLOSCollisions(world=world)
 
     def draw(self, screen, zoom=1.0):
+        import pygame
         if not self.show:
             return
         super(RegionalSensor, self).draw(screen, zoom)
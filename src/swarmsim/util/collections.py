@@ -1,5 +1,7 @@
 from typing import Any
 
+import numpy as np
+
 
 class FlagSet(set):
     def __init__(self, flags):
@@ -204,3 +206,50 @@ class FlagSet(set):
             return set(self.flags) < set(other.flags)
         elif isinstance(other, set):
             return set(self.flags) < other
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO backed by a preallocated numpy array.
+
+    Appending to a full buffer overwrites the oldest value.
+    Iterating, indexing and converting to an array give values oldest first,
+    so it can stand in for a list which is trimmed from the front.
+    """
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = max(int(capacity), 1)
+        self.data = np.zeros(self.capacity, dtype=dtype)
+        self.start = 0
+        self.size = 0
+
+    def append(self, value):
+        end = (self.start + self.size) % self.capacity
+        self.data[end] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+    def to_numpy(self):
+        """Get a copy of the contents, oldest first."""
+        return np.roll(self.data, -self.start)[:self.size]
+
+    def __array__(self, dtype=None, copy=None):
+        a = self.to_numpy()
+        return a if dtype is None else a.astype(dtype)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return iter(self.to_numpy().tolist())
+
+    def __getitem__(self, i):
+        return self.to_numpy()[i]
+
+    def __repr__(self):
+        return f"RingBuffer({self.to_numpy().tolist()}, capacity={self.capacity})"
@@ -1,7 +1,6 @@
 from itertools import product
 from functools import cached_property
 
-import pygame
 import numpy as np
 from shapely.coordinates import get_coordinates
 from shapely.geometry.base import BaseGeometry
@@ -59,6 +58,7 @@ class AABB:
         return cls([p, p + size])
 
     def draw(self, screen, offset=((0, 0), 1.0), color=(255, 255, 0)):
+        import pygame
         pan, zoom = np.asarray(offset[0]), offset[1]
         if self.is_intersected:
             color = (0, 255, 0)
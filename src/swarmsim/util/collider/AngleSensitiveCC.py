@@ -1,4 +1,3 @@
-import pygame
 import numpy as np
 import math
 from .Collider import CircularCollider
@@ -31,6 +30,7 @@ class AngleSensitiveCC(CircularCollider):
         return ret
 
     def draw(self, screen, color=(0, 255, 0)):
+        import pygame
         SHOW_ANGLE_VECTORS = True
         width = 2
         if self.within_range:
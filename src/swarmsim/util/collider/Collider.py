@@ -1,4 +1,3 @@
-import pygame
 import numpy as np
 import shapely.geometry as sg
 from shapely.ops import nearest_points
@@ -75,6 +74,7 @@ class CircularCollider(Collider):
         a.wkt
 
     def draw(self, screen, color=(0, 255, 0)):
+        import pygame
         super().draw(screen, color)
         pygame.draw.circle(screen, self.color, (self.x, self.y), self.r, 3)
 
@@ -0,0 +1,173 @@
+"""Static line segments with a uniform grid index.
+
+.. autoclass:: SegmentSet
+    :members:
+
+"""
+
+import math
+
+import numpy as np
+
+
+class SegmentSet:
+    """A fixed set of 2D line segments, bucketed into a uniform grid.
+
+    Segment ``i`` is ``segments[i]``, from ``segments[i, 0]`` to ``segments[i, 1]``.
+    Queries return segment indices in ascending order, so results can be
+    processed in the same order the segments were given.
+
+    Parameters
+    ----------
+    segments : array_like
+        ``(S, 2, 2)`` segment endpoints.
+    cell_size : float, optional
+        Width of a grid cell. Defaults to the median segment extent.
+    owners : array_like, optional
+        ``(S,)`` non-decreasing index of the object each segment came from.
+        See :py:meth:`resolve_circle`. By default, every segment belongs to one object.
+    """
+
+    def __init__(self, segments, cell_size=None, owners=None):
+        self.segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        #: numpy.ndarray: ``(S,)`` index of the object each segment came from.
+        self.owners = np.zeros(len(self.segments), dtype=np.intp) if owners is None else np.asarray(owners, dtype=np.intp)
+        self.start = self.segments[:, 0]
+        self.vector = self.segments[:, 1] - self.segments[:, 0]
+        self.length_2 = np.einsum('ij,ij->i', self.vector, self.vector)
+        lo = self.segments.min(axis=1)
+        hi = self.segments.max(axis=1)
+        if cell_size is None:
+            extents = (hi - lo).max(axis=1) if len(self) else np.ones(1)
+            cell_size = float(np.median(extents))
+        self.cell_size = max(cell_size, 1e-6)
+        #: dict[tuple[int, int], numpy.ndarray]: segment indices in each occupied cell.
+        self.cells = {}
+        cells = {}
+        kmin = np.floor(lo / self.cell_size).astype(np.int64).tolist()
+        kmax = np.floor(hi / self.cell_size).astype(np.int64).tolist()
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(kmin, kmax)):
+            for kx in range(x0, x1 + 1):
+                for ky in range(y0, y1 + 1):
+                    cells.setdefault((kx, ky), []).append(i)
+        self.cells = {key: np.array(idx, dtype=np.intp) for key, idx in cells.items()}
+
+    def __len__(self):
+        return len(self.segments)
+
+    @classmethod
+    def from_objects(cls, objects, cell_size=None):
+        """Collect the ``get_sensing_segments()`` of each object, in order."""
+        segments = []
+        owners = []
+        for i, obj in enumerate(objects):
+            getter = getattr(obj, 'get_sensing_segments', None)
+            if getter is not None:
+                found = [np.asarray(seg, dtype=np.float64) for seg in getter()]
+                segments.extend(found)
+                owners.extend([i] * len(found))
+        return cls(np.array(segments, dtype=np.float64).reshape(-1, 2, 2), cell_size=cell_size, owners=owners)
+
+    def query(self, lo, hi):
+        """Get the indices of segments which may pass through the box from ``lo`` to ``hi``.
+
+        Returns
+        -------
+        numpy.ndarray
+            Sorted, unique segment indices.
+        """
+        if not self.cells:
+            return np.empty(0, dtype=np.intp)
+        cs = self.cell_size
+        x0, y0 = math.floor(lo[0] / cs), math.floor(lo[1] / cs)
+        x1, y1 = math.floor(hi[0] / cs), math.floor(hi[1] / cs)
+        found = []
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            for (kx, ky), idx in self.cells.items():
+                if x0 <= kx <= x1 and y0 <= ky <= y1:
+                    found.append(idx)
+        else:
+            cells = self.cells
+            for kx in range(x0, x1 + 1):
+                for ky in range(y0, y1 + 1):
+                    idx = cells.get((kx, ky))
+                    if idx is not None:
+                        found.append(idx)
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        if len(found) == 1:
+            return found[0]
+        return np.unique(np.concatenate(found))
+
+    def offsets(self, points, idx):
+        """Get the vectors from ``points`` to the closest point on segments ``idx``.
+
+        ``points`` may be a single point or an array of points the same length as ``idx``.
+        """
+        points = np.asarray(points, dtype=np.float64)
+        start = self.start[idx]
+        vector = self.vector[idx]
+        length_2 = self.length_2[idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            u = np.einsum('ij,ij->i', points - start, vector) / length_2
+        u = np.clip(np.nan_to_num(u, nan=0.0), 0.0, 1.0)
+        return start + u[:, None] * vector - points
+
+    def resolve_circle(self, position, radius):
+        """Push a circle out of the segments it touches.
+
+        Objects are checked in order. All segments of one object are tested against the
+        center as it was before that object, and each one closer than ``radius`` pushes the
+        circle away by ``radius - |offset| + 1`` along each axis. The next object sees the
+        corrected center. This is the same as the per-object loop walls were resolved with before.
+
+        Returns
+        -------
+        position : numpy.ndarray
+            The corrected position.
+        hit : bool
+            True if any segment touched the circle.
+        """
+        position = np.array(position, dtype=np.float64)
+        hit = False
+        after = 0  # first segment not yet checked
+        while True:
+            idx = self.query(position - radius, position + radius)
+            idx = idx[idx >= after]
+            if not len(idx):
+                break
+            offset = self.offsets(position, idx)
+            touching = np.flatnonzero(np.hypot(offset[:, 0], offset[:, 1]) < radius)
+            if not len(touching):
+                break
+            owner = self.owners[idx[touching[0]]]
+            hit = True
+            for dx, dy in offset[touching[self.owners[idx[touching]] == owner]].tolist():
+                position[1] -= np.sign(dy) * (radius - abs(dy) + 1)
+                position[0] -= np.sign(dx) * (radius - abs(dx) + 1)
+            after = np.searchsorted(self.owners, owner, side='right')
+        return position, hit
+
+    def touching_circles(self, positions, radii):
+        """Check many circles against the segments at once.
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(N,)`` bool, True for circles closer than their radius to any segment.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(positions),))
+        touching = np.zeros(len(positions), dtype=bool)
+        if not len(self) or not len(positions):
+            return touching
+        candidates = [self.query(p - r, p + r) for p, r in zip(positions, radii)]
+        counts = np.fromiter(map(len, candidates), dtype=np.intp, count=len(candidates))
+        if not counts.sum():
+            return touching
+        which = np.repeat(np.arange(len(positions)), counts)
+        idx = np.concatenate(candidates)
+        offset = self.offsets(positions[which], idx)
+        close = np.hypot(offset[:, 0], offset[:, 1]) < radii[which]
+        touching[which[close]] = True
+        return touching
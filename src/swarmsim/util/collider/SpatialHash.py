@@ -0,0 +1,188 @@
+"""Uniform grid broadphase.
+
+.. autoclass:: SpatialHash
+    :members:
+
+"""
+
+import math
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform grid of buckets holding the indices of circles by center point.
+
+    Indices are usually rows of a :py:class:`~swarmsim.util.population.PopulationState`,
+    which are the same as the agent's index in ``world.population``.
+
+    Queries return every index whose circle could overlap the query box, grown by
+    :py:attr:`margin` to allow for things moving a little after the last rebuild.
+    Callers should still do their own narrowphase test on the results.
+
+    Parameters
+    ----------
+    cell_size : float, optional
+        Width of a grid cell. If not given, it is derived from the largest radius on :py:meth:`rebuild`.
+    margin : float, default=0
+        Extra distance added to each query to tolerate movement since the circles were hashed.
+    """
+
+    def __init__(self, cell_size=None, margin=0.0):
+        self.cell_size = cell_size
+        self.fixed_cell_size = cell_size is not None
+        self.margin = margin
+        #: float: The largest radius that has been hashed.
+        self.max_radius = 0.0
+        #: dict[tuple[int, int], list[int]]: occupied cells and the indices they hold.
+        self.cells = {}
+        self._cell_of = []
+
+    def __len__(self):
+        return len(self._cell_of)
+
+    def clear(self):
+        self.cells = {}
+        self._cell_of = []
+        self.max_radius = 0.0
+
+    def key(self, position):
+        """Get the cell containing ``position``."""
+        cs = self.cell_size
+        return (math.floor(position[0] / cs), math.floor(position[1] / cs))
+
+    def rebuild(self, positions, radii):
+        """Re-hash everything.
+
+        Parameters
+        ----------
+        positions : numpy.ndarray
+            ``(N, 2)`` array of circle centers. Row ``i`` is hashed as index ``i``.
+        radii : numpy.ndarray
+            ``(N,)`` array of radii.
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        radii = np.asarray(radii, dtype=np.float64)
+        n = len(positions)
+        self.cells = {}
+        self.max_radius = float(radii.max()) if n else 0.0
+        if not self.fixed_cell_size:
+            self.cell_size = max(2 * self.max_radius, 1e-6)
+        if not n:
+            self._cell_of = []
+            return
+        keys = np.floor(positions / self.cell_size).astype(np.int64)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, np.any(sorted_keys[1:] != sorted_keys[:-1], axis=1)])
+        ends = np.r_[starts[1:], n]
+        order = order.tolist()
+        for start, end, (kx, ky) in zip(starts.tolist(), ends.tolist(), sorted_keys[starts].tolist()):
+            self.cells[(kx, ky)] = order[start:end]
+        self._cell_of = list(map(tuple, keys.tolist()))
+
+    def insert(self, i, position, radius=0.0):
+        """Hash a single circle as index ``i``. ``i`` must be the next unused index."""
+        if i != len(self._cell_of):
+            msg = f"Expected to insert index {len(self._cell_of)}, not {i}"
+            raise IndexError(msg)
+        if self.cell_size is None:
+            self.cell_size = max(2 * radius, 1e-6)
+        self.max_radius = max(self.max_radius, radius)
+        key = self.key(position)
+        self.cells.setdefault(key, []).append(i)
+        self._cell_of.append(key)
+
+    def move(self, i, position):
+        """Update the cell of index ``i`` after it has moved."""
+        old = self._cell_of[i]
+        new = self.key(position)
+        if new == old:
+            return
+        bucket = self.cells[old]
+        bucket.remove(i)
+        if not bucket:
+            del self.cells[old]
+        self.cells.setdefault(new, []).append(i)
+        self._cell_of[i] = new
+
+    def query(self, lo, hi):
+        """Get indices of circles which may overlap the box from ``lo`` to ``hi``.
+
+        Returns
+        -------
+        list[int]
+            Sorted candidate indices.
+        """
+        if not self.cells:
+            return []
+        pad = self.max_radius + self.margin
+        cs = self.cell_size
+        x0, y0 = math.floor((lo[0] - pad) / cs), math.floor((lo[1] - pad) / cs)
+        x1, y1 = math.floor((hi[0] + pad) / cs), math.floor((hi[1] + pad) / cs)
+        found = []
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self.cells):
+            # big query box; cheaper to scan the occupied cells
+            for (kx, ky), bucket in self.cells.items():
+                if x0 <= kx <= x1 and y0 <= ky <= y1:
+                    found.extend(bucket)
+        else:
+            cells = self.cells
+            for kx in range(x0, x1 + 1):
+                for ky in range(y0, y1 + 1):
+                    bucket = cells.get((kx, ky))
+                    if bucket:
+                        found.extend(bucket)
+        found.sort()
+        return found
+
+    def query_radius(self, center, r):
+        """Get indices of circles which may be within ``r`` of ``center``."""
+        return self.query((center[0] - r, center[1] - r), (center[0] + r, center[1] + r))
+
+    def pairs(self):
+        """Get every pair of indices whose circles may overlap, as hashed.
+
+        Each unordered pair is returned once. The pairs are candidates only;
+        no distance test is done.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Index arrays ``i`` and ``j`` of equal length.
+        """
+        n = len(self._cell_of)
+        if n < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        keys = np.array(self._cell_of, dtype=np.int64)
+        # cells further apart than this can't hold overlapping circles
+        reach = max(1, math.ceil((2 * self.max_radius + self.margin) / self.cell_size))
+        keys -= keys.min(axis=0) - reach
+        height = int(keys[:, 1].max()) + reach + 1
+        codes = keys[:, 0] * height + keys[:, 1]
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        idx = np.arange(n)
+        found_i, found_j = [], []
+        # visit half of the neighbourhood so each pair of cells is only seen once
+        for dx in range(reach + 1):
+            for dy in range(-reach, reach + 1):
+                if dx == 0 and dy < 0:
+                    continue
+                target = codes + (dx * height + dy)
+                lo = np.searchsorted(sorted_codes, target, side='left')
+                counts = np.searchsorted(sorted_codes, target, side='right') - lo
+                total = counts.sum()
+                if not total:
+                    continue
+                i = np.repeat(idx, counts)
+                offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+                j = order[np.repeat(lo, counts) + offsets]
+                if dx == 0 and dy == 0:
+                    keep = i < j
+                    i, j = i[keep], j[keep]
+                found_i.append(i)
+                found_j.append(j)
+        if not found_i:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.concatenate(found_i), np.concatenate(found_j)
@@ -0,0 +1,217 @@
+"""Sweep-and-prune broadphase.
+
+.. autoclass:: SweepAndPrune
+    :members:
+
+"""
+
+import numpy as np
+
+
+class SweepAndPrune:
+    """Broadphase which keeps circle AABBs sorted by their low x edge.
+
+    Unlike :py:class:`~swarmsim.util.collider.SpatialHash.SpatialHash`, it has no cell size to tune,
+    so it copes with very uneven densities, i.e. when every agent piles into one corner.
+
+    :py:meth:`move` slides the moved index to its new place in the sorted order, like one
+    pass of an insertion sort, so it only touches the indices it passes. Circles only move
+    a little each step, so that is usually none or a few. Each :py:meth:`rebuild` with the
+    same number of circles re-sorts the previous order, which is nearly sorted already.
+    :py:meth:`insert` appends, and the order is sorted once before the next query.
+
+    It has the same interface as :py:class:`~swarmsim.util.collider.SpatialHash.SpatialHash`,
+    so either can be used as a world's broadphase.
+
+    Parameters
+    ----------
+    margin : float, default=0
+        Extra distance added around each circle's AABB to tolerate movement since it was last updated.
+    """
+
+    def __init__(self, margin=0.0):
+        self.margin = margin
+        #: float: The largest radius that has been added.
+        self.max_radius = 0.0
+        self._n = 0
+        # rows past ``_n`` are spare capacity for :py:meth:`insert`
+        self._lo = np.empty((0, 2))
+        self._hi = np.empty((0, 2))
+        self._radii = np.empty(0)
+        self._order = np.empty(0, dtype=np.intp)
+        self._keys = np.empty(0)  # ``_lo[_order, 0]``, kept sorted
+        self._rank = np.empty(0, dtype=np.intp)  # position of each index in ``_order``
+        self._sorted = True
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def lo(self) -> np.ndarray:
+        """``(N, 2)`` low corner of each AABB."""
+        return self._lo[:self._n]
+
+    @property
+    def hi(self) -> np.ndarray:
+        """``(N, 2)`` high corner of each AABB."""
+        return self._hi[:self._n]
+
+    @property
+    def radii(self) -> np.ndarray:
+        """``(N,)`` radius of each circle."""
+        return self._radii[:self._n]
+
+    @property
+    def order(self) -> np.ndarray:
+        """Indices sorted by ``lo[:, 0]``."""
+        self._sort()
+        return self._order[:self._n]
+
+    def clear(self):
+        self.__init__(margin=self.margin)
+
+    def _boxes(self, positions, radii):
+        extent = (np.asarray(radii, dtype=np.float64) + self.margin)[:, None]
+        positions = np.asarray(positions, dtype=np.float64)
+        return positions - extent, positions + extent
+
+    def _sort(self):
+        if not self._sorted:
+            n = self._n
+            order = self._order[:n]
+            keys = self._lo[order, 0]
+            if np.any(keys[1:] < keys[:-1]):
+                resort = np.argsort(keys, kind='stable')
+                order[:] = order[resort]
+                keys = keys[resort]
+            self._keys[:n] = keys
+            self._rank[order] = np.arange(n)
+            self._sorted = True
+
+    def _reserve(self, capacity):
+        if capacity <= len(self._radii):
+            return
+        capacity = max(capacity, 2 * len(self._radii), 16)
+
+        def grow(old, shape=()):
+            new = np.empty((capacity, *shape), dtype=old.dtype)
+            new[:self._n] = old[:self._n]
+            return new
+
+        self._lo, self._hi = grow(self._lo, (2,)), grow(self._hi, (2,))
+        self._radii, self._order = grow(self._radii), grow(self._order)
+        self._keys, self._rank = grow(self._keys), grow(self._rank)
+
+    def rebuild(self, positions, radii):
+        """Update every AABB. Row ``i`` of ``positions`` is index ``i``."""
+        radii = np.asarray(radii, dtype=np.float64)
+        n = len(radii)
+        if n != self._n:
+            self._n = 0
+            self._reserve(n)
+            self._order[:n] = np.arange(n)
+        self._n = n
+        self._radii[:n] = radii
+        self.max_radius = float(radii.max()) if n else 0.0
+        self._lo[:n], self._hi[:n] = self._boxes(positions, radii)
+        self._sorted = False
+        self._sort()
+
+    def insert(self, i, position, radius=0.0):
+        """Add a circle as index ``i``. ``i`` must be the next unused index."""
+        if i != self._n:
+            msg = f"Expected to insert index {self._n}, not {i}"
+            raise IndexError(msg)
+        self._reserve(i + 1)
+        lo, hi = self._boxes(np.reshape(position, (1, 2)), np.array([radius]))
+        self._lo[i], self._hi[i] = lo[0], hi[0]
+        self._radii[i] = radius
+        self._order[i] = i
+        self._n += 1
+        self.max_radius = max(self.max_radius, radius)
+        self._sorted = False
+
+    def move(self, i, position):
+        """Update the AABB of index ``i`` after it has moved."""
+        x, y = float(position[0]), float(position[1])
+        extent = float(self._radii[i]) + self.margin
+        key = x - extent
+        self._lo[i] = key, y - extent
+        self._hi[i] = x + extent, y + extent
+        if not self._sorted:
+            return  # sorted in full before the next query
+        keys, order, rank = self._keys, self._order, self._rank
+        at = int(rank[i])
+        if at > 0 and key < keys[at - 1]:  # slide left
+            to = int(np.searchsorted(keys[:at], key, side='right'))
+            keys[to + 1:at + 1] = keys[to:at]
+            order[to + 1:at + 1] = order[to:at]
+            changed = slice(to, at + 1)
+        elif at < self._n - 1 and key > keys[at + 1]:  # slide right
+            to = at + int(np.searchsorted(keys[at + 1:self._n], key, side='left'))
+            keys[at:to] = keys[at + 1:to + 1]
+            order[at:to] = order[at + 1:to + 1]
+            changed = slice(at, to + 1)
+        else:
+            keys[at] = key
+            return
+        keys[to] = key
+        order[to] = i
+        rank[order[changed]] = np.arange(changed.start, changed.stop)
+
+    def query(self, lo, hi):
+        """Get the indices of circles whose AABBs overlap the box from ``lo`` to ``hi``.
+
+        Returns
+        -------
+        list[int]
+            Sorted candidate indices.
+        """
+        if not self._n:
+            return []
+        self._sort()
+        keys = self._keys[:self._n]
+        # no AABB is wider than this, so anything starting further left can't reach the box
+        widest = 2 * (self.max_radius + self.margin)
+        start = keys.searchsorted(lo[0] - widest, side='left')
+        stop = keys.searchsorted(hi[0], side='right')
+        idx = self._order[start:stop]
+        if not len(idx):
+            return []
+        box_lo, box_hi = self._lo[idx], self._hi[idx]
+        keep = (box_hi[:, 0] >= lo[0]) & (box_lo[:, 1] <= hi[1]) & (box_hi[:, 1] >= lo[1])
+        found = idx[keep]
+        found.sort()
+        return found.tolist()
+
+    def query_radius(self, center, r):
+        """Get indices of circles which may be within ``r`` of ``center``."""
+        return self.query((center[0] - r, center[1] - r), (center[0] + r, center[1] + r))
+
+    def pairs(self):
+        """Get every pair of indices whose AABBs overlap, by sweeping along x.
+
+        Each unordered pair is returned once.
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Index arrays ``i`` and ``j`` of equal length.
+        """
+        n = len(self)
+        if n < 2:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        self._sort()
+        order = self._order[:n]
+        keys = self._keys[:n]
+        # each box overlaps (on x) the boxes after it in sorted order that start before it ends
+        stop = np.searchsorted(keys, self.hi[order, 0], side='right')
+        counts = np.maximum(stop - np.arange(1, n + 1), 0)
+        total = counts.sum()
+        if not total:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        a = np.repeat(np.arange(n), counts)
+        b = a + 1 + (np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts))
+        i, j = order[a], order[b]
+        keep = (self.lo[i, 1] <= self.hi[j, 1]) & (self.hi[i, 1] >= self.lo[j, 1])
+        return i[keep], j[keep]
@@ -1,4 +1,3 @@
-import pygame
 import numpy as np
 
 class Polygon:
@@ -12,6 +11,7 @@ class Polygon:
         self.boundary.append(point)
 
     def draw(self, screen, color=(255, 255, 255), width=1):
+        import pygame
         pygame.draw.polygon(screen, color, [(p.x, p.y) for p in self.boundary], width=width)
 
     def __getitem__(self, item):
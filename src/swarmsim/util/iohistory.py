@@ -0,0 +1,238 @@
+"""Columnar storage for the ``track_io`` records of agents.
+
+With ``track_io: true`` in an agent's config, each step the agent records its state
+(position and heading), the reading of its first sensor, and the action its controller chose.
+Rather than each agent keeping a list of tuples, the world keeps every record in one
+:py:class:`IOHistory`, whose columns are preallocated arrays grown geometrically.
+
+.. code-block:: python
+
+    world.io_history.to_numpy()  # (steps, agents, k) array
+    world.io_history.to_dataframe()  # indexed by (agent, step)
+    agent.history[-1]  # SPA(state=State(x, y, angle), perception, action), read from the columns
+
+.. autoclass:: IOHistory
+    :members:
+
+.. autoclass:: HistoryView
+    :members:
+
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+def _width(value):
+    return 1 if np.ndim(value) == 0 else int(np.size(value))
+
+
+class IOHistory:
+    """Every ``track_io`` record of the agents in a world.
+
+    Each record is one row of the columns :py:attr:`agent`, :py:attr:`step`,
+    :py:attr:`state`, :py:attr:`perception` and :py:attr:`action`.
+    Use :py:meth:`record` to add one.
+    """
+
+    def __init__(self, capacity=256):
+        #: int: Number of records.
+        self.count = 0
+        #: list: Name of the agent in each slot, in the order agents first recorded.
+        self.names = []
+        self._capacity = capacity
+        self._agent = self._step = self._state = self._perception = self._action = None
+        self._perception_int = False
+        # row ``s`` holds the indices of slot ``s``'s records, so one agent's records can be found without a scan
+        self._slot_rows = np.empty((0, 16), dtype=np.intp)
+        self._slot_count = np.zeros(0, dtype=np.intp)
+
+    def _allocate(self, capacity):
+        def grow(old, shape, dtype):
+            new = np.empty((capacity, *shape), dtype=dtype)
+            if old is not None:
+                new[:self.count] = old[:self.count]
+            return new
+
+        self._agent = grow(self._agent, (), np.int32)
+        self._step = grow(self._step, (), np.int64)
+        self._state = grow(self._state, (3,), np.float64)
+        self._perception = grow(self._perception, self._perception.shape[1:], np.float64)
+        self._action = grow(self._action, self._action.shape[1:], np.float64)
+        self._capacity = capacity
+
+    def slot(self, agent):
+        """Get the column index of ``agent``, giving it one if it hasn't recorded yet."""
+        slot = getattr(agent, '_io_slot', None)
+        if slot is None or slot >= len(self.names):
+            slot = agent._io_slot = len(self.names)
+            self.names.append(getattr(agent, 'name', None))
+        return slot
+
+    def record(self, agent, step, state, perception, action):
+        """Add a record for ``agent``.
+
+        Parameters
+        ----------
+        agent : Agent
+        step : int
+            The world's ``total_steps``.
+        state : tuple[float, float, float]
+            ``(x, y, angle)``.
+        perception : float | array_like
+            The sensor reading. Every record must have the same size.
+        action : tuple[float, ...]
+            The controller's output. Every record must have the same size.
+        """
+        if self._perception is None:
+            self._perception_int = isinstance(perception, (bool, int, np.integer, np.bool_))
+            self._perception = np.empty((0, _width(perception)))
+            self._action = np.empty((0, _width(action)))
+            self._allocate(self._capacity)
+        elif _width(perception) != self._perception.shape[1] or _width(action) != self._action.shape[1]:
+            msg = (f"Every track_io record must have the same size. Expected {self._perception.shape[1]} sensor values"
+                   f" and {self._action.shape[1]} actions, got {_width(perception)} and {_width(action)}")
+            raise ValueError(msg)
+        if self.count == self._capacity:
+            self._allocate(self._capacity * 2)
+        i = self.count
+        slot = self.slot(agent)
+        self._agent[i] = slot
+        self._step[i] = step
+        self._state[i] = state
+        self._perception[i] = np.ravel(perception)
+        self._action[i] = np.ravel(action)
+        self.count += 1
+
+        if slot >= len(self._slot_count):
+            slots = max(len(self.names), 2 * len(self._slot_count))
+            rows = np.empty((slots, self._slot_rows.shape[1]), dtype=np.intp)
+            rows[:len(self._slot_rows)] = self._slot_rows
+            self._slot_rows = rows
+            self._slot_count = np.concatenate([self._slot_count, np.zeros(slots - len(self._slot_count), dtype=np.intp)])
+        n = self._slot_count[slot]
+        if n == self._slot_rows.shape[1]:
+            rows = np.empty((len(self._slot_rows), 2 * n), dtype=np.intp)
+            rows[:, :n] = self._slot_rows
+            self._slot_rows = rows
+        self._slot_rows[slot, n] = i
+        self._slot_count[slot] = n + 1
+
+    @property
+    def agent(self) -> np.ndarray:
+        """``(R,)`` slot of the agent of each record."""
+        return np.empty(0, dtype=np.int32) if self._agent is None else self._agent[:self.count]
+
+    @property
+    def step(self) -> np.ndarray:
+        """``(R,)`` world step of each record."""
+        return np.empty(0, dtype=np.int64) if self._step is None else self._step[:self.count]
+
+    @property
+    def state(self) -> np.ndarray:
+        """``(R, 3)`` ``(x, y, angle)`` of each record."""
+        return np.empty((0, 3)) if self._state is None else self._state[:self.count]
+
+    @property
+    def perception(self) -> np.ndarray:
+        """``(R, P)`` sensor reading of each record."""
+        return np.empty((0, 1)) if self._perception is None else self._perception[:self.count]
+
+    @property
+    def action(self) -> np.ndarray:
+        """``(R, A)`` controller output of each record."""
+        return np.empty((0, 2)) if self._action is None else self._action[:self.count]
+
+    @property
+    def columns(self) -> list[str]:
+        """Names of the last axis of :py:meth:`to_numpy`."""
+        def names(prefix, width):
+            return [prefix] if width == 1 else [f"{prefix}_{i}" for i in range(width)]
+        return ['x', 'y', 'angle'] + names('perception', self.perception.shape[1]) + names('action', self.action.shape[1])
+
+    @property
+    def steps(self) -> np.ndarray:
+        """The distinct world steps recorded, in order. The first axis of :py:meth:`to_numpy`."""
+        return np.unique(self.step)
+
+    def to_numpy(self):
+        """Get every record as a ``(steps, agents, k)`` float64 array, NaN where an agent didn't record.
+
+        The axes are :py:attr:`steps`, agent slots (see :py:attr:`names`) and :py:attr:`columns`.
+        """
+        steps = self.steps
+        out = np.full((len(steps), len(self.names), len(self.columns)), np.nan)
+        rows = np.searchsorted(steps, self.step)
+        out[rows, self.agent] = np.hstack([self.state, self.perception, self.action])
+        return out
+
+    def to_dataframe(self):
+        """Get every record as a :py:class:`pandas.DataFrame` indexed by ``(agent, step)``."""
+        import pandas as pd
+
+        index = pd.MultiIndex.from_arrays([self.agent, self.step], names=['agent', 'step'])
+        data = np.hstack([self.state, self.perception, self.action])
+        return pd.DataFrame(data, index=index, columns=self.columns)
+
+    def rows(self, slot) -> np.ndarray:
+        """Indices of the records of one agent slot, in the order they were recorded."""
+        if slot >= len(self._slot_count):
+            return np.empty(0, dtype=np.intp)
+        return self._slot_rows[slot, :self._slot_count[slot]]
+
+    def view(self, slot):
+        """Get the records of one agent slot as a :py:class:`HistoryView`."""
+        return HistoryView(self, slot)
+
+    def clear(self):
+        """Forget every record. Agents keep their slots."""
+        self.count = 0
+        self._slot_count[:] = 0
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return f"<IOHistory {self.count} records of {len(self.names)} agents>"
+
+
+class HistoryView(Sequence):
+    """The records of one agent, read from an :py:class:`IOHistory` as
+    :py:class:`~swarmsim.agent.MazeAgent.SPA` tuples, like the list agents used to keep.
+    """
+
+    def __init__(self, history, slot):
+        self.history = history
+        self.slot = slot
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Indices of this agent's records in the :py:class:`IOHistory` columns."""
+        return self.history.rows(self.slot)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _spa(self, row):
+        from ..agent.MazeAgent import SPA, State
+
+        history = self.history
+        perception = history._perception[row]
+        if len(perception) == 1:
+            perception = int(perception[0]) if history._perception_int else float(perception[0])
+        return SPA(State(*history._state[row].tolist()), perception, tuple(history._action[row].tolist()))
+
+    def __getitem__(self, index):
+        rows = self.rows[index]
+        if np.ndim(rows) == 0:
+            return self._spa(rows)
+        return [self._spa(row) for row in rows]
+
+    def to_numpy(self):
+        """Get this agent's records as an ``(R, k)`` array with the :py:attr:`IOHistory.columns`."""
+        history = self.history
+        return np.hstack([history.state[self.rows], history.perception[self.rows], history.action[self.rows]])
+
+    def __repr__(self):
+        return f"<HistoryView of agent slot {self.slot}: {len(self)} records>"
@@ -0,0 +1,79 @@
+"""KD-tree neighbor queries over a population.
+
+.. autoclass:: NeighborIndex
+    :members:
+
+"""
+
+import numpy as np
+
+
+class NeighborIndex:
+    """Spatial index over a snapshot of point positions.
+
+    Indices returned by queries are rows of ``positions``, which for a world's
+    :py:attr:`~swarmsim.world.World.World.neighbor_index` are the same as indices into ``world.population``.
+
+    Parameters
+    ----------
+    positions : numpy.ndarray
+        ``(N, dims)`` array of points. The index does not follow later changes to it.
+    """
+
+    def __init__(self, positions):
+        from scipy.spatial import cKDTree
+
+        self.positions = np.array(positions, dtype=np.float64, copy=True)
+        self.tree = cKDTree(self.positions) if len(self.positions) else None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def neighbors_within(self, center, r):
+        """Get the indices of points strictly closer than ``r`` to ``center``.
+
+        Returns
+        -------
+        numpy.ndarray
+            Sorted index array.
+        """
+        if self.tree is None:
+            return np.empty(0, dtype=np.intp)
+        idx = np.asarray(self.tree.query_ball_point(center, r), dtype=np.intp)
+        if not len(idx):
+            return idx
+        idx.sort()
+        d = np.linalg.norm(self.positions[idx] - np.asarray(center, dtype=np.float64), axis=1)
+        return idx[d < r]
+
+    def k_nearest(self, center, k):
+        """Get the indices and distances of the ``k`` points nearest ``center``, nearest first.
+
+        Fewer than ``k`` results are returned if there are fewer than ``k`` points.
+
+        Returns
+        -------
+        indices : numpy.ndarray
+        distances : numpy.ndarray
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        d, idx = self.tree.query(center, k=[*range(1, k + 1)])
+        return np.asarray(idx, dtype=np.intp), np.asarray(d, dtype=np.float64)
+
+    def query_pairs(self, r):
+        """Get every pair of points closer than ``r`` to each other.
+
+        Returns
+        -------
+        numpy.ndarray
+            ``(P, 2)`` array of index pairs ``(i, j)`` with ``i < j``.
+        """
+        if self.tree is None:
+            return np.empty((0, 2), dtype=np.intp)
+        pairs = self.tree.query_pairs(r, output_type='ndarray')
+        if not len(pairs):
+            return np.empty((0, 2), dtype=np.intp)
+        d = np.linalg.norm(self.positions[pairs[:, 0]] - self.positions[pairs[:, 1]], axis=1)
+        return pairs[d < r].astype(np.intp)
@@ -0,0 +1,288 @@
+"""Structure-of-arrays storage for per-agent state.
+
+Every agent in a :py:class:`~swarmsim.world.World.World` has a position, velocity,
+heading, and a handful of flags. Rather than each agent owning its own tiny
+arrays, the world keeps them in a single :py:class:`PopulationState` whose rows
+line up with ``world.population``. Agent attributes such as
+:py:attr:`Agent.pos <swarmsim.agent.Agent.Agent.pos>` are
+:py:class:`StateAttribute` descriptors which read and write into that store.
+
+Agents which are not registered with a store (i.e. before they are added to a
+world, or after they have been removed) keep their values privately, so they
+can be created, copied and pickled exactly as before.
+
+.. autoclass:: PopulationState
+    :members:
+
+.. autoclass:: StateAttribute
+    :members:
+
+.. autodata:: COLUMNS
+
+.. autodata:: TRAJECTORY_COLUMNS
+
+.. autofunction:: trajectory_row
+
+"""
+
+import numpy as np
+
+#: Columns held by a :py:class:`PopulationState`.
+#: Maps column name to ``(dtype, is_vector, default)``.
+#: Vector columns have shape ``(N, dims)``, the rest have shape ``(N,)``.
+COLUMNS = {
+    'pos': (np.float64, True, 0.0),
+    'dpos': (np.float64, True, 0.0),
+    'angle': (np.float64, False, 0.0),
+    'dtheta': (np.float64, False, 0.0),
+    'radius': (np.float64, False, 0.0),
+    'collision_flag': (np.bool_, False, False),
+    'stopped_duration': (np.int64, False, 0),
+    'dead': (np.bool_, False, False),
+}
+
+
+class StateAttribute:
+    """Descriptor for an agent attribute which may live in a :py:class:`PopulationState`.
+
+    If the agent is registered with a store, the value is read from/written to
+    the store's column. Otherwise, it is stored on the agent as ``_<name>``.
+
+    Vector attributes (i.e. ``pos``) return a view into the store, so in-place
+    operations such as ``agent.pos += delta`` write straight through.
+    Scalar attributes are returned as Python scalars.
+    """
+
+    def __init__(self, vector=False):
+        self.vector = vector
+        self.name = None
+        self.private = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.private = f"_{name}"
+
+    def __get__(self, agent, objtype=None):
+        if agent is None:
+            return self
+        state = agent._population_state
+        if state is None:
+            try:
+                return agent.__dict__[self.private]
+            except KeyError:
+                msg = f"'{type(agent).__name__}' object has no attribute '{self.name}'"
+                raise AttributeError(msg) from None
+        if self.vector:
+            return state.buffers[self.name][agent._population_index]
+        return state.buffers[self.name].item(agent._population_index)
+
+    def __set__(self, agent, value):
+        state = agent._population_state
+        if state is None:
+            agent.__dict__[self.private] = value
+        else:
+            state.buffers[self.name][agent._population_index] = value
+
+
+class PopulationState:
+    """Contiguous per-agent state for a whole population.
+
+    Row ``i`` of every column belongs to ``agents[i]``. The world keeps this
+    in the same order as ``world.population``.
+
+    Columns are accessible as attributes trimmed to the current population size,
+    i.e. ``state.pos`` is an ``(N, 2)`` view and ``state.angle`` is an ``(N,)`` view.
+    Writing into these views changes the agents' state.
+
+    Parameters
+    ----------
+    capacity : int, default=16
+        Initial number of rows to allocate. Storage grows geometrically.
+    dims : int, default=2
+        Number of spatial dimensions for vector columns.
+    """
+
+    def __init__(self, capacity=16, dims=2):
+        self.dims = dims
+        self.capacity = 0
+        #: list[Agent]: The registered agents, in row order.
+        self.agents = []
+        #: dict[str, np.ndarray]: Full-capacity backing arrays for each column.
+        self.buffers = {}
+        self._allocate(max(int(capacity), 1))
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __contains__(self, agent):
+        return agent._population_state is self
+
+    def __getattr__(self, name):
+        # only called if normal lookup fails, i.e. for column names
+        buffers = self.__dict__.get('buffers')
+        if buffers is not None and name in buffers:
+            return buffers[name][:len(self.agents)]
+        msg = f"'{type(self).__name__}' object has no attribute '{name}'"
+        raise AttributeError(msg)
+
+    def _allocate(self, capacity):
+        n = len(self.agents)
+        buffers = {}
+        for name, (dtype, vector, default) in COLUMNS.items():
+            shape = (capacity, self.dims) if vector else (capacity,)
+            buf = np.full(shape, default, dtype=dtype)
+            if name in self.buffers:
+                buf[:n] = self.buffers[name][:n]
+            buffers[name] = buf
+        self.buffers = buffers
+        self.capacity = capacity
+
+    def reserve(self, capacity):
+        """Make sure at least ``capacity`` rows are allocated."""
+        if capacity > self.capacity:
+            self._allocate(max(capacity, self.capacity * 2))
+
+    def _gather(self, agent):
+        # read the column values of an unregistered agent
+        values = {}
+        for name, (_dtype, _vector, default) in COLUMNS.items():
+            values[name] = agent.__dict__.get(f"_{name}", getattr(agent, name, default))
+        return values
+
+    def add(self, agent):
+        """Register an agent, appending it as the last row.
+
+        The agent's current values are copied into the store.
+        If the agent belongs to another store, it is detached from that store first.
+
+        Returns
+        -------
+        int
+            The row index of the agent.
+        """
+        if agent._population_state is self:
+            return agent._population_index
+        if agent._population_state is not None:
+            agent._population_state.remove(agent)
+        i = len(self.agents)
+        self.reserve(i + 1)
+        for name, value in self._gather(agent).items():
+            self.buffers[name][i] = value
+        self.agents.append(agent)
+        agent._population_state = self
+        agent._population_index = i
+        return i
+
+    def extend(self, agents):
+        """Register several agents at once."""
+        agents = list(agents)
+        self.reserve(len(self.agents) + len(agents))
+        for agent in agents:
+            self.add(agent)
+
+    def detach(self, agent):
+        """Copy an agent's values out of the store and unlink it.
+
+        This does not compact the store; use :py:meth:`remove` for that.
+        """
+        i = agent._population_index
+        for name, (_dtype, vector, _default) in COLUMNS.items():
+            if vector:
+                agent.__dict__[f"_{name}"] = self.buffers[name][i].copy()
+            else:
+                agent.__dict__[f"_{name}"] = self.buffers[name].item(i)
+        agent._population_state = None
+        agent._population_index = -1
+
+    def remove(self, agent):
+        """Unregister an agent and compact the store, preserving the order of the other rows."""
+        if agent._population_state is not self:
+            return
+        i = agent._population_index
+        n = len(self.agents)
+        self.detach(agent)
+        for buf in self.buffers.values():
+            buf[i:n - 1] = buf[i + 1:n]
+        del self.agents[i]
+        for j in range(i, n - 1):
+            self.agents[j]._population_index = j
+
+    def clear(self):
+        """Unregister all agents."""
+        for agent in self.agents:
+            self.detach(agent)
+        self.agents = []
+
+    def sync(self, population):
+        """Make the rows of the store match ``population``.
+
+        Agents which were appended to or replaced in ``population`` without going through the store
+        are registered, and agents no longer in ``population`` are detached.
+        This is cheap if the store is already in sync.
+        """
+        if self.agents == population:
+            return
+        n_old = len(self.agents)
+        old = {name: buf[:n_old].copy() for name, buf in self.buffers.items()}
+        keep = {id(agent) for agent in population}
+        for agent in self.agents:
+            if id(agent) not in keep:
+                self.detach(agent)
+        self.agents = []
+        self.reserve(len(population))
+        for i, agent in enumerate(population):
+            if agent._population_state is self:
+                j = agent._population_index
+                for name, buf in self.buffers.items():
+                    buf[i] = old[name][j]
+                agent._population_index = i
+                self.agents.append(agent)
+            else:
+                self.add(agent)
+
+
+#: Per-agent values which :py:func:`trajectory_row` can read, for recording trajectories.
+#: ``sensor`` is the ``current_state`` of the agent's first sensor.
+#: ``v`` and ``omega`` are the controller output, from the agent's ``last_action``.
+TRAJECTORY_COLUMNS = ('x', 'y', 'heading', 'dx', 'dy', 'dtheta', 'sensor', 'v', 'omega')
+
+
+def check_trajectory_columns(columns):
+    """Get ``columns`` as a tuple. Raises :py:class:`ValueError` if any isn't one of :py:data:`TRAJECTORY_COLUMNS`."""
+    unknown = set(columns) - set(TRAJECTORY_COLUMNS)
+    if unknown:
+        msg = f"Unknown trajectory columns {sorted(unknown)}. Expected some of {TRAJECTORY_COLUMNS}"
+        raise ValueError(msg)
+    return tuple(columns)
+
+
+def trajectory_row(world, columns):
+    """Get the ``(N, k)`` float32 values of ``columns`` for each of the world's ``N`` agents."""
+    population = world.population
+    state = world.population_state
+    state.sync(population)
+    out = np.empty((len(population), len(columns)), dtype=np.float32)
+    actions = None
+    for j, column in enumerate(columns):
+        if column == 'x':
+            out[:, j] = state.pos[:, 0]
+        elif column == 'y':
+            out[:, j] = state.pos[:, 1]
+        elif column == 'heading':
+            out[:, j] = state.angle
+        elif column in ('dx', 'dy'):
+            out[:, j] = state.dpos[:, int(column == 'dy')]
+        elif column == 'dtheta':
+            out[:, j] = state.dtheta
+        elif column == 'sensor':
+            out[:, j] = [float(agent.sensors[0].current_state) if getattr(agent, 'sensors', None) else np.nan
+                         for agent in population]
+        elif column in ('v', 'omega'):
+            if actions is None:
+                actions = np.array([getattr(agent, 'last_action', (np.nan, np.nan))[:2] for agent in population],
+                                   dtype=np.float64).reshape(-1, 2)
+            out[:, j] = actions[:, int(column == 'omega')]
+        else:
+            msg = f"Unknown trajectory column {column!r}. Expected one of {TRAJECTORY_COLUMNS}"
+            raise ValueError(msg)
+    return out
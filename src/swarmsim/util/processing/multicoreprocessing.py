@@ -1,38 +1,761 @@
 from functools import partial
+import copy
+import hashlib
+import os
+import pickle
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import time
+import traceback
 import warnings
+import weakref
+from collections import deque
 from multiprocessing import Pool
-from tqdm.contrib.concurrent import process_map
 
-from ...world.simulate import main as sim
+import numpy as np
 
+from ..population import TRAJECTORY_COLUMNS, check_trajectory_columns, trajectory_row  # noqa: F401  (re-exported)
 
-def simulate(world_config, terminate_function, show_gui=False):
+#: Outputs :py:meth:`MultiWorldSimulation.execute` and :py:meth:`~MultiWorldSimulation.evaluate` can return for each world.
+OUTPUTS = ('behavior', 'metric_histories', 'final_positions', 'trajectory')
+
+# world templates cached by each worker process, by key
+_templates = {}
+
+
+def set_controller_genome(world_config, genome):
+    """Give every agent in ``world_config``, including those made by spawners, a list-based controller.
+
+    This is the default way :py:meth:`MultiWorldSimulation.evaluate` applies a genome to a template.
+    """
+    controller = {'type': 'Controller', 'controller': list(genome)}
+    agent_configs = list(world_config.agents)
+    for spawner in world_config.spawners:
+        agent = spawner.get('agent') if isinstance(spawner, dict) else getattr(spawner, 'agent', None)
+        if agent is not None:
+            agent_configs.append(agent)
+    for agent in agent_configs:
+        if isinstance(agent, dict):
+            agent['controller'] = controller
+        else:
+            agent.controller = controller
+
+
+class SharedArray:
+    """A NumPy array in a :py:class:`~multiprocessing.shared_memory.SharedMemory` block.
+
+    Pickling a SharedArray only sends the block's name, shape and dtype,
+    so a worker can hand a large array to the parent process without copying it.
+    The receiving process maps the same memory when it first reads :py:attr:`array`.
+
+    The block stays allocated until :py:meth:`unlink` is called, which the process
+    that's done with it last must do.
+    """
+
+    def __init__(self, name, shape, dtype=np.float32):
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self._shm = None
+
+    @classmethod
+    def create(cls, shape, dtype=np.float32):
+        """Allocate a new shared block for an array of this shape and dtype."""
+        from multiprocessing.shared_memory import SharedMemory
+
+        size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+        shm = SharedMemory(create=True, size=size)
+        shared = cls(shm.name, shape, dtype)
+        shared._shm = shm
+        return shared
+
+    @property
+    def array(self) -> np.ndarray:
+        """The array, as a view of the shared block."""
+        if self._shm is None:
+            from multiprocessing.shared_memory import SharedMemory
+
+            self._shm = SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.array
+        return array.astype(dtype) if dtype is not None else array.copy() if copy else array
+
+    def close(self):
+        """Unmap the block from this process. Views of :py:attr:`array` must not be used afterwards."""
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:  # views of it still exist; it's unmapped when they're garbage collected
+                pass
+            self._shm = None
+
+    def disown(self):
+        """Unmap the block and stop this process from freeing it at exit, so another process can take it over."""
+        if self._shm is not None:
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(self._shm._name, 'shared_memory')
+        self.close()
+
+    def unlink(self):
+        """Free the shared block. Call this once, from the last process using it."""
+        if self._shm is None:
+            from multiprocessing.shared_memory import SharedMemory
+
+            self._shm = SharedMemory(name=self.name)
+        shm = self._shm
+        self.close()
+        shm.unlink()
+
+    def __reduce__(self):
+        return (type(self), (self.name, self.shape, self.dtype.str))
+
+    def __repr__(self):
+        return f"SharedArray({self.name!r}, shape={self.shape}, dtype={self.dtype})"
+
+
+class Trajectory:
+    """Records a ``(T, N, k)`` float32 array of some :py:data:`~swarmsim.util.population.TRAJECTORY_COLUMNS`
+    of every agent after each step.
+
+    Use it as a :py:meth:`World.run() <swarmsim.world.World.World.run>` callback,
+    or wrapped in a :py:class:`~swarmsim.world.subscribers.WorldSubscriber.WorldSubscriber`.
+
+    Parameters
+    ----------
+    columns : Sequence[str], default=('x', 'y', 'heading')
+        What to record for each agent.
+    steps : int, optional
+        The expected number of steps. With ``shared``, steps are written
+        straight into a block of this size, which grows if more steps are recorded.
+    shared : bool, default=False
+        If True, :py:meth:`result` is a :py:class:`SharedArray`.
+    """
+
+    def __init__(self, columns=('x', 'y', 'heading'), steps=None, shared=False):
+        self.columns = check_trajectory_columns(columns)
+        self.steps = steps
+        self.shared = shared
+        #: int: Number of steps recorded.
+        self.count = 0
+        self._rows = []
+        self._block = None
+
+    def record(self, world):
+        """Get the ``(N, k)`` row for the world's current step."""
+        return trajectory_row(world, self.columns)
+
+    def __call__(self, world, screen=None):
+        row = self.record(world)
+        if self.shared and self.steps:
+            if self._block is None:
+                self._block = SharedArray.create((self.steps, *row.shape))
+            elif self.count >= self._block.shape[0]:
+                self._grow(max(self._block.shape[0] * 2, self.count + 1))
+            self._block.array[self.count] = row
+        else:
+            self._rows.append(row)
+        self.count += 1
+
+    def _grow(self, steps):
+        old = self._block
+        self._block = SharedArray.create((steps, *old.shape[1:]))
+        self._block.array[:old.shape[0]] = old.array
+        old.unlink()
+
+    def to_numpy(self):
+        """Get the trajectory as an ordinary array."""
+        if self._block is not None:
+            return self._block.array[:self.count].copy()
+        if not self._rows:
+            return np.empty((0, 0, len(self.columns)), dtype=np.float32)
+        if len({len(row) for row in self._rows}) != 1:
+            raise ValueError("Can't stack a trajectory whose population size changed.")
+        return np.stack(self._rows)
+
+    def result(self):
+        """Get the trajectory as a :py:class:`SharedArray` if ``shared``, otherwise as :py:meth:`to_numpy`.
+
+        The shared block is unmapped from this process, so it can be returned to another one.
+        """
+        if not self.shared:
+            return self.to_numpy()
+        if self._block is None:
+            data = self.to_numpy()
+            self._block = SharedArray.create(data.shape)
+            self._block.array[:] = data
+        block = self._block
+        block.shape = (self.count, *block.shape[1:])  # the block may be larger than what was recorded
+        block.disown()
+        return block
+
+    def discard(self):
+        """Free the shared block, if any, i.e. when the world failed."""
+        if self._block is not None:
+            self._block.unlink()
+            self._block = None
+
+
+def extract(world, outputs=('behavior',), metric_names=None, trajectory=None):
+    """Get compact results from a finished world.
+
+    Parameters
+    ----------
+    world : World
+        The world to read.
+    outputs : Iterable[str]
+        Which of :py:data:`OUTPUTS` to get:
+
+        ``'behavior'``
+            ``(M,)`` array of the average of each metric, as in ``getBehaviorVector()``.
+        ``'metric_histories'``
+            dict of each metric's name to an array of its ``value_history``.
+        ``'final_positions'``
+            ``(N, 2)`` array of agent positions.
+        ``'trajectory'``
+            ``(T, N, k)`` float32 array from ``trajectory``, or a :py:class:`SharedArray` if it is ``shared``.
+    metric_names : Iterable[str], optional
+        Only include these metrics in ``'metric_histories'``.
+    trajectory : Trajectory, optional
+        The recorder which was attached to the world while it ran. Needed for ``'trajectory'``.
+
+    Returns
+    -------
+    dict
+        The requested outputs, by name.
+    """
+    result = {}
+    for output in outputs:
+        if output == 'behavior':
+            result[output] = np.array([metric.out_average()[1] for metric in world.metrics], dtype=np.float64)
+        elif output == 'metric_histories':
+            result[output] = {metric.name: np.asarray(metric.value_history) for metric in world.metrics
+                              if metric_names is None or metric.name in metric_names}
+        elif output == 'final_positions':
+            world.population_state.sync(world.population)
+            result[output] = world.population_state.pos.copy()
+        elif output == 'trajectory':
+            if trajectory is None:
+                raise ValueError("The 'trajectory' output needs a Trajectory recorded while the world ran.")
+            result[output] = trajectory.result()
+        else:
+            msg = f"Unknown output {output!r}. Expected one of {OUTPUTS}"
+            raise ValueError(msg)
+    return result
+
+
+def _warm_worker():
+    # import the simulation up front rather than during the first task
+    from ...world import RectangularWorld, World  # noqa: F401
+
+
+def _load_template(key, path):
+    template = _templates.get(key)
+    if template is None:
+        with open(path, 'rb') as f:
+            template = _templates[key] = pickle.load(f)
+    return template
+
+
+def _new_trajectory(outputs, columns, steps, shared):
+    if outputs is None or 'trajectory' not in outputs:
+        return None
+    return Trajectory(columns, steps=steps, shared=shared)
+
+
+def release(results):
+    """Free every :py:class:`SharedArray` in ``results``, i.e. the trajectories returned with ``shared_memory=True``.
+
+    Arrays taken from them must not be used afterwards; copy them first if they're needed.
+    """
+    if isinstance(results, SharedArray):
+        try:
+            results.unlink()
+        except FileNotFoundError:  # already released, i.e. the same result was returned twice
+            pass
+    elif isinstance(results, dict):
+        for value in results.values():
+            release(value)
+    elif isinstance(results, (list, tuple)):
+        for value in results:
+            release(value)
+
+
+def run_template(key, path, genome=None, seed=None, outputs=('behavior',), metric_names=None, stop_detection=None,
+                 trajectory_columns=('x', 'y', 'heading'), shared_memory=False):
+    """Build a world from a cached template with a genome and seed, run it headless, and :py:func:`extract` its outputs."""
+    world_config, apply_genome = _load_template(key, path)
+    world_config = copy.deepcopy(world_config)
+    if genome is not None:
+        apply_genome(world_config, genome)
+    if seed is not None:
+        world_config.seed = seed
+    world = world_config.create_world()
+    trajectory = _new_trajectory(outputs, trajectory_columns, getattr(world_config, 'stop_at', None), shared_memory)
     try:
-        world = sim(world_config, show_gui=show_gui, stop_detection=terminate_function, step_size=5)
+        world.run(stop_detection=stop_detection, callbacks=[trajectory] if trajectory else ())
+        return extract(world, outputs, metric_names, trajectory)
+    except BaseException:
+        if trajectory:
+            trajectory.discard()
+        raise
+
+
+def _run_template_task(task):
+    return run_template(*task)
+
+
+def simulate(world_config, terminate_function, show_gui=False, outputs=None, metric_names=None,
+             trajectory_columns=('x', 'y', 'heading'), shared_memory=False, raise_errors=False):
+    """Simulate a world. Returns the whole world, or if ``outputs`` are given, only those. See :py:func:`extract`.
+
+    If the world fails, a warning is shown and ``None`` is returned, unless ``raise_errors``.
+    """
+    from ...world.simulate import main as sim
+    from ...world.subscribers.WorldSubscriber import WorldSubscriber
+
+    stop_at = getattr(world_config, 'stop_at', None)
+    trajectory = _new_trajectory(outputs, trajectory_columns, stop_at + 1 if stop_at else None, shared_memory)
+    try:
+        subscribers = [WorldSubscriber(trajectory)] if trajectory else None
+        world = sim(world_config, show_gui=show_gui, stop_detection=terminate_function, step_size=5, subscribers=subscribers)
+        if outputs is not None:
+            return extract(world, outputs, metric_names, trajectory)
         return world
-    except Exception as e:
-        warnings.WarningMessage("World could not be simulated: " + str(e))
+    except BaseException as e:
+        if trajectory:
+            trajectory.discard()
+        if raise_errors or not isinstance(e, Exception):
+            raise
+        warnings.warn(f"World could not be simulated: {e!r}", RuntimeWarning, stacklevel=2)
     return None
 
 
-def simulate_batch(world_config_list, terminate_function, show_gui=False):
+def simulate_batch(world_config_list, terminate_function, show_gui=False, outputs=None, metric_names=None,
+                   trajectory_columns=('x', 'y', 'heading'), shared_memory=False, raise_errors=False):
     ret = []
     for w in world_config_list:
-        ret.append(simulate(w, terminate_function, show_gui=False))
+        ret.append(simulate(w, terminate_function, show_gui=False, outputs=outputs, metric_names=metric_names,
+                            trajectory_columns=trajectory_columns, shared_memory=shared_memory,
+                            raise_errors=raise_errors))
     return ret
 
 
+class TaskTimeout(BaseException):
+    """Raised inside a task which ran longer than its timeout.
+
+    It isn't an :py:class:`Exception`, so ``except Exception`` blocks in the simulation don't swallow it.
+    """
+
+
+class TaskFailure:
+    """Takes the place of the result of a task which raised an exception or timed out.
+
+    It is falsy, so ``if result:`` skips failed worlds just like it skipped ``None``.
+    """
+
+    def __init__(self, index, error, traceback='', timed_out=False, seconds=None):
+        #: int: Position of the task in the list given to :py:func:`schedule`.
+        self.index = index
+        #: str: ``repr()`` of the exception.
+        self.error = error
+        #: str: The formatted traceback, from the worker.
+        self.traceback = traceback
+        #: bool: True if the task was stopped for running longer than its timeout.
+        self.timed_out = timed_out
+        #: float | None: Seconds the task ran before it failed.
+        self.seconds = seconds
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        reason = 'timed out' if self.timed_out else self.error
+        return f"<TaskFailure #{self.index}: {reason}>"
+
+
+def estimate_cost(world_config):
+    """Estimate the relative cost of simulating a world config, or a list of them, as agents × steps."""
+    if isinstance(world_config, (list, tuple)):
+        return sum(estimate_cost(w) for w in world_config)
+    n = len(getattr(world_config, 'agents', None) or ())
+    for spawner in getattr(world_config, 'spawners', None) or ():
+        count = spawner.get('n', 1) if isinstance(spawner, dict) else getattr(spawner, 'n_objects', 1)
+        n += count or 1
+    steps = getattr(world_config, 'stop_at', None) or 1
+    return max(n, 1) * steps
+
+
+def _raise_timeout(signum, frame):
+    raise TaskTimeout
+
+
+def _guarded(fn, index, task, timeout=None):
+    # runs in the worker. Returns (index, result or TaskFailure) rather than raising.
+    alarm = (timeout is not None and hasattr(signal, 'setitimer')
+             and threading.current_thread() is threading.main_thread())
+    start = time.perf_counter()
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            result = fn(task)
+        finally:  # disarm while a late alarm can still be caught below
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        return index, result
+    except (Exception, TaskTimeout) as e:  # noqa: BLE001
+        return index, TaskFailure(index, repr(e), traceback.format_exc(), isinstance(e, TaskTimeout),
+                                  time.perf_counter() - start)
+    finally:
+        if alarm:
+            signal.signal(signal.SIGALRM, previous)
+
+
+def schedule(fn, tasks, pool=None, workers=None, costs=None, timeout=None, speculate=None, progress=None,
+             restart=None):
+    """Run ``fn(task)`` for each task, most expensive first, and get the results in task order.
+
+    Tasks are handed to the pool one at a time as workers become free, so a few
+    slow tasks don't hold up a whole chunk of others. Starting the most expensive
+    ones first keeps them from being the last ones running.
+
+    Parameters
+    ----------
+    fn : Callable
+        ``fn(task)``. Must be picklable if ``pool`` is given.
+    tasks : Sequence
+        The argument of each call.
+    pool : multiprocessing.pool.Pool, optional
+        Where to run tasks. By default, they run one by one in this process.
+    workers : int, optional
+        Number of processes in ``pool``. At most this many tasks are given to it at once.
+    costs : Sequence[float], optional
+        Estimated cost of each task, i.e. from :py:func:`estimate_cost`.
+    timeout : float, optional
+        Stop any task which runs longer than this many seconds. If the worker can't stop it,
+        i.e. on platforms without ``SIGALRM`` or during a long call into C, the task fails
+        a second later anyway, and its worker is stuck. See ``restart``.
+    speculate : float, optional
+        Once every task has started, when a worker is free, start a second copy of any task
+        which has run ``speculate`` times longer than the median finished task.
+        Whichever copy finishes first is used. The copy must give the same result,
+        so each task should be seeded.
+    progress : Callable, optional
+        Called with no arguments each time a task finishes.
+    restart : Callable, optional
+        ``restart() -> Pool``. Called when a worker is stuck in a task which didn't stop at its timeout.
+        It should terminate ``pool`` and return a new one. Tasks which were running on the old pool
+        are started again on the new one. Without it, stuck workers are left alone,
+        and once every worker is stuck, the tasks still waiting fail.
+
+    Returns
+    -------
+    list
+        The result of each task, or a :py:class:`TaskFailure` for tasks which raised or timed out.
+    """
+    n = len(tasks)
+    order = list(range(n))
+    if costs is not None:
+        order.sort(key=lambda i: -costs[i])
+    results = [None] * n
+    if pool is None:
+        for i in order:
+            results[i] = _guarded(fn, i, tasks[i], timeout)[1]
+            if progress:
+                progress()
+        return results
+
+    workers = workers or os.cpu_count() or 1
+    finished = queue.SimpleQueue()
+    pending = deque(order)
+    attempts = [0] * n  # copies of each task still running
+    started = [None] * n  # when the latest copy of each task was started
+    first_start = [None] * n
+    done = [False] * n
+    durations = []
+    in_flight = 0
+    stuck = set()  # tasks which failed by timeout while a worker was still running them
+    generation = 0  # incremented each time the pool is restarted
+
+    def submit(i):
+        nonlocal in_flight
+        now = time.monotonic()
+        if first_start[i] is None:
+            first_start[i] = now
+        started[i] = now
+        attempts[i] += 1
+        in_flight += 1
+        gen = generation
+        pool.apply_async(_guarded, (fn, i, tasks[i], timeout), callback=lambda value: finished.put((gen, *value)),
+                         error_callback=lambda e: finished.put((gen, i, TaskFailure(i, repr(e)))))
+
+    def finish(i, value):
+        results[i] = value
+        done[i] = True
+        if progress:
+            progress()
+
+    def fill():
+        while pending and in_flight < workers:
+            i = pending.popleft()
+            if not done[i]:
+                submit(i)
+
+    fill()
+    remaining = n
+    poll = None if timeout is None and speculate is None else 0.05
+    while remaining:
+        try:
+            gen, i, value = finished.get(timeout=poll)
+        except queue.Empty:
+            pass
+        else:
+            if gen != generation:  # from before a restart; the task was already restarted
+                if not done[i] and not isinstance(value, TaskFailure):
+                    finish(i, value)
+                    remaining -= 1
+                else:
+                    release(value)
+                continue
+            in_flight -= 1
+            attempts[i] -= 1
+            stuck.discard(i)
+            if done[i]:  # a slower copy of a task which already finished
+                release(value)
+            else:
+                if not isinstance(value, TaskFailure):
+                    durations.append(time.monotonic() - first_start[i])
+                    finish(i, value)
+                    remaining -= 1
+                elif attempts[i] == 0:
+                    finish(i, value)
+                    remaining -= 1
+                else:  # another copy may still succeed
+                    results[i] = value
+        fill()
+
+        now = time.monotonic()
+        if timeout is not None:  # in case the worker couldn't stop the task itself
+            for i in range(n):
+                if not done[i] and attempts[i] and now - started[i] > timeout + 1.0:
+                    finish(i, TaskFailure(i, 'TaskTimeout()', timed_out=True, seconds=now - first_start[i]))
+                    remaining -= 1
+                    stuck.add(i)
+            if stuck and restart is not None:
+                # the stuck workers can't be freed, so replace the whole pool and start over what was running on it
+                pool = restart()
+                generation += 1
+                pending.extendleft(i for i in reversed(range(n)) if attempts[i] and not done[i])
+                attempts = [0] * n
+                in_flight = 0
+                stuck.clear()
+                fill()
+            elif stuck and in_flight == len(stuck) >= workers:
+                for i in range(n):
+                    if not done[i]:
+                        finish(i, TaskFailure(i, 'every worker is stuck in a task which timed out'))
+                        remaining -= 1
+        if speculate is not None and durations and not pending and in_flight < workers:
+            limit = speculate * float(np.median(durations))
+            stragglers = [i for i in range(n) if not done[i] and attempts[i] == 1 and now - first_start[i] > limit]
+            stragglers.sort(key=lambda i: first_start[i])
+            for i in stragglers[:workers - in_flight]:
+                submit(i)
+    return results
+
+
 class MultiWorldSimulation:
     """
     A Multi-Threaded Implementation of the swarmsim.world.simulate package
     """
 
-    def __init__(self, pool_size=None, single_step=False, with_gui=False, use_tqdm=False, hide_tqdm=True):
+    def __init__(self, pool_size=None, single_step=False, with_gui=False, use_tqdm=False, hide_tqdm=True, persistent=False):
         self.single_step = single_step
         self.with_gui = with_gui
         self.pool_size = pool_size
         self.use_tqdm = use_tqdm
         self.hide_tqdm = hide_tqdm
+        #: If True, one pool of worker processes is kept and reused by every call until :py:meth:`close`.
+        self.persistent = persistent
+        self._pool = None
+        self._template_dir = None
+        self._template_cleanup = None
+        self._template_paths = {}
+        self._template_configs = {}
+
+    @property
+    def pool(self):
+        """The persistent worker pool, started on first use."""
+        if self._pool is None:
+            self._pool = Pool(self.pool_size, initializer=_warm_worker)
+        return self._pool
+
+    def close(self):
+        """Stop the persistent worker pool and forget registered templates."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self._template_dir is not None:
+            self._template_cleanup()
+            self._template_dir = self._template_cleanup = None
+        self._template_paths = {}
+        self._template_configs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def register(self, world_config, apply_genome=set_controller_genome):
+        """Register a world config as a template for :py:meth:`evaluate`.
+
+        The template is sent to each worker once, the first time the worker needs it,
+        and is kept there until :py:meth:`close`. Registering the same config again is free.
+
+        Parameters
+        ----------
+        world_config : AbstractWorldConfig
+            The base config. Each evaluation gets its own copy.
+        apply_genome : Callable, default=set_controller_genome
+            ``apply_genome(world_config, genome)`` puts a genome into a copy of the config.
+            Must be picklable, i.e. a module-level function.
+
+        Returns
+        -------
+        str
+            The template's key.
+        """
+        data = pickle.dumps((world_config, apply_genome), protocol=pickle.HIGHEST_PROTOCOL)
+        key = hashlib.sha256(data).hexdigest()
+        if key not in self._template_paths:
+            if self._template_dir is None:
+                self._template_dir = tempfile.mkdtemp(prefix='swarmsim-templates-')
+                # removed by close(), or when this is garbage collected or the interpreter exits
+                self._template_cleanup = weakref.finalize(self, shutil.rmtree, self._template_dir, ignore_errors=True)
+            path = os.path.join(self._template_dir, f"{key}.pkl")
+            with open(path, 'wb') as f:
+                f.write(data)
+            self._template_paths[key] = path
+            self._template_configs[key] = world_config
+        return key
+
+    def evaluate(self, key, genomes=None, seeds=None, outputs=('behavior',), metric_names=None, world_stop_condition=None,
+                 trajectory_columns=('x', 'y', 'heading'), shared_memory=False, timeout=None, speculate=None,
+                 cache=None):
+        """Run one world per genome (and/or seed) from a template, and get only the requested outputs.
+
+        Each task sends just the template key, genome and seed to a worker,
+        and workers send back only the outputs picked by :py:func:`extract`, not the whole world.
+
+        Parameters
+        ----------
+        key : str
+            A template key from :py:meth:`register`.
+        genomes : Sequence, optional
+            One genome per world, given to the template's ``apply_genome``.
+        seeds : Sequence[int], optional
+            One world seed per world.
+        outputs : Iterable[str], default=('behavior',)
+            Which of :py:data:`OUTPUTS` to return.
+        metric_names : Iterable[str], optional
+            Only return the histories of these metrics.
+        world_stop_condition : Callable, optional
+            ``world_stop_condition(world) -> bool``. Must be picklable.
+            Worlds also stop at their config's ``stop_at``.
+        trajectory_columns : Sequence[str], default=('x', 'y', 'heading')
+            Which of :py:data:`~swarmsim.util.population.TRAJECTORY_COLUMNS` the ``'trajectory'`` output records.
+        shared_memory : bool, default=False
+            If True, workers write each ``'trajectory'`` straight into a shared memory block
+            and only its name is sent back. Each trajectory is then a :py:class:`SharedArray`
+            whose ``.array`` is a zero-copy view. Free them with :py:func:`release` when done.
+        timeout : float, optional
+            Stop any world which takes longer than this many seconds.
+        speculate : float, optional
+            Re-run stragglers on free workers. See :py:func:`schedule`.
+        cache : EvaluationCache, optional
+            Look up each world in this :py:class:`~swarmsim.cache.EvaluationCache.EvaluationCache`
+            first, and only run the ones which aren't cached. New results are added to it.
+            Cached trajectories are returned as plain arrays.
+
+        Returns
+        -------
+        list[dict | TaskFailure]
+            The outputs of each world, in order, or a :py:class:`TaskFailure` for worlds which failed.
+        """
+        if genomes is None and seeds is None:
+            raise ValueError("evaluate() needs genomes, seeds, or both.")
+        n = len(genomes) if genomes is not None else len(seeds)
+        genomes = [None] * n if genomes is None else list(genomes)
+        seeds = [None] * n if seeds is None else list(seeds)
+        if len(genomes) != len(seeds):
+            msg = f"Got {len(genomes)} genomes but {len(seeds)} seeds"
+            raise ValueError(msg)
+        path = self._template_paths[key]
+        outputs = tuple(outputs)
+        metric_names = None if metric_names is None else tuple(metric_names)
+        tasks = [(key, path, genome, seed, outputs, metric_names, world_stop_condition,
+                  tuple(trajectory_columns), shared_memory)
+                 for genome, seed in zip(genomes, seeds)]
+        if cache is None:
+            return self._schedule(_run_template_task, tasks, timeout=timeout, speculate=speculate)
+
+        world_config = self._template_configs[key]
+        options = {'outputs': outputs, 'metric_names': metric_names, 'stop': world_stop_condition}
+        if 'trajectory' in outputs:
+            options['trajectory_columns'] = tuple(trajectory_columns)
+        keys = [cache.key(world_config, genome, seed, **options) for genome, seed in zip(genomes, seeds)]
+        results = cache.get_many(keys)
+        missing = {}  # duplicate genomes are only run once
+        for i, k in enumerate(keys):
+            if k not in results:
+                missing.setdefault(k, i)
+        ran = self._schedule(_run_template_task, [tasks[i] for i in missing.values()],
+                             timeout=timeout, speculate=speculate)
+        ran = dict(zip(missing, ran))
+        cache.put_many({k: result for k, result in ran.items() if not isinstance(result, TaskFailure)})
+        results.update(ran)
+        return [results[k] for k in keys]
+
+    def _schedule(self, fn, tasks, costs=None, timeout=None, speculate=None):
+        bar = None
+        if self.use_tqdm and not self.single_step:
+            if self.use_tqdm is True:
+                from tqdm.auto import tqdm as tqdm_class
+            else:
+                tqdm_class = self.use_tqdm
+            bar = tqdm_class(total=len(tasks))
+        options = {'costs': costs, 'timeout': timeout, 'progress': bar.update if bar is not None else None}
+        pool = None
+        try:
+            if self.single_step:
+                return schedule(fn, tasks, **options)
+            pool = self.pool if self.persistent else Pool(self.pool_size, initializer=_warm_worker)
+
+            def restart():
+                nonlocal pool
+                pool.terminate()
+                pool.join()
+                pool = Pool(self.pool_size, initializer=_warm_worker)
+                if self.persistent:
+                    self._pool = pool
+                return pool
+
+            return schedule(fn, tasks, pool, self.pool_size, speculate=speculate, restart=restart, **options)
+        finally:
+            if pool is not None and not self.persistent:
+                pool.terminate()
+            if bar is not None:
+                bar.close()
+                self.delete_lines_above()
 
     def delete_lines_above(self, n=1):
         if not self.hide_tqdm:
@@ -41,29 +764,50 @@ class MultiWorldSimulation:
         for _i in range(n):
             print(FKG, flush=True, end='')
 
-    def execute(self, world_setup: list, world_stop_condition=None, batched=False):
+    def execute(self, world_setup: list, world_stop_condition=None, batched=False, outputs=None, metric_names=None,
+                trajectory_columns=('x', 'y', 'heading'), shared_memory=False, timeout=None, speculate=None):
+        """Simulate each world config.
+
+        Worlds are handed to workers one at a time, longest first by :py:func:`estimate_cost`.
+
+        Parameters
+        ----------
+        world_setup : list
+            World configs, or if ``batched``, lists of world configs.
+        world_stop_condition : Callable, optional
+            ``world_stop_condition(world) -> bool``.
+        batched : bool, default=False
+            If True, each item of ``world_setup`` is a list of configs simulated by one task.
+        outputs : Iterable[str], optional
+            If given, each world is returned as a dict of only these :py:data:`OUTPUTS`
+            (see :py:func:`extract`), so workers only send back small arrays.
+            By default, the whole world is returned.
+        metric_names : Iterable[str], optional
+            Only return the histories of these metrics.
+        trajectory_columns : Sequence[str], default=('x', 'y', 'heading')
+            Which of :py:data:`~swarmsim.util.population.TRAJECTORY_COLUMNS` the ``'trajectory'`` output records.
+        shared_memory : bool, default=False
+            If True, each ``'trajectory'`` is returned as a :py:class:`SharedArray` written
+            in place by the worker. Free them with :py:func:`release` when done.
+        timeout : float, optional
+            Stop any task which takes longer than this many seconds.
+        speculate : float, optional
+            Re-run stragglers on free workers. See :py:func:`schedule`.
+
+        Returns
+        -------
+        list
+            The world or outputs of each config, or a :py:class:`TaskFailure` for tasks which failed or timed out.
+        """
         if not world_setup:
             raise Exception("No world_setup list provided to execute.")
-        # print("hello")
-        ret = []
-        if not self.single_step:
-            bundles = world_setup
-            fn = simulate_batch if batched else simulate
-            fn = partial(fn, terminate_function=world_stop_condition)
-            if self.use_tqdm is True:
-                ret = process_map(fn, bundles, max_workers=self.pool_size)
-                self.delete_lines_above()
-            elif self.use_tqdm:
-                ret = process_map(fn, bundles, max_workers=self.pool_size, tqdm_class=self.use_tqdm)
-                self.delete_lines_above(1)
-            else:
-                # ret = list(map(fn, bundles))
-                with Pool(self.pool_size) as pool:
-                    ret = pool.map(fn, bundles)
-        else:
-            for w in world_setup:
-                if batched:
-                    ret.append(simulate_batch(w, world_stop_condition, show_gui=self.with_gui))
-                else:
-                    ret.append(simulate(w, world_stop_condition, show_gui=self.with_gui))
-        return ret
+        outputs = None if outputs is None else tuple(outputs)
+        metric_names = None if metric_names is None else tuple(metric_names)
+        options = {'outputs': outputs, 'metric_names': metric_names,
+                   'trajectory_columns': tuple(trajectory_columns), 'shared_memory': shared_memory}
+        fn = simulate_batch if batched else simulate
+        if self.single_step:
+            options['show_gui'] = self.with_gui
+        fn = partial(fn, terminate_function=world_stop_condition, raise_errors=True, **options)
+        costs = [estimate_cost(w) for w in world_setup]
+        return self._schedule(fn, world_setup, costs, timeout, speculate)
@@ -0,0 +1,183 @@
+"""Wall-clock profiling of world steps.
+
+A world creates a :py:class:`StepProfiler` as :py:attr:`World.profiler <swarmsim.world.World.World.profiler>`.
+It is disabled unless the world config has the ``profile`` flag set:
+
+.. code-block:: yaml
+
+    flags:
+      profile: 1
+
+When enabled, the world times each phase of :py:meth:`~swarmsim.world.World.World.step`,
+each agent class, each sensor class and each metric.
+Sections are nested, so i.e. the time for an agent class includes its sensors,
+and the ``agents`` phase includes every agent class.
+
+.. autoclass:: StepProfiler
+    :members:
+
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class _Section:
+    __slots__ = ('profiler', 'key', 'start')
+
+    def __init__(self, profiler, key):
+        self.profiler = profiler
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.key, time.perf_counter() - self.start)
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SECTION = _NullSection()
+
+
+class StepProfiler:
+    """Accumulates wall time per ``(category, name)`` section, both in total and per step.
+
+    Parameters
+    ----------
+    enabled : bool, default=True
+        If False, :py:meth:`section` does nothing and nothing is recorded.
+    """
+
+    #: The categories of sections timed by the world, in report order.
+    CATEGORIES = ('phase', 'agent', 'sensor', 'metric')
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        #: dict[tuple[str, str], float]: Total seconds spent in each section.
+        self.totals = {}
+        #: dict[tuple[str, str], int]: Number of times each section was entered.
+        self.calls = {}
+        #: list[dict[tuple[str, str], float]]: Seconds spent in each section, for each finished step.
+        self.steps = []
+        self._current = {}
+
+    def section(self, category, name):
+        """Get a context manager which times its body as section ``(category, name)``.
+
+        .. code-block:: python
+
+            with world.profiler.section('metric', metric.name):
+                metric.calculate()
+        """
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, (category, name))
+
+    def add(self, key, seconds):
+        """Record ``seconds`` spent in section ``key``."""
+        self.totals[key] = self.totals.get(key, 0.0) + seconds
+        self.calls[key] = self.calls.get(key, 0) + 1
+        self._current[key] = self._current.get(key, 0.0) + seconds
+
+    def end_step(self):
+        """Finish the current step. Called by the world at the end of each step."""
+        if self.enabled:
+            self.steps.append(self._current)
+            self._current = {}
+
+    def keys(self):
+        """Get every section key recorded, sorted by category then by total time, longest first."""
+        order = {c: i for i, c in enumerate(self.CATEGORIES)}
+        return sorted(self.totals, key=lambda k: (order.get(k[0], len(order)), k[0], -self.totals[k]))
+
+    def per_step(self, key):
+        """Get a ``(steps,)`` array of the seconds spent in section ``key`` during each finished step."""
+        return np.array([step.get(key, 0.0) for step in self.steps])
+
+    def to_dict(self):
+        """Summarize as ``{category: {name: {...}}}``.
+
+        Each entry has ``total_seconds``, ``calls``, ``mean_step_seconds`` and ``max_step_seconds``.
+        """
+        out = {}
+        for key in self.keys():
+            category, name = key
+            per_step = self.per_step(key)
+            out.setdefault(category, {})[name] = {
+                'total_seconds': self.totals[key],
+                'calls': self.calls[key],
+                'mean_step_seconds': float(per_step.mean()) if len(per_step) else None,
+                'max_step_seconds': float(per_step.max()) if len(per_step) else None,
+            }
+        return out
+
+    def to_dataframe(self, per_step=False):
+        """Summarize as a :py:class:`pandas.DataFrame`.
+
+        Parameters
+        ----------
+        per_step : bool, default=False
+            If False, there is one row per section, indexed by ``(category, name)``,
+            with the same columns as :py:meth:`to_dict`.
+            If True, there is one row per step and one column per section.
+        """
+        import pandas as pd
+
+        keys = self.keys()
+        if per_step:
+            columns = pd.MultiIndex.from_tuples(keys, names=['category', 'name'])
+            data = np.column_stack([self.per_step(key) for key in keys]) if keys else None
+            return pd.DataFrame(data, columns=columns)
+        rows = [row for sections in self.to_dict().values() for row in sections.values()]
+        index = pd.MultiIndex.from_tuples(keys, names=['category', 'name'])
+        return pd.DataFrame(rows, index=index)
+
+    def report(self):
+        """Get a human-readable table of the recorded sections."""
+        steps = max(len(self.steps), 1)
+        lines = [f"Profile over {len(self.steps)} steps:",
+                 f"  {'section':<40} {'total (s)':>10} {'per step (ms)':>14} {'calls':>9}"]
+        for key in self.keys():
+            label = f"{key[0]}/{key[1]}"
+            lines.append(f"  {label:<40} {self.totals[key]:>10.4f} {self.totals[key] / steps * 1e3:>14.3f} {self.calls[key]:>9}")
+        return '\n'.join(lines)
+
+    def dump(self, path=None):
+        """Print the :py:meth:`report`, or save the summary to ``path``.
+
+        ``.json`` files get :py:meth:`to_dict`. Other files get :py:meth:`to_dataframe`,
+        in a format chosen by the file extension (see :py:func:`~swarmsim.util.pdutils.save_df`).
+        """
+        if path is None:
+            print(self.report())
+            return
+        path = Path(path)
+        if path.suffix == '.json':
+            path.write_text(json.dumps(self.to_dict(), indent=2))
+        else:
+            from .pdutils import save_df
+            save_df(self.to_dataframe().reset_index(), path)
+
+    def __bool__(self):
+        return self.enabled
+
+    def __repr__(self):
+        return f"<StepProfiler {'enabled' if self.enabled else 'disabled'}, {len(self.steps)} steps, {len(self.totals)} sections>"
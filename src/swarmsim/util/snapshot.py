@@ -0,0 +1,124 @@
+"""Capture and re-apply the live state of simulation objects.
+
+Used by :py:meth:`World.snapshot() <swarmsim.world.World.World.snapshot>`
+and :py:meth:`World.restore() <swarmsim.world.World.World.restore>`.
+
+The state of an object is taken from its instance ``__dict__``:
+
+* plain data (numbers, strings, numpy arrays, and lists, tuples, dicts, sets or deques of plain data)
+  is copied as-is.
+* :py:class:`numpy.random.Generator` objects are saved as their bit generator state.
+* other ``swarmsim`` helper objects (i.e. :py:class:`~swarmsim.util.collections.RingBuffer`,
+  delay filters, or a metric's sub-metrics) are captured recursively.
+* references to the world's top-level objects (the world, agents, sensors, controllers,
+  metrics, spawners, goals), config dataclasses, and anything else (functions, GUI objects)
+  are left out. Those are rebuilt from the world config and re-linked as usual.
+
+Attributes listed in a class's ``__badvars__`` are also left out.
+
+.. autofunction:: capture_state
+.. autofunction:: apply_state
+.. autofunction:: encode
+.. autofunction:: decode
+
+"""
+
+import dataclasses
+import pickle
+from collections import deque
+
+import numpy as np
+
+_SCALARS = (type(None), bool, int, float, complex, str, bytes, np.generic)
+_CONTAINERS = (list, tuple, set, frozenset, deque)
+
+# markers for values which are not stored as-is
+_RNG = '__rng__'
+_NESTED = '__nested__'
+
+
+def _is_data(value, depth=0):
+    if isinstance(value, _SCALARS):
+        return True
+    if isinstance(value, np.ndarray):
+        return value.dtype != object
+    if depth > 8:
+        return False
+    if isinstance(value, _CONTAINERS):
+        return all(_is_data(v, depth + 1) for v in value)
+    if isinstance(value, dict):
+        return all(_is_data(k, depth + 1) and _is_data(v, depth + 1) for k, v in value.items())
+    return False
+
+
+def _is_helper(value):
+    # a swarmsim object that isn't a config
+    module = getattr(type(value), '__module__', '') or ''
+    return (module.startswith('swarmsim.') and hasattr(value, '__dict__')
+            and not dataclasses.is_dataclass(value) and not isinstance(value, type))
+
+
+def _skipped(obj):
+    skip = set()
+    for cls in type(obj).__mro__:
+        skip.update(getattr(cls, '__badvars__', ()))
+    return skip
+
+
+def capture_state(obj, entities=frozenset(), skip=(), _seen=None):
+    """Get a dict of the plain-data state of ``obj``.
+
+    Parameters
+    ----------
+    obj : object
+        The object to capture.
+    entities : set[int]
+        ``id()`` of objects which are captured separately, or not at all, and should be left out.
+    skip : Iterable[str]
+        Attribute names to leave out.
+    """
+    if _seen is None:
+        _seen = set(entities)
+    _seen.add(id(obj))
+    skip = set(skip) | _skipped(obj)
+    state = {}
+    for name, value in vars(obj).items():
+        if name in skip or id(value) in _seen and not isinstance(value, _SCALARS):
+            continue
+        if isinstance(value, np.random.Generator):
+            state[name] = (_RNG, value.bit_generator.state)
+        elif _is_data(value):
+            state[name] = value.copy() if isinstance(value, np.ndarray) else value
+        elif _is_helper(value):
+            state[name] = (_NESTED, capture_state(value, entities, _seen=_seen))
+    return state
+
+
+def apply_state(obj, state):
+    """Set the attributes of ``obj`` from a dict made by :py:func:`capture_state`."""
+    for name, value in state.items():
+        if isinstance(value, tuple) and len(value) == 2 and value[0] == _RNG:
+            rng = vars(obj).get(name)
+            if not isinstance(rng, np.random.Generator):
+                rng = np.random.default_rng()
+                setattr(obj, name, rng)
+            rng.bit_generator.state = value[1]
+        elif isinstance(value, tuple) and len(value) == 2 and value[0] == _NESTED:
+            nested = vars(obj).get(name)
+            if nested is not None:
+                apply_state(nested, value[1])
+        else:
+            setattr(obj, name, value.copy() if isinstance(value, np.ndarray) else value)
+
+
+def encode(obj):
+    """Pickle ``obj`` into a ``uint8`` array, so it can be stored in an ``.npz`` file."""
+    return np.frombuffer(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8)
+
+
+def decode(array):
+    """Inverse of :py:func:`encode`.
+
+    .. warning:: This unpickles the data. Only decode checkpoints you trust.
+    """
+    return pickle.loads(np.asarray(array, dtype=np.uint8).tobytes())
@@ -0,0 +1,453 @@
+"""Many copies of one world, stepped together.
+
+A :py:class:`BatchedRectangularWorld` simulates ``K`` copies of the same
+:py:class:`~swarmsim.world.RectangularWorld.RectangularWorldConfig` in lockstep.
+Every agent of every copy lives in one set of ``(K, N, ...)`` arrays, so moving,
+sensing and collisions are each done once per step for the whole batch.
+Each copy can have its own controller parameters, which makes it possible to
+evaluate a whole generation of genomes on one core:
+
+.. code-block:: python
+
+    from swarmsim.world.BatchedRectangularWorld import BatchedRectangularWorld
+
+    batch = BatchedRectangularWorld(world_config, controllers=population_of_genomes)
+    batch.run(1000)
+    fitness = batch.metric_values(average=True)[:, 0]
+
+The batch is built from a template :py:class:`~swarmsim.world.RectangularWorld.RectangularWorld`,
+which is created and set up from the config as usual. Only what the vectorized kernel
+understands is supported; anything else raises a :py:class:`ValueError`:
+
+* every agent is a :py:class:`~swarmsim.agent.MazeAgent.MazeAgent` (or a subclass that doesn't change
+  its dynamics) with no ``delay`` and ``sensing_avg`` of 1.
+* every agent has exactly one :py:class:`~swarmsim.sensors.BinaryFOVSensor.BinaryFOVSensor`
+  which senses other agents only, every step.
+* every agent's controller is a list-based :py:class:`~swarmsim.agent.control.Controller.Controller`
+  or a :py:class:`~swarmsim.agent.control.BinaryController.BinaryController`.
+* the world has no goals, and its spawners only spawn during setup.
+
+Each copy behaves like a :py:class:`~swarmsim.world.RectangularWorld.RectangularWorld` with
+``step_mode: batch`` and ``collision_mode: batch``, with these differences:
+
+* sensor noise (``false_positive``/``false_negative``) and collision shaking are drawn from
+  the batch's :py:attr:`~BatchedRectangularWorld.rng` instead of the global :py:mod:`numpy.random`.
+* candidate pairs for agent collisions come from a KD-tree rather than the world's broadphase,
+  so results may differ from a single world by floating point rounding.
+* objects are only used as walls. They are not stepped.
+
+Metrics from the world config are created once per copy, and see their copy through a
+lightweight view which has a ``population`` of agent views with the usual
+:py:meth:`~swarmsim.agent.Agent.Agent.getPosition`, :py:meth:`~swarmsim.agent.Agent.Agent.getVelocity`,
+``pos``, ``angle``, etc. Other world attributes are read from the template world.
+
+.. autoclass:: BatchedRectangularWorld
+    :members:
+
+"""
+
+import copy
+from dataclasses import replace
+
+import numpy as np
+
+from ..config import get_class_from_dict
+from ..agent.MazeAgent import MazeAgent
+from ..agent.control.BinaryController import BinaryController
+from ..agent.control.Controller import Controller, ControllerType
+from ..metrics.AbstractMetric import AbstractMetric
+from ..sensors.BinaryFOVSensor import BinaryFOVSensor, fov_detect
+from ..util.collider.CircleResolver import resolve_circle_overlaps
+
+
+def action_table(controller) -> np.ndarray:
+    """Get the ``(S, 2)`` table of ``(v, omega)`` for each sensor state of a controller.
+
+    Parameters
+    ----------
+    controller : list | numpy.ndarray | Controller | BinaryController
+        A flat genome as used by a list-based :py:class:`~swarmsim.agent.control.Controller.Controller`
+        i.e. ``[v0, w0, v1, w1]``, a ``(S, 2)`` table, or a controller instance.
+    """
+    if isinstance(controller, BinaryController):
+        table = np.stack((controller.a, controller.b))
+    elif isinstance(controller, Controller):
+        if controller.type != ControllerType.list_based:
+            msg = f"Only list-based Controllers can be batched, not {controller.type}"
+            raise ValueError(msg)
+        table = controller.controller_as_list
+    else:
+        table = controller
+    table = np.asarray(table, dtype=np.float64).reshape(-1, 2)
+    if len(table) < 2:
+        msg = f"Expected actions for at least 2 sensor states, got {len(table)}"
+        raise ValueError(msg)
+    return table
+
+
+class _AgentView:
+    # stands in for agent i of world k, for metrics
+    __slots__ = ('batch', 'k', 'i', 'name')
+
+    def __init__(self, batch, k, i, name):
+        self.batch = batch
+        self.k = k
+        self.i = i
+        self.name = name
+
+    @property
+    def pos(self):
+        return self.batch.pos[self.k, self.i]
+
+    @property
+    def dpos(self):
+        return self.batch.dpos[self.k, self.i]
+
+    @property
+    def angle(self):
+        return self.batch.angle[self.k, self.i]
+
+    @property
+    def dtheta(self):
+        return self.batch.dtheta[self.k, self.i]
+
+    @property
+    def radius(self):
+        return self.batch.radius[self.k, self.i]
+
+    @property
+    def collision_flag(self):
+        return self.batch.collision_flag[self.k, self.i]
+
+    @property
+    def dead(self):
+        return self.batch.dead[self.k, self.i]
+
+    @property
+    def position(self):
+        return self.pos
+
+    def getPosition(self):
+        return self.pos
+
+    def getVelocity(self):
+        return self.dpos
+
+    def get_heading(self):
+        return self.angle
+
+    def get_x_pos(self):
+        return self.pos[0]
+
+    def get_y_pos(self):
+        return self.pos[1]
+
+
+class _WorldView:
+    # stands in for world k of the batch, for metrics
+    def __init__(self, batch, k):
+        self.batch = batch
+        self.k = k
+        self.population = [_AgentView(batch, k, i, agent.name) for i, agent in enumerate(batch.template.population)]
+        self.goals = []
+
+    @property
+    def total_steps(self):
+        return self.batch.total_steps
+
+    def __getattr__(self, name):
+        # static attributes, i.e. config, dt, objects
+        if name.startswith('__') or name == 'batch':
+            raise AttributeError(name)
+        return getattr(self.batch.template, name)
+
+
+class BatchedRectangularWorld:
+    """``K`` copies of a :py:class:`~swarmsim.world.RectangularWorld.RectangularWorld` stepped in lockstep.
+
+    Parameters
+    ----------
+    config : RectangularWorldConfig
+        The config every copy is made from. It is not modified.
+    n_worlds : int, optional
+        The number of copies. Defaults to the number of ``controllers`` or ``seeds``.
+    controllers : Sequence, optional
+        The controller of each copy, as anything accepted by :py:func:`action_table`,
+        or a ``(K, S, 2)`` array. Every agent in a copy uses its copy's controller.
+        Defaults to each agent's own controller from the config.
+    seeds : Sequence[int], optional
+        If given, copy ``k`` starts from a world set up with seed ``seeds[k]``,
+        so its agents may be spawned differently. Otherwise every copy starts
+        from the same template world.
+    rng_seed : int, optional
+        Seed for :py:attr:`rng`. Defaults to the config's seed.
+    """
+
+    def __init__(self, config, n_worlds=None, controllers=None, seeds=None, rng_seed=None):
+        if n_worlds is None:
+            n_worlds = len(controllers) if controllers is not None else len(seeds) if seeds is not None else 1
+        if seeds is not None and len(seeds) != n_worlds:
+            msg = f"Expected {n_worlds} seeds, got {len(seeds)}"
+            raise ValueError(msg)
+        #: The config every copy is made from.
+        self.config = config
+        #: int: Number of copies, ``K``.
+        self.n_worlds = n_worlds
+        #: The world the batch was built from. Agents and objects in it are not stepped.
+        self.template = self.make_world(config if seeds is None else replace(config, seed=seeds[0]))
+        self.check_supported(self.template)
+        agents = self.template.population
+        sensors = [agent.sensors[0] for agent in agents]
+        #: int: Number of agents in each copy, ``N``.
+        self.n_agents = len(agents)
+        self.total_steps = 0
+        self.dt = self.template.dt
+        #: Random number generator for sensor noise and collision shaking.
+        self.rng = np.random.default_rng(self.template.seed if rng_seed is None else rng_seed)
+        self.wall_segments = self.template.wall_segments
+
+        templates = [self.template]
+        if seeds is not None:
+            templates += [self.make_world(replace(config, seed=seed)) for seed in seeds[1:]]
+        for world in templates:
+            if len(world.population) != self.n_agents:
+                msg = f"Every copy needs the same number of agents, but got {len(world.population)} and {self.n_agents}"
+                raise ValueError(msg)
+            world.population_state.sync(world.population)
+
+        def stack(name):
+            column = [getattr(world.population_state, name) for world in templates]
+            if len(column) == 1:
+                column *= n_worlds
+            return np.stack(column).copy()
+
+        # (K, N, ...) state, laid out like PopulationState columns
+        self.pos = stack('pos')
+        self.dpos = stack('dpos')
+        self.angle = stack('angle')
+        self.dtheta = stack('dtheta')
+        self.radius = stack('radius')
+        self.collision_flag = stack('collision_flag')
+        self.stopped_duration = stack('stopped_duration')
+        self.dead = stack('dead')
+        #: (K, N) int: each sensor's current state.
+        self.sensor_state = np.stack([[agent.sensors[0].current_state for agent in world.population] for world in templates]
+                                     * (n_worlds if len(templates) == 1 else 1)).astype(np.intp)
+        #: (K, N) int: index of the agent each sensor sees, or -1.
+        self.agent_in_sight = np.full((n_worlds, self.n_agents), -1, dtype=np.intp)
+        self.idiosyncrasies = np.stack([[agent.idiosyncrasies for agent in world.population] for world in templates]
+                                       * (n_worlds if len(templates) == 1 else 1)).astype(np.float64)
+
+        # (N,) per-agent constants, the same in every copy
+        self.catastrophic = np.array([agent.catastrophic_collisions for agent in agents], dtype=bool)
+        params = np.array([(s.angle, s.theta, s.bias, s.r, s.fp, s.fn, s.invert) for s in sensors], dtype=np.float64)
+        self.sensor_angle, self.theta, self.bias, self.sensor_range, self.fp, self.fn, invert = params.T
+        self.invert = invert.astype(bool)
+
+        if controllers is None:
+            tables = [action_table(agent.controller) for agent in agents]
+            if len({table.shape for table in tables}) != 1:
+                msg = "Every agent's controller needs actions for the same number of sensor states"
+                raise ValueError(msg)
+            self.actions = np.broadcast_to(np.stack(tables), (n_worlds, *np.shape(tables))).copy()
+        else:
+            self.set_controllers(controllers)
+
+        #: The view of each copy which its metrics are attached to.
+        self.worlds = [_WorldView(self, k) for k in range(n_worlds)]
+        #: list[list[AbstractMetric]]: The metrics of each copy.
+        self.metrics = [self.make_metrics(view) for view in self.worlds]
+
+    @staticmethod
+    def make_world(config):
+        config = copy.deepcopy(config)  # setting up a world consumes parts of its config
+        world = config.create_world()
+        world.setup()
+        # oneshot spawners are removed on the first step
+        world.spawners = [s for s in world.spawners if not s.mark_for_deletion]
+        return world
+
+    @staticmethod
+    def check_supported(world):
+        """Raise a :py:class:`ValueError` if the batch kernel can't simulate ``world``."""
+        problems = []
+        if world.goals:
+            problems.append("goals")
+        if world.spawners:
+            problems.append("spawners which spawn after setup")
+        for agent in world.population:
+            cls = type(agent)
+            name = cls.__name__
+            if not (isinstance(agent, MazeAgent) and cls.supports_step_batch()
+                    and cls.integrate_batch.__func__ is MazeAgent.integrate_batch.__func__):
+                problems.append(f"{name}, which doesn't step like a MazeAgent")
+                continue
+            if agent.config.delay or agent.config.sensing_avg != 1:
+                problems.append(f"{name} with delay or sensing_avg")
+            sensors = agent.sensors
+            if len(sensors) != 1 or not isinstance(sensors[0], BinaryFOVSensor) or not type(sensors[0]).supports_step_batch():
+                problems.append(f"{name}, which doesn't have exactly one BinaryFOVSensor")
+            elif sensors[0].walls is not None or sensors[0].use_goal_state or sensors[0].time_step_between_sensing != 1:
+                problems.append(f"{name}, whose sensor senses walls or goals, or not every step")
+            try:
+                action_table(agent.controller)
+            except (ValueError, TypeError) as err:
+                problems.append(f"{name}, whose controller can't be batched: {err}")
+        if problems:
+            msg = "Can't batch this world because it has " + '; '.join(dict.fromkeys(problems))
+            raise ValueError(msg)
+
+    def set_controllers(self, controllers):
+        """Give each copy its own controller. See the ``controllers`` parameter."""
+        if isinstance(controllers, np.ndarray) and controllers.ndim == 3:
+            tables = controllers.astype(np.float64)
+        else:
+            tables = [action_table(controller) for controller in controllers]
+            if len({table.shape for table in tables}) != 1:
+                msg = "Every controller needs actions for the same number of sensor states"
+                raise ValueError(msg)
+            tables = np.stack(tables)
+        if len(tables) != self.n_worlds:
+            msg = f"Expected {self.n_worlds} controllers, got {len(tables)}"
+            raise ValueError(msg)
+        # (K, N, S, 2), so every agent in a copy uses the copy's controller
+        self.actions = np.broadcast_to(tables[:, None], (self.n_worlds, self.n_agents, *tables.shape[1:])).copy()
+
+    def make_metrics(self, view):
+        metrics = []
+        for metric_config in self.config.metrics:
+            if isinstance(metric_config, AbstractMetric):
+                metric = copy.deepcopy(metric_config)
+            else:
+                metric_class, metric_config = get_class_from_dict('metrics', copy.deepcopy(metric_config))
+                metric = metric_class(view, **metric_config)
+            metric.reset()
+            metric.attach_world(view)
+            metrics.append(metric)
+        return metrics
+
+    def step(self):
+        self.total_steps += 1
+        active = ~self.dead
+        old_pos = self.pos.copy()
+        moved = active & self.integrate(self.get_actions(), active)
+        self.handle_walls(moved)
+        self.dpos[moved] = self.pos[moved] - old_pos[moved]
+        self.sense(moved)
+        self.resolve_collisions()
+        for metrics in self.metrics:
+            for metric in metrics:
+                metric.calculate()
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+        return self
+
+    def get_actions(self):
+        """Get the ``(K, N, 2)`` ``(v, omega)`` of every agent from its controller and sensor state."""
+        k, i = np.indices(self.sensor_state.shape)
+        return self.actions[k, i, self.sensor_state]
+
+    def integrate(self, actions, active):
+        """Apply the unicycle dynamics of :py:meth:`MazeAgent.integrate_batch` to every ``active`` agent.
+
+        Returns
+        -------
+        numpy.ndarray[bool]
+            ``(K, N)``, False for agents which were killed by a catastrophic collision this step.
+        """
+        v, omega = actions[..., 0], actions[..., 1]
+        idiosyncrasies = self.idiosyncrasies
+        dtheta = omega * idiosyncrasies[..., -1] * self.dt
+        turning = np.abs(omega) > 1e-9
+        safe_omega = np.where(turning, omega, 1.0)
+        s = np.where(turning, 2 * np.sin(dtheta / 2) * v / safe_omega, v * self.dt)
+        heading = self.angle + dtheta / 2
+        delta = s[..., None] * np.stack((np.cos(heading), np.sin(heading)), axis=-1) * idiosyncrasies
+
+        stopped = active & (self.stopped_duration > 0)
+        died = stopped & self.catastrophic
+        alive = ~died
+        self.stopped_duration[stopped] -= 1
+        moving = active & ~stopped
+        self.pos[moving] += delta[moving]
+        self.dtheta[active] = dtheta[active]
+        turned = active & alive
+        self.angle[turned] += dtheta[turned]
+        self.collision_flag[turned] = False
+        self.dead[died] = True
+        return alive
+
+    def handle_walls(self, mask):
+        """Push agents in ``mask`` out of the walls, like :py:meth:`RectangularWorld.handleWallCollisionsBatch`."""
+        segments = self.wall_segments
+        if not self.config.collide_walls or not len(segments):
+            return
+        rows, cols = np.nonzero(mask)
+        touching = segments.touching_circles(self.pos[rows, cols], self.radius[rows, cols])
+        for k, i in zip(rows[touching], cols[touching]):
+            pos, hit = segments.resolve_circle(self.pos[k, i], self.radius[k, i])
+            if hit:
+                self.pos[k, i] = pos
+
+    def sense(self, mask):
+        """Step the sensors of agents in ``mask``, like :py:meth:`BinaryFOVSensor.step_batch`."""
+        k, i = np.nonzero(mask)
+        if not len(k):
+            return
+        n = self.n_agents
+        groups = np.repeat(np.arange(self.n_worlds), n)
+        _detected, nearest, _distance = fov_detect(
+            self.pos[k, i], self.angle[k, i] + self.sensor_angle[i], self.theta[i], self.bias[i],
+            self.sensor_range[i], self.radius[k, i], self.pos.reshape(-1, 2),
+            groups=k, target_groups=groups,
+        )
+        seen = nearest >= 0
+        noise = self.rng.random(len(k))
+        reported = np.where(seen, noise >= self.fn[i], noise < self.fp[i])
+        self.sensor_state[k, i] = reported != self.invert[i]
+        self.agent_in_sight[k, i] = np.where(seen & reported, nearest % n, -1)
+
+    def resolve_collisions(self):
+        """Resolve agent–agent overlaps in every copy at once, like :py:meth:`RectangularWorld.resolve_agent_collisions`."""
+        if self.n_agents < 2:
+            return
+        from scipy.spatial import cKDTree
+
+        pos = self.pos.reshape(-1, 2)
+        radius = self.radius.reshape(-1)
+        reach = 3 * float(radius.max())  # agents may move up to a radius before the last pass
+        # each copy on its own plane, like fov_detect's groups
+        plane = np.repeat(np.arange(self.n_worlds, dtype=np.float64), self.n_agents) * (reach + 1.0)
+        pairs = cKDTree(np.column_stack((pos, plane))).query_pairs(reach, output_type='ndarray')
+        pairs = (pairs[:, 0], pairs[:, 1])
+        alive = ~self.dead.reshape(-1)
+        displacement, overlapped = resolve_circle_overlaps(
+            pos, radius, pairs, movable=alive, rng=self.rng, passes=self.config.collision_passes,
+        )
+        self.pos += displacement.reshape(self.pos.shape)
+        self.dpos += displacement.reshape(self.pos.shape)
+
+        i, j = pairs[0][overlapped], pairs[1][overlapped]
+        involved = np.zeros(len(pos), dtype=bool)
+        involved[i] = involved[j] = True
+        self.collision_flag.reshape(-1)[involved & alive] = True
+
+        catastrophic = alive & np.tile(self.catastrophic, self.n_worlds)
+        kill = catastrophic[i] | catastrophic[j]
+        died = np.zeros(len(pos), dtype=bool)
+        died[i[kill]] = died[j[kill]] = True
+        self.dead.reshape(-1)[died & alive] = True
+
+    def metric_values(self, average=False):
+        """Get a ``(K, M)`` array of each copy's metric values.
+
+        Parameters
+        ----------
+        average : bool, default=False
+            If True, get each metric's :py:attr:`~swarmsim.metrics.AbstractMetric.AbstractMetric.average`
+            over its history instead of its current value.
+        """
+        return np.array([[metric.average if average else metric.value for metric in metrics] for metrics in self.metrics],
+                        dtype=np.float64).reshape(self.n_worlds, -1)
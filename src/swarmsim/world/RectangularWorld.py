@@ -29,8 +29,6 @@ import random
 from dataclasses import dataclass
 
 import numpy as np
-import pygame
-import pygame.draw
 
 from ..agent.Agent import Agent
 
@@ -38,11 +36,15 @@ from .World import World, AbstractWorldConfig
 from ..config import associated_type, filter_unexpected_fields
 from ..util.timer import Timer
 from ..util.collider.AABB import AABB
+from ..util.collider.SpatialHash import SpatialHash
+from ..util.collider.SweepAndPrune import SweepAndPrune
+from ..util.collider.CircleResolver import resolve_circle_overlaps
+from ..util.collider.SegmentSet import SegmentSet
 from .goals.Goal import CylinderGoal
 from .objects.Wall import Wall
 
 # typing
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, override
 if TYPE_CHECKING:
     from ..agent.StaticAgent import StaticAgent
     type T_Vec2 = tuple[float, float] | np.ndarray[(2,), np.dtype[float]]
@@ -104,6 +106,42 @@ class RectangularWorldConfig(AbstractWorldConfig):
     It does not directly determine how fast the simulation runs, or the FPS.
     """
 
+    step_mode: str = 'sequential'
+    """str: How agents are stepped each tick.
+
+    ``'sequential'``
+        Each agent chooses an action, moves, resolves collisions and senses in turn.
+    ``'batch'``
+        Agents of the same type are stepped together using their class's
+        :py:meth:`~swarmsim.agent.MazeAgent.MazeAgent.step_batch`, which integrates
+        their dynamics in one vectorized pass. Agents whose class does not
+        support batching are stepped one at a time afterwards.
+    """
+
+    collision_mode: str = 'sequential'
+    """str: How agent–agent overlaps are resolved.
+
+    ``'sequential'``
+        Each agent pushes itself out of its neighbors during its own step.
+    ``'batch'``
+        Agents skip collision handling in their step. After all agents have moved,
+        the world finds overlapping pairs with its :py:attr:`~RectangularWorld.broadphase`
+        and resolves them together with :py:func:`~swarmsim.util.collider.CircleResolver.resolve_circle_overlaps`.
+    """
+
+    #: int : Number of relaxation passes when ``collision_mode`` is ``'batch'``.
+    collision_passes: int = 4
+
+    broadphase: str = 'grid'
+    """str: Which broadphase finds agents that might be touching.
+
+    ``'grid'``
+        A :py:class:`~swarmsim.util.collider.SpatialHash.SpatialHash` uniform grid sized to the agents.
+    ``'sweep'``
+        A :py:class:`~swarmsim.util.collider.SweepAndPrune.SweepAndPrune`, which copes better with
+        very uneven densities, such as aggregation where agents pile into one spot.
+    """
+
     def factor_zoom(self, zoom):
         # print("RectangularWorld Factor_Zoom called", zoom, self.size)
         self.size = np.asarray(self.size) * zoom
@@ -151,6 +189,13 @@ class RectangularWorld(World):
         self.highlighted_set = []
         self.human_controlled = []
 
+        #: SpatialHash | SweepAndPrune : broadphase over the population, rebuilt at the start of each step
+        #: and updated as each agent moves.
+        self.broadphase = self.make_broadphase(config.broadphase)
+        self._broadphase_stale = True
+        self.defer_agent_collisions = config.collision_mode == 'batch'
+        self._wall_segments = None
+
         # self.heterogeneous = False
 
         if initialize:
@@ -164,10 +209,10 @@ class RectangularWorld(World):
             # check if entry contains a "type" key
             if 'type' in entry:
                 if isinstance(entry, Agent):  # if it's already an agent, just add it
-                    self.objects.append(entry)
+                    self.add_object(entry)
                 else:  # otherwise, it's a config dict. find the class specified and create the agent
                     agent_class, agent_config = get_agent_class(entry)
-                    self.objects.append(agent_class.from_config(agent_config, self))
+                    self.add_object(agent_class.from_config(agent_config, self))
             # check if entry contains a "from_svg" key with a string value
             elif isinstance((svg := entry.get('svg_to_static_objects', None)), str):
                 svg = SVG(svg)
@@ -179,24 +224,175 @@ class RectangularWorld(World):
                     collides = get_collision_config(first_match(classes, COLLISION_CLASSES))
                     classes = ' '.join(remove_special_classes(classes))
                     agent_config = StaticObjectConfig(points=points, team=classes, **collides)
-                    self.objects.append(StaticObject(agent_config, self))
+                    self.add_object(StaticObject(agent_config, self))
                 circles = svg.get_circles()
                 for circle, classes in circles:
                     x, y, r = circle
                     collides = get_collision_config(first_match(classes, COLLISION_CLASSES))
                     classes = ' '.join(remove_special_classes(classes))
                     agent_config = StaticObjectConfig(position=np.array([x, y]), agent_radius=r, team=classes, **collides)
-                    self.objects.append(StaticObject(agent_config, self))
+                    self.add_object(StaticObject(agent_config, self))
             else:
                 raise TypeError("Expected a string value for 'from_svg' key in 'objects' list.")
 
+    @staticmethod
+    def make_broadphase(kind: str):
+        """Create a broadphase by name. See :py:attr:`RectangularWorldConfig.broadphase`."""
+        match kind:
+            case 'grid':
+                return SpatialHash()
+            case 'sweep':
+                return SweepAndPrune()
+            case _:
+                msg = f"Unknown broadphase: {kind}"
+                raise ValueError(msg)
+
+    @override
+    def add_agent(self, agent: Agent):
+        super().add_agent(agent)
+        i = agent._population_index
+        if not self._broadphase_stale and i == len(self.broadphase):
+            self.broadphase.insert(i, agent.pos, self.population_state.buffers['radius'][i])
+        else:
+            self._broadphase_stale = True
+        return agent
+
+    @override
+    def update_broadphase(self, agent: Agent | None = None):
+        if agent is None or self._broadphase_stale or agent not in self.population_state:
+            state = self.population_state
+            # tolerate agents moving up to a body radius before the next rebuild
+            tolerance = float(state.radius.max()) if len(state) else 0.0
+            reach = max((self._aabb_reach(other) for other in state.agents), default=0.0)
+            self.broadphase.margin = max(tolerance, reach)
+            self.broadphase.rebuild(state.pos, state.radius)
+            self._broadphase_stale = False
+        else:
+            # grow the margin first, so the moved entry is hashed with it
+            self.broadphase.margin = max(self.broadphase.margin, self._aabb_reach(agent))
+            self.broadphase.move(agent._population_index, agent.pos)
+
+    @staticmethod
+    def _aabb_reach(agent) -> float:
+        # How far an agent's cached ``aabb`` reaches past the circle it's hashed as.
+        # Agents make it at the start of their step, before moving, and collision checks
+        # test against it, so it can trail the agent's position by a whole step of movement.
+        aabb = getattr(agent, 'aabb', None)
+        if aabb is None:
+            return 0.0
+        offset = np.abs((aabb._min + aabb._max) / 2 - agent.pos) + aabb._size / 2
+        return float(offset.max()) - getattr(agent, 'radius', 0.0)
+
+    @override
+    def _fork_memo(self):
+        memo = super()._fork_memo()
+        # forks rebuild their own broadphase, but share the compiled wall segments
+        memo[id(self.broadphase)] = None
+        segments = self.wall_segments
+        memo[id(segments)] = segments
+        return memo
+
+    @override
+    def _forked(self, parent, seed_sequence):
+        self.broadphase = self.make_broadphase(self.config.broadphase)
+        self._broadphase_stale = True
+        super()._forked(parent, seed_sequence)
+
+    @override
+    def collision_candidates(self, aabb: AABB) -> list[Agent]:
+        agents = self.population_state.agents
+        if len(agents) != len(self.population):
+            return self.population  # population was modified directly; store not synced yet
+        if self._broadphase_stale:
+            self.update_broadphase()
+        return [agents[i] for i in self.broadphase.query(aabb._min, aabb._max)]
+
     def step_agents(self):
+        self.update_broadphase()
+        if self.config.step_mode == 'batch':
+            self.step_agents_batch()
+        else:
+            profiler = self.profiler
+            for agent in self.population:
+                with profiler.section('agent', type(agent).__name__):
+                    agent.step(
+                        check_for_world_boundaries=self.withinWorldBoundaries if self.config.collide_walls else None,
+                        check_for_agent_collisions=self.preventAgentCollisions,
+                        world=self,
+                    )
+                # later agents query the broadphase, so keep it in sync with where this one ended up
+                self.update_broadphase(agent)
+                self.handleGoalCollisions(agent)
+        if self.defer_agent_collisions:
+            with self.profiler.section('agent', 'collisions'):
+                self.resolve_agent_collisions()
+
+    def resolve_agent_collisions(self):
+        """Resolve all agent–agent overlaps at once. See :py:attr:`RectangularWorldConfig.collision_mode`.
+
+        Dead agents, and agents which don't handle collisions themselves, are not moved,
+        but other agents are still pushed out of them.
+        """
+        state = self.population_state
+        state.sync(self.population)
+        agents = state.agents
+        if len(agents) < 2:
+            return
+        self.update_broadphase()
+        pairs = self.broadphase.pairs()
+        alive = ~state.dead
+        movable = alive & np.array([hasattr(agent, 'handle_collisions') for agent in agents], dtype=bool)
+        displacement, overlapped = resolve_circle_overlaps(
+            state.pos, state.radius, pairs, movable=movable, rng=self.rng, passes=self.config.collision_passes,
+        )
+        state.pos[:] += displacement
+        state.dpos[:] += displacement
+        self._broadphase_stale = True
+
+        i, j = pairs[0][overlapped], pairs[1][overlapped]
+        involved = np.zeros(len(agents), dtype=bool)
+        involved[i] = involved[j] = True
+        state.collision_flag[involved & movable] = True
+
+        catastrophic = movable & np.array([getattr(agent, 'catastrophic_collisions', False) for agent in agents], dtype=bool)
+        kill = catastrophic[i] | catastrophic[j]
+        died = np.zeros(len(agents), dtype=bool)
+        died[i[kill]] = died[j[kill]] = True
+        died &= alive
+        state.dead[died] = True
+        for k in np.flatnonzero(died):
+            agents[k].body_color = (200, 200, 200)
+
+    def step_agents_batch(self):
+        """Step agents grouped by type. See :py:attr:`RectangularWorldConfig.step_mode`."""
+        check_for_world_boundaries = self.withinWorldBoundaries if self.config.collide_walls else None
+        groups = {}
+        individuals = []
+        for agent in self.population:
+            cls = type(agent)
+            supports_batch = getattr(cls, 'supports_step_batch', None)
+            if supports_batch is not None and supports_batch() and agent in self.population_state:
+                groups.setdefault(cls, []).append(agent)
+            else:
+                individuals.append(agent)
+
+        profiler = self.profiler
+        for cls, agents in groups.items():
+            with profiler.section('agent', cls.__name__):
+                cls.step_batch(
+                    agents, self,
+                    check_for_world_boundaries=check_for_world_boundaries,
+                    check_for_world_boundaries_batch=self.withinWorldBoundariesBatch if self.config.collide_walls else None,
+                )
+        for agent in individuals:
+            with profiler.section('agent', type(agent).__name__):
+                agent.step(
+                    check_for_world_boundaries=check_for_world_boundaries,
+                    check_for_agent_collisions=self.preventAgentCollisions,
+                    world=self,
+                )
+            self.update_broadphase(agent)
         for agent in self.population:
-            agent.step(
-                check_for_world_boundaries=self.withinWorldBoundaries if self.config.collide_walls else None,
-                check_for_agent_collisions=self.preventAgentCollisions,
-                world=self,
-            )
             self.handleGoalCollisions(agent)
 
     def draw(self, screen, offset=None):
@@ -228,15 +424,7 @@ class RectangularWorld(World):
         """
         Given the center of a circle, find all Agents located within the circumference defined by center and r
         """
-        filtered_agents = []
-        for agent in self.population:
-            if not issubclass(type(agent), Agent):
-                msg = f"Agents must be subtype of Agent, not {type(agent)}"
-                raise Exception(msg)
-            if distance(center, (agent.get_x_pos(), agent.get_y_pos())) < r:
-                if agent != excluded:
-                    filtered_agents.append(agent)
-        return filtered_agents
+        return [self.population[i] for i in self.neighbors_within(center, r) if self.population[i] != excluded]
 
     def onClick(self, event) -> None:
         """Handle mouse click events."""
@@ -266,6 +454,7 @@ class RectangularWorld(World):
 
     def onZoom(self, mouse_event, scroll_event):
         """Handle mouse wheel events."""
+        import pygame
         if not (mouse_event.type == pygame.MOUSEBUTTONUP and scroll_event.type == pygame.MOUSEWHEEL):
             raise TypeError("Expected a mouse button up and scroll event.")
 
@@ -307,6 +496,7 @@ class RectangularWorld(World):
         self.zoom = value  # also set the current zoom
 
     def handle_middle_mouse_events(self, events):
+        import pygame
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 self._mouse_dragging_last_pos = np.asarray(event.pos)
@@ -347,56 +537,68 @@ class RectangularWorld(World):
     def handleGoalCollisions(self, agent):
         for goal in self.goals:
             if isinstance(goal, CylinderGoal):
-                correction = agent.build_collider().collision_then_correction(goal.get_collider())
-                if correction is not None:
+                correction = agent.build_collider().correction(goal.get_collider(), self.rng)
+                if not np.isnan(correction).any():
                     agent.set_x_pos(agent.get_x_pos() + correction[0])
                     agent.set_y_pos(agent.get_y_pos() + correction[1])
 
+    def withinWorldBoundariesBatch(self, agents):
+        """Batched :py:meth:`withinWorldBoundaries`. Returns a bool mask of the agents that hit a wall."""
+        return self.handleWallCollisionsBatch(agents)
+
+    @override
+    def add_object(self, obj: Agent):
+        self._wall_segments = None
+        return super().add_object(obj)
+
+    @override
+    def remove_object(self, obj: Agent):
+        self._wall_segments = None
+        return super().remove_object(obj)
+
+    @property
+    def wall_segments(self) -> SegmentSet:
+        """All static wall segments from :py:attr:`objects`, compiled into a :py:class:`SegmentSet`.
+
+        Recompiled after :py:meth:`add_object` or :py:meth:`remove_object`.
+        Call :py:meth:`compile_wall_segments` if :py:attr:`objects` is changed directly,
+        or if an object's segments change in place.
+        """
+        if self._wall_segments is None:
+            self.compile_wall_segments()
+        return self._wall_segments
+
+    def compile_wall_segments(self):
+        self._wall_segments = SegmentSet.from_objects(self.objects)
+        return self._wall_segments
+
     def handleWallCollisions(self, agent: StaticAgent):
         # Check for distances between the agent and the line segments
-        in_collision = False
-        for obj in self.objects:
-            segs = obj.get_sensing_segments()
-            c = (agent.get_x_pos(), agent.get_y_pos())
-            for p1, p2 in segs:
-                # From https://stackoverflow.com/questions/24727773/detecting-rectangle-collision-with-a-circle
-                x1, y1 = p1
-                x2, y2 = p2
-                x3, y3 = c
-                px = x2 - x1
-                py = y2 - y1
-
-                something = px * px + py * py
-
-                u = ((x3 - x1) * px + (y3 - y1) * py) / float(something)
-
-                if u > 1:
-                    u = 1
-                elif u < 0:
-                    u = 0
-
-                x = x1 + u * px
-                y = y1 + u * py
-
-                dx = x - x3
-                dy = y - y3
-
-                dist = math.sqrt(dx * dx + dy * dy)
-
-                if dist < agent.radius:
-                    in_collision = True
-                    agent.set_y_pos(agent.get_y_pos() - (np.sign(dy) * (agent.radius - abs(dy) + 1)))
-                    agent.set_x_pos(agent.get_x_pos() - (np.sign(dx) * (agent.radius - abs(dx) + 1)))
-
-                # dx = x - x3 - agent.radius
-                # if dx < 0:
-                #     in_collision = True
-                #     agent.set_x_pos(agent.get_x_pos() - dx)
-                # dy = y - y3 - agent.radius
-                # if dy < 0:
-                #     in_collision = True
-                #     agent.set_y_pos(agent.get_y_pos() - dy)
+        # Originally from https://stackoverflow.com/questions/24727773/detecting-rectangle-collision-with-a-circle
+        # Segments of one object are all tested against the agent's center from before that object,
+        # as the per-object loop did. See SegmentSet.resolve_circle().
+        segments = self.wall_segments
+        if not len(segments):
+            return False
+        pos, in_collision = segments.resolve_circle(agent.pos, agent.radius)
+        if in_collision:
+            agent.pos = pos
+        return in_collision
 
+    def handleWallCollisionsBatch(self, agents):
+        """Resolve wall collisions for many agents. Returns a bool mask of the agents that collided.
+
+        Agents are first tested against the walls together; only those touching
+        a wall are then resolved one at a time, exactly as :py:meth:`handleWallCollisions` does.
+        """
+        segments = self.wall_segments
+        in_collision = np.zeros(len(agents), dtype=bool)
+        if not len(segments) or not agents:
+            return in_collision
+        positions = np.array([agent.pos for agent in agents], dtype=np.float64)
+        radii = np.array([agent.radius for agent in agents], dtype=np.float64)
+        for k in np.flatnonzero(segments.touching_circles(positions, radii)):
+            in_collision[k] = self.handleWallCollisions(agents[k])
         return in_collision
 
     def preventAgentCollisions(self, agent: StaticAgent, forward_freeze=False) -> None:
@@ -409,8 +611,9 @@ class RectangularWorld(World):
         #     return
 
         for _ in range(10):  # limit attempts
+            aabb = agent.get_aabb()
             collided_agents = [
-                other for other in self.population if agent != other and agent.get_aabb().intersects_bb(other.get_aabb())
+                other for other in self.collision_candidates(aabb) if agent != other and aabb.intersects_bb(other.get_aabb())
             ]
             if not collided_agents:
                 break
@@ -482,6 +685,9 @@ class RectangularWorld(World):
     def removeAgent(self, agent):
         agent.deleted = True
         self.population.remove(agent)
+        self.population_state.remove(agent)
+        self._broadphase_stale = True
+        self._neighbor_index = None
 
     def collision_forward(self, agent, colliding_agent):
         a_to_b = colliding_agent.getPosition() - agent.getPosition()
@@ -511,6 +717,7 @@ class RectangularWorld(World):
         return False
 
     def handle_key_press(self, event):
+        import pygame
         # events from pygame are passed from simulate.main() to the world here.
         for a in self.population:
             a.on_key_press(event)
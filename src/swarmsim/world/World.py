@@ -19,9 +19,9 @@
 
 """
 
+import copy
 import os
 
-import pygame
 import numpy as np
 from collections.abc import Callable
 from dataclasses import dataclass, field, replace
@@ -32,6 +32,11 @@ from ..config import store, filter_unexpected_fields, get_class_from_dict, get_a
 
 from ..util.asdict import asdict
 from ..util.collections import FlagSet
+from ..util.population import PopulationState, COLUMNS
+from ..util.iohistory import IOHistory
+from ..util.neighbors import NeighborIndex
+from ..util.profiler import StepProfiler
+from ..util import snapshot as snap
 
 from ..agent.Agent import Agent
 from .spawners.Spawner import Spawner
@@ -61,6 +66,7 @@ class AbstractWorldConfig:
     #: If None, the world will be seeded based on system time.
     seed: int | None = None
     metadata: dict = field(default_factory=dict)
+    #: dict[str, int] : Feature flags. Set ``profile: 1`` to enable the world's :py:class:`~swarmsim.util.profiler.StepProfiler`.
     flags: dict[str, int] = field(default_factory=dict)
 
     def __post_init__(self):
@@ -153,6 +159,10 @@ class World:
         config = replace(config)
         #: List of agents in the world.
         self.population: list[Agent] = []
+        #: Contiguous position/heading/flag arrays for :py:attr:`population`, in the same order.
+        self.population_state = PopulationState()
+        #: The ``track_io`` records of every agent. See :py:attr:`MazeAgent.history <swarmsim.agent.MazeAgent.MazeAgent.history>`.
+        self.io_history = IOHistory()
         #: List of spawners which create agents or objects.
         self.spawners: list[Spawner] = []
         #: Metrics to calculate behaviors.
@@ -172,6 +182,12 @@ class World:
         #: Also may be used to seed RNG for agents, spawners, etc.
         self.rng: np.random.Generator
         self.flags = FlagSet(config.flags)
+        #: Times each phase of :py:meth:`step`. Disabled unless the ``profile`` flag is set.
+        self.profiler = StepProfiler(enabled='profile' in self.flags)
+        #: If True, agents leave agent–agent collisions out of their own step
+        #: and the world resolves them all at once afterwards.
+        self.defer_agent_collisions = False
+        self._neighbor_index = None
 
     def set_seed(self, seed):
         self.seed = np.random.randint(0, 2**31) if seed is None else seed
@@ -187,10 +203,10 @@ class World:
         # create agents
         for agent_config in self.config.agents:
             if isinstance(agent_config, Agent):  # if it's already an agent, just add it
-                self.population.append(agent_config)
+                self.add_agent(agent_config)
             else:  # otherwise, it's a config dict. find the class specified and create the agent
                 agent_class, agent_config = get_agent_class(agent_config)
-                self.population.append(agent_class.from_config(agent_config, self))
+                self.add_agent(agent_class.from_config(agent_config, self))
 
         for spawner_config in self.config.spawners:
             if isinstance(spawner_config, Spawner):  # if it's already a spawner, just add it
@@ -217,13 +233,86 @@ class World:
         if step_spawners:
             self.step_spawners()
 
+    def add_agent(self, agent: Agent):
+        """Add an agent to the :py:attr:`population` and register it with the :py:attr:`population_state`."""
+        self.population.append(agent)
+        self.population_state.add(agent)
+        self._neighbor_index = None
+        return agent
+
+    def add_object(self, obj: Agent):
+        """Add an object to :py:attr:`objects`."""
+        self.objects.append(obj)
+        return obj
+
+    def remove_object(self, obj: Agent):
+        """Remove an object from :py:attr:`objects`."""
+        self.objects.remove(obj)
+        return obj
+
+    @property
+    def neighbor_index(self) -> NeighborIndex:
+        """KD-tree over agent positions, built on first use and cached.
+
+        The cache is dropped at the start and end of each :py:meth:`step`
+        and when agents are added or removed, so during a step it reflects
+        positions as of the first query in that step.
+        """
+        if self._neighbor_index is None or len(self._neighbor_index) != len(self.population):
+            self.population_state.sync(self.population)
+            self._neighbor_index = NeighborIndex(self.population_state.pos)
+        return self._neighbor_index
+
+    def neighbors_within(self, center, r):
+        """Get population indices of agents closer than ``r`` to ``center``. See :py:meth:`NeighborIndex.neighbors_within`."""
+        return self.neighbor_index.neighbors_within(center, r)
+
+    def k_nearest(self, center, k):
+        """Get population indices and distances of the ``k`` agents nearest ``center``."""
+        return self.neighbor_index.k_nearest(center, k)
+
+    def query_pairs(self, r):
+        """Get a ``(P, 2)`` array of population index pairs closer than ``r`` to each other."""
+        return self.neighbor_index.query_pairs(r)
+
+    def collision_candidates(self, aabb) -> list[Agent]:
+        """Get the agents which might overlap ``aabb``, in population order.
+
+        The base world has no broadphase, so this is the whole :py:attr:`population`.
+        Callers should still test each candidate themselves.
+        """
+        return self.population
+
+    def update_broadphase(self, agent: Agent | None = None):
+        """Tell the broadphase that ``agent`` (or, if ``None``, every agent) has moved."""
+        pass
+
     def step(self):
         self.total_steps += 1
+        self._neighbor_index = None
 
-        self.step_spawners()
-        self.step_agents()
-        self.step_objects()
-        self.step_metrics()
+        # pick up any agents added to or removed from the population list directly
+        self.population_state.sync(self.population)
+        if self.profiler.enabled:
+            self._step_profiled()
+        else:
+            self.step_spawners()
+            self.step_agents()
+            self.step_objects()
+            self.step_metrics()
+        self._neighbor_index = None
+
+    def _step_profiled(self):
+        profiler = self.profiler
+        with profiler.section('phase', 'spawners'):
+            self.step_spawners()
+        with profiler.section('phase', 'agents'):
+            self.step_agents()
+        with profiler.section('phase', 'objects'):
+            self.step_objects()
+        with profiler.section('phase', 'metrics'):
+            self.step_metrics()
+        profiler.end_step()
 
     def step_spawners(self):
         self.spawners = [s for s in self.spawners if not s.mark_for_deletion]
@@ -231,16 +320,20 @@ class World:
             spawner.step()
 
     def step_agents(self):
+        profiler = self.profiler
         for agent in self.population:
-            agent.step(world=self,)
+            with profiler.section('agent', type(agent).__name__):
+                agent.step(world=self,)
 
     def step_objects(self):
         for obj in self.objects:
             obj.step()
 
     def step_metrics(self):
+        profiler = self.profiler
         for metric in self.metrics:
-            metric.calculate()
+            with profiler.section('metric', getattr(metric, 'name', None) or type(metric).__name__):
+                metric.calculate()
 
     def draw(self, screen, offset=None):
         pass
@@ -264,7 +357,284 @@ class World:
     def from_config(cls, c):
         return cls(c)
 
+    def run(self, steps: int | None = None, stop_detection: Callable | None = None, callbacks=()):
+        """Step the world headless, with no rendering or event handling.
+
+        Sets up the world first if it hasn't been already.
+
+        Parameters
+        ----------
+        steps : int, optional
+            Number of steps to run. Defaults to the config's ``stop_at`` if it is an int,
+            otherwise runs until ``stop_detection`` returns True.
+        stop_detection : Callable, optional
+            ``stop_detection(world) -> bool``, checked before each step. Stop if it returns True.
+        callbacks : Iterable[Callable], optional
+            Each is called as ``callback(world)`` after each step.
+
+        Returns
+        -------
+        World
+            This world.
+        """
+        if steps is None:
+            stop_at = getattr(self, 'stop_at', self.config.stop_at)
+            steps = stop_at if isinstance(stop_at, int) and stop_at >= 0 else None
+        if steps is None and stop_detection is None:
+            msg = "World.run() needs a number of steps, an int stop_at in the config, or a stop_detection function."
+            raise ValueError(msg)
+        self.setup()
+        callbacks = list(callbacks)
+        taken = 0
+        while steps is None or taken < steps:
+            if stop_detection is not None and stop_detection(self):
+                break
+            self.step()
+            taken += 1
+            for callback in callbacks:
+                callback(self)
+        if self.profiler.enabled:
+            self.profiler.dump()
+        return self
+
+    #: Version of the layout written by :py:meth:`snapshot`.
+    SNAPSHOT_VERSION = 1
+
+    def _entities(self):
+        # objects whose state is captured separately, in a fixed order
+        agents = list(self.population)
+        return {
+            'agents': agents,
+            'controllers': [getattr(agent, 'controller', None) for agent in agents],
+            'sensors': [list(getattr(agent, 'sensors', None) or []) for agent in agents],
+            'objects': list(self.objects),
+            'metrics': list(self.metrics),
+            'spawners': [s for s in self.spawners if not s.mark_for_deletion],
+            'goals': list(self.goals),
+        }
+
+    def snapshot(self, path: str | os.PathLike | None = None) -> dict[str, np.ndarray]:
+        """Capture the live state of the world, i.e. to checkpoint a long run or fork rollouts from it.
+
+        The checkpoint holds:
+
+        * the :py:attr:`population_state` columns (``pos``, ``angle``, ...) as arrays, under ``population/<column>``
+        * the step count and the states of the world's RNG and of the global :py:mod:`numpy.random` RNG
+        * the state of every agent, controller (i.e. ``LevyController.steps_left``), sensor, object,
+          metric (i.e. ``value_history``), spawner and goal, as described in :py:mod:`swarmsim.util.snapshot`.
+
+        The checkpoint can only be restored into a world made from the same config.
+
+        Parameters
+        ----------
+        path : str | os.PathLike, optional
+            If given, also save the checkpoint to this ``.npz`` file.
+
+        Returns
+        -------
+        dict[str, numpy.ndarray]
+            The checkpoint, which can be passed to :py:meth:`restore`.
+        """
+        self.setup()
+        self.population_state.sync(self.population)
+        entities = self._entities()
+        ids = {id(self), id(self.population)}
+        for group in entities.values():
+            for item in group:
+                if isinstance(item, list):
+                    ids.update(id(x) for x in item)
+                elif item is not None:
+                    ids.add(id(item))
+        skip = {f"_{name}" for name in COLUMNS} | {'_population_state', '_population_index', 'world', 'config'}
+
+        def capture(obj):
+            return None if obj is None or not hasattr(obj, '__dict__') else snap.capture_state(obj, ids, skip)
+
+        state = {
+            'world': {'total_steps': self.total_steps, 'seed': self.seed, 'rng': self.rng.bit_generator.state},
+            'numpy_random': np.random.get_state(),
+            'types': {key: [type(x).__name__ for x in group] for key, group in entities.items() if key != 'sensors'},
+            'sensors': [[capture(sensor) for sensor in sensors] for sensors in entities['sensors']],
+            'io_history': capture(self.io_history),
+        }
+        for key, group in entities.items():
+            if key != 'sensors':
+                state[key] = [capture(item) for item in group]
+
+        checkpoint = {'version': np.array(self.SNAPSHOT_VERSION)}
+        for name in COLUMNS:
+            checkpoint[f"population/{name}"] = getattr(self.population_state, name).copy()
+        checkpoint['state'] = snap.encode(state)
+        if path is not None:
+            np.savez_compressed(path, **checkpoint)
+        return checkpoint
+
+    def restore(self, checkpoint: dict[str, np.ndarray] | str | os.PathLike):
+        """Restore the live state saved by :py:meth:`snapshot`.
+
+        The world must have been made from the same config as the snapshotted world,
+        so that it has the same agents, metrics, etc. in the same order.
+        It is set up first if it hasn't been already.
+
+        .. warning:: Checkpoints contain pickled data. Only restore checkpoints you trust.
+
+        Parameters
+        ----------
+        checkpoint : dict[str, numpy.ndarray] | str | os.PathLike
+            A checkpoint from :py:meth:`snapshot`, or the path of an ``.npz`` file it saved.
+
+        Returns
+        -------
+        World
+            This world.
+
+        Raises
+        ------
+        ValueError
+            The checkpoint doesn't match this world.
+        """
+        if not isinstance(checkpoint, dict):
+            with np.load(checkpoint) as f:
+                checkpoint = dict(f)
+        if int(checkpoint['version']) != self.SNAPSHOT_VERSION:
+            msg = f"Unsupported snapshot version {int(checkpoint['version'])}"
+            raise ValueError(msg)
+        state = snap.decode(checkpoint['state'])
+
+        self.setup()
+        # a oneshot spawner may not have been removed from this world yet
+        self.spawners = [s for s in self.spawners if not s.mark_for_deletion]
+        entities = self._entities()
+        for key, names in state['types'].items():
+            found = [type(x).__name__ for x in entities[key]]
+            if found != names:
+                msg = f"Snapshot has {key} {names}, but this world has {found}. Was it made from the same config?"
+                raise ValueError(msg)
+
+        self.population_state.sync(self.population)
+        for name in COLUMNS:
+            getattr(self.population_state, name)[:] = checkpoint[f"population/{name}"]
+
+        def apply(obj, obj_state):
+            if obj is not None and obj_state is not None:
+                snap.apply_state(obj, obj_state)
+
+        for key, group in entities.items():
+            if key == 'sensors':
+                for sensors, sensor_states in zip(group, state['sensors']):
+                    for sensor, sensor_state in zip(sensors, sensor_states):
+                        apply(sensor, sensor_state)
+            else:
+                for item, item_state in zip(group, state[key]):
+                    apply(item, item_state)
+        apply(self.io_history, state.get('io_history'))
+
+        self.total_steps = state['world']['total_steps']
+        self.seed = state['world']['seed']
+        self.rng.bit_generator.state = state['world']['rng']
+        np.random.set_state(state['numpy_random'])
+        self._neighbor_index = None
+        self.update_broadphase()
+        return self
+
+    def fork(self, n: int, seed: int | np.random.SeedSequence | None = None) -> list['World']:
+        """Make ``n`` independent copies of this world in its current state, i.e. to branch rollouts from it.
+
+        Each fork gets its own copy of everything that changes while stepping:
+        the :py:attr:`population_state` arrays, agents, controllers, sensors, spawners, metrics,
+        goals and non-static objects. Things which don't change are shared with this world
+        rather than copied, namely config dataclasses, the geometry of grounded objects,
+        and any precompiled collision data (i.e. :py:attr:`RectangularWorld.wall_segments`).
+        Don't modify those in place on a fork.
+
+        The GUI, screen cache and neighbor index are not copied, and each fork gets a fresh :py:attr:`profiler`.
+
+        Each fork's :py:attr:`rng` and the RNGs of its agents, controllers, sensors, objects,
+        spawners and metrics are re-seeded from its own child of a :py:class:`numpy.random.SeedSequence`,
+        so the forks diverge from this world and from each other.
+        This world is not modified, and its RNGs are not advanced.
+
+        .. note:: The global :py:mod:`numpy.random` state is shared by every world in a process
+            and can't be forked. Code that uses it (i.e. sensor noise) is not independent between forks.
+
+        Parameters
+        ----------
+        n : int
+            The number of forks to make.
+        seed : int | numpy.random.SeedSequence, optional
+            Entropy for the forks' RNG streams. Defaults to this world's :py:attr:`seed` and step count,
+            so forking the same world at the same step is reproducible.
+
+        Returns
+        -------
+        list[World]
+            The forks, which are set up and can be stepped right away.
+        """
+        self.setup()
+        self.population_state.sync(self.population)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence([self.seed, self.total_steps] if seed is None else seed)
+        shared = self._fork_memo()
+        # metrics leave their world and population out of __getstate__, which deepcopy would use
+        metrics = []
+        stack = list(self.metrics)
+        while stack:
+            metric = stack.pop()
+            if isinstance(metric, AbstractMetric) and metric not in metrics:
+                metrics.append(metric)
+                stack.extend(vars(metric).values())
+        forks = []
+        for child in seed.spawn(n):
+            memo = dict(shared)
+            copies = {id(metric): object.__new__(type(metric)) for metric in metrics}
+            memo.update(copies)
+            world = copy.deepcopy(self, memo)
+            for metric in metrics:
+                vars(copies[id(metric)]).update(copy.deepcopy(vars(metric), memo))
+            world._forked(self, child)
+            forks.append(world)
+        return forks
+
+    def _fork_memo(self):
+        # deepcopy memo for fork(): maps id(x) to what the forks get in place of x
+        memo = {id(x): None for x in (self.gui, self._screen_cache, self._neighbor_index, self.profiler) if x is not None}
+        memo[id(self.config)] = self.config
+        entities = self._entities()
+        for group in entities.values():
+            for item in group:
+                for obj in item if isinstance(item, list) else [item]:
+                    config = getattr(obj, 'config', None)
+                    if config is not None:
+                        memo[id(config)] = config
+        for obj in entities['objects']:
+            if getattr(getattr(obj, 'config', None), 'grounded', False):
+                # grounded objects never move, so their geometry can be shared
+                for value in getattr(obj, '__dict__', {}).values():
+                    if isinstance(value, np.ndarray):
+                        memo[id(value)] = value
+        return memo
+
+    def _forked(self, parent, seed_sequence):
+        # finish a fork of parent. seed_sequence is this fork's own numpy.random.SeedSequence
+        self.profiler = StepProfiler(enabled=parent.profiler.enabled)
+        self._neighbor_index = None
+        self.seed = int(seed_sequence.generate_state(1)[0])
+        self.rng = np.random.default_rng(seed_sequence)
+        entities = self._entities()
+        objs = [obj for group in entities.values() for item in group
+                for obj in (item if isinstance(item, list) else [item]) if obj is not None]
+        for obj, child in zip(objs, seed_sequence.spawn(len(objs))):
+            for name, value in list(getattr(obj, '__dict__', {}).items()):
+                if isinstance(value, np.random.Generator):
+                    setattr(obj, name, np.random.default_rng(child.spawn(1)[0]))
+        self.update_broadphase()
+
     def evaluate(self, steps: int, output_capture: OutputTensorConfig | None = None, screen=None):
+        if output_capture is None and screen is None:
+            # nothing to capture
+            self.run(steps)
+            return None
+        import pygame
         frame_markers = []
         output = None
         if output_capture is not None:
@@ -315,6 +685,8 @@ class World:
             else:
                 output = pygame.surfarray.array2d(screen)
 
+        if self.profiler.enabled:
+            self.profiler.dump()
         return output
 
 
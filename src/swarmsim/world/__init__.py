@@ -37,6 +37,14 @@ Functions
 """
 
 from .World import World_from_config, config_from_dict, config_from_yaml, config_from_yamls
-from .simulate import main as sim
+
+
+def __getattr__(name):
+    # simulate imports pygame, so only load it when it's asked for
+    if name == 'sim':
+        from .simulate import main as sim
+        return sim
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
 
 __all__ = ['World_from_config', 'config_from_dict', 'config_from_yaml', 'config_from_yamls', 'sim']
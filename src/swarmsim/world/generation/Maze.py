@@ -89,6 +89,12 @@ class Maze:
                     walls.append(self.wall_between(state.i, state.j, state.i, state.j + 1))
         return walls
 
+    def get_walls(self, world=None):
+        """Get the current maze walls as :py:class:`~swarmsim.world.objects.Wall.Wall` objects for ``world.objects``."""
+        from ..objects.Wall import Wall
+
+        return [Wall(world, *wall[1:]) for wall in self.get_wall_representation()]
+
     def solve_and_return(self):
         # First Pass
         for i in range(len(self.graph)):
@@ -1,4 +1,3 @@
-import pygame
 import numpy as np
 from ...util.collider.Collider import CircularCollider
 
@@ -16,6 +15,7 @@ class AbstractGoal:
 
 class AreaGoal(AbstractGoal):
     def __init__(self, x, y, w, h, color=(0, 255, 0), remove_agents_at_goal=False):
+        import pygame
         super().__init__()
         self.rect = pygame.Rect(x, y, w, h)
         self.color = color
@@ -23,6 +23,7 @@ class AreaGoal(AbstractGoal):
         self.agents_seen = set()
 
     def draw(self, screen, offset=((0, 0), 1.0)):
+        import pygame
         # TODO: Implement offset/zoom
         pygame.draw.rect(screen, self.color, self.rect, width=0)
 
@@ -48,6 +49,7 @@ class CylinderGoal(AbstractGoal):
         self.range = range
 
     def draw(self, screen, zoom=1.0):
+        import pygame
         # Draw Inclusive Range
         pygame.draw.circle(screen, (0, 50, 0), self.center, self.range, width=0)
         pygame.draw.circle(screen, self.color, self.center, self.r, width=0)
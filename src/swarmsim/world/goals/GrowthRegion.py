@@ -1,5 +1,4 @@
 import numpy as np
-import pygame.draw
 import shapely
 from ...world.objects.WorldObject import WorldObject
 
@@ -23,6 +22,7 @@ class GrowthRegion(WorldObject):
 
     def draw(self, screen, offset=((0, 0), 1.0)):
         # TODO: Implement offset/zoom
+        import pygame.draw
         pygame.draw.polygon(screen, (200, 0, 0), self.points, width=0)
 
     def point_inside(self, point):
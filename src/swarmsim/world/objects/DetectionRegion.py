@@ -38,7 +38,7 @@ class DetectionRegion(StaticAgent):
         self.collision_flag = False
         if refresh:
             self.aabb = self.make_aabb()
-        candidates = [other for other in world.population if self != other
+        candidates = [other for other in world.collision_candidates(self.aabb) if self != other
                             and self.aabb.intersects_bb(other.make_aabb() if refresh else other.aabb)]
         self.collided = []
         if not candidates:
@@ -24,6 +24,9 @@ Object Class
 """
 
 from dataclasses import dataclass, field
+
+import numpy as np
+
 from ...config import filter_unexpected_fields, associated_type
 
 from ...agent.StaticAgent import StaticAgent, StaticAgentConfig
@@ -48,3 +51,15 @@ class StaticObject(StaticAgent):
     @override
     def draw_direction(self, screen, offset=((0, 0), 1.0)):
         pass
+
+    def get_sensing_segments(self):
+        """Get the edges of the object's polygon, or nothing if it is a circle or does not collide.
+
+        These are compiled into :py:attr:`RectangularWorld.wall_segments <swarmsim.world.RectangularWorld.RectangularWorld.wall_segments>`,
+        so agents are pushed out of colliding polygons like walls.
+        Before, polygon objects had no segments, and wall collisions raised :py:class:`AttributeError` on them.
+        """
+        if not self.is_poly or not getattr(self.config, 'collides', True):
+            return []
+        points = self.poly_rotated + self.pos
+        return list(zip(points, np.roll(points, -1, axis=0)))
@@ -1,4 +1,3 @@
-import pygame
 from ...world.objects.WorldObject import WorldObject
 
 
@@ -14,26 +13,26 @@ class Wall(WorldObject):
 
     def draw(self, screen, offset=((0, 0), 1.0)):
         # TODO: Implement offset/zoom
+        import pygame
         pygame.draw.rect(screen, self.color, pygame.Rect(self.x, self.y, self.w, self.h))
 
+    def corners(self):
+        """Get the ``topleft, topright, bottomright, bottomleft`` corners, truncated to ints like a ``pygame.Rect``."""
+        x, y, w, h = int(self.x), int(self.y), int(self.w), int(self.h)
+        return (x, y), (x + w, y), (x + w, y + h), (x, y + h)
+
     def get_sensing_segments(self):
         if not self.detectable:
             return []
-        rect = pygame.Rect(self.x, self.y, self.w, self.h)
-        return [
-            [rect.topleft, rect.topright],
-            [rect.topright, rect.bottomright],
-            [rect.bottomright, rect.bottomleft],
-            [rect.bottomleft, rect.topleft]
-        ]
+        return self.get_collision_segments()
 
     def get_collision_segments(self):
-        rect = pygame.Rect(self.x, self.y, self.w, self.h)
+        topleft, topright, bottomright, bottomleft = self.corners()
         return [
-            [rect.topleft, rect.topright],
-            [rect.topright, rect.bottomright],
-            [rect.bottomright, rect.bottomleft],
-            [rect.bottomleft, rect.topleft]
+            [topleft, topright],
+            [topright, bottomright],
+            [bottomright, bottomleft],
+            [bottomleft, topleft]
         ]
 
     def __repr__(self):
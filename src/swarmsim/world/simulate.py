@@ -7,7 +7,21 @@ screen = None
 FRAMERATE = 200
 
 
-def main(
+def main(world_config, *args, **kwargs):
+    """Run a world, with or without the GUI. See :py:func:`_main` for the arguments.
+
+    If the world's :py:attr:`~swarmsim.world.World.World.profiler` is enabled,
+    its report is printed when the run ends.
+    """
+    world = world_config if isinstance(world_config, World) else World_from_config(world_config)
+    try:
+        return _main(world, *args, **kwargs)
+    finally:
+        if world.profiler.enabled:
+            world.profiler.dump()
+
+
+def _main(
     world_config,
     show_gui=True,
     gui=None,
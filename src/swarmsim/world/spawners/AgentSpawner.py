@@ -130,10 +130,11 @@ class PointAgentSpawner(BaseAgentSpawner):
     def do_spawn(self, name=None):
         config = self.generate_config(name)
         agent = self.make_agent(config)
-        self.world.population.append(agent)  # make world aware of the new agent. necessary for collision handling
+        self.world.add_agent(agent)  # make world aware of the new agent. necessary for collision handling
         if self.avoid_overlap and isinstance(agent, MazeAgent):
             agent.handle_collisions(self.world, max_attempts=5, nudge_amount=0.4, rng=self.rng, refresh=True)
             agent.handle_collisions(self.world, max_attempts=10, nudge_amount=1.0, rng=self.rng, refresh=True)
+            self.world.update_broadphase(agent)
 
         self.set_angle_post_spawn(agent)
         self.spawned += 1
@@ -150,7 +150,7 @@ class ExcelSpawner(BaseAgentSpawner):
     def do_spawn(self):
         config = self.generate_config(self.states.pop(0))
         agent = self.make_agent(config)
-        self.world.population.append(agent)  # make world aware of the new agent. necessary for collision handling
+        self.world.add_agent(agent)  # make world aware of the new agent. necessary for collision handling
         self.spawned += 1
         return agent
 
@@ -0,0 +1,287 @@
+"""Stream the state of every agent to disk while a world runs.
+
+:py:class:`TrajectoryRecorder` fills a preallocated ``(K, N, k)`` float32 buffer
+and writes it out as a shard every ``K`` recorded steps, so memory stays bounded however long the run is.
+
+.. code-block:: python
+
+    recorder = TrajectoryRecorder('out/run1', columns=('x', 'y', 'heading', 'v', 'omega'), every=10)
+    sim(world_config, subscribers=[recorder])  # or world.run(callbacks=[recorder])
+    recorder.close()
+
+    trajectory = RecordedTrajectory('out/run1')
+    trajectory[-100:]  # (100, N, 5) array. Only the shards it spans are read.
+    trajectory.column('heading')  # (T, N)
+
+.. autodata:: COLUMNS
+.. autoclass:: TrajectoryRecorder
+    :members:
+.. autoclass:: RecordedTrajectory
+    :members:
+
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from ...util.population import TRAJECTORY_COLUMNS, check_trajectory_columns, trajectory_row
+
+#: Columns a :py:class:`TrajectoryRecorder` can record for each agent.
+#: The same as :py:data:`~swarmsim.util.population.TRAJECTORY_COLUMNS`.
+COLUMNS = TRAJECTORY_COLUMNS
+
+FORMATS = ('npy', 'npz', 'memmap')
+
+
+class TrajectoryRecorder:
+    """A world subscriber which writes agent states to disk in chunks.
+
+    It can be given to :py:func:`~swarmsim.world.simulate.main` as a subscriber,
+    or to :py:meth:`World.run() <swarmsim.world.World.World.run>` as a callback.
+    Call :py:meth:`close` when the run is over to write the last partial chunk.
+
+    Parameters
+    ----------
+    path : str | Path
+        Folder to write to. Created if needed. A recording already in it is replaced.
+    columns : Sequence[str], default=('x', 'y', 'heading')
+        Which of :py:data:`COLUMNS` to record.
+    every : int, default=1
+        Only record steps whose ``world.total_steps`` is a multiple of this.
+    chunk : int, default=1024
+        Number of recorded steps held in memory before they are written out.
+    format : str, default='npy'
+        ``'npy'`` writes each chunk as ``data_00000.npy`` and ``steps_00000.npy``.
+        ``'npz'`` writes each chunk as one ``chunk_00000.npz``.
+        ``'memmap'`` appends every chunk to a single raw ``data.f4`` file and ``steps.i8``.
+    n_agents : int, optional
+        Number of agent slots per step. By default, the population size at the first recorded step.
+        If agents are removed, their slots are NaN. More agents than this is an error.
+    """
+
+    def __init__(self, path, columns=('x', 'y', 'heading'), every=1, chunk=1024, format='npy', n_agents=None):
+        columns = check_trajectory_columns(columns)
+        if format not in FORMATS:
+            msg = f"Unknown format {format!r}. Expected one of {FORMATS}"
+            raise ValueError(msg)
+        self.path = Path(path)
+        self.columns = tuple(columns)
+        self.every = max(int(every), 1)
+        self.chunk = max(int(chunk), 1)
+        self.format = format
+        self.n_agents = n_agents
+        #: int: Number of steps recorded so far, including those written to disk.
+        self.count = 0
+        #: list[dict]: The file and number of rows of each chunk written so far.
+        self.shards = []
+        self._buffer = None
+        self._steps = np.empty(self.chunk, dtype=np.int64)
+        self._filled = 0
+        self.closed = False
+        self.path.mkdir(parents=True, exist_ok=True)
+        if format == 'memmap':  # chunks are appended, so don't append to an earlier recording's
+            for name in ('data.f4', 'steps.i8'):
+                open(self.path / name, 'wb').close()
+        self._write_meta()
+
+    def notify(self, world, screen=None):
+        """Record the world's current step, if it's one of every ``every`` steps."""
+        if self.closed or world.total_steps % self.every:
+            return
+        self.record(world)
+
+    def __call__(self, world, screen=None):
+        self.notify(world, screen)
+
+    def values(self, world):
+        """Get the ``(n, k)`` values of the :py:attr:`columns` for each of the world's ``n`` agents."""
+        return trajectory_row(world, self.columns)
+
+    def record(self, world):
+        """Record the world's current step."""
+        values = self.values(world)
+        if self._buffer is None:
+            if self.n_agents is None:
+                self.n_agents = len(values)
+            self._buffer = np.empty((self.chunk, self.n_agents, len(self.columns)), dtype=np.float32)
+        if len(values) > self.n_agents:
+            msg = f"The population grew to {len(values)}, but only {self.n_agents} agents are recorded. Set n_agents."
+            raise ValueError(msg)
+        row = self._buffer[self._filled]
+        row[:len(values)] = values
+        row[len(values):] = np.nan
+        self._steps[self._filled] = world.total_steps
+        self._filled += 1
+        self.count += 1
+        if self._filled == self.chunk:
+            self.flush()
+
+    def flush(self):
+        """Write the steps held in memory as a new chunk."""
+        if not self._filled:
+            return
+        data, steps = self._buffer[:self._filled], self._steps[:self._filled]
+        i = len(self.shards)
+        if self.format == 'npy':
+            np.save(self.path / f"data_{i:05d}.npy", data)
+            np.save(self.path / f"steps_{i:05d}.npy", steps)
+            name = f"data_{i:05d}.npy"
+        elif self.format == 'npz':
+            name = f"chunk_{i:05d}.npz"
+            np.savez(self.path / name, data=data, steps=steps)
+        else:
+            name = 'data.f4'
+            with open(self.path / 'data.f4', 'ab') as f:
+                f.write(data.tobytes())
+            with open(self.path / 'steps.i8', 'ab') as f:
+                f.write(steps.tobytes())
+        self.shards.append({'file': name, 'rows': int(self._filled)})
+        self._filled = 0
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {
+            'columns': list(self.columns),
+            'n_agents': self.n_agents,
+            'every': self.every,
+            'format': self.format,
+            'count': self.count - self._filled,
+            'shards': self.shards,
+        }
+        tmp = self.path / 'meta.json.tmp'
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.path / 'meta.json')
+
+    def close(self):
+        """Write the last partial chunk and stop recording."""
+        if not self.closed:
+            self.flush()
+            self.closed = True
+            self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def load(self):
+        """:py:meth:`flush` and open what's been recorded so far as a :py:class:`RecordedTrajectory`."""
+        self.flush()
+        return RecordedTrajectory(self.path)
+
+
+class RecordedTrajectory:
+    """Lazily read back the output of a :py:class:`TrajectoryRecorder`.
+
+    Indexing with ints or slices along the time axis only reads the shards needed.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        meta = json.loads((self.path / 'meta.json').read_text())
+        #: tuple[str]: The recorded columns.
+        self.columns = tuple(meta['columns'])
+        #: int: Number of agent slots per step.
+        self.n_agents = meta['n_agents'] or 0
+        #: int: Decimation used while recording.
+        self.every = meta['every']
+        self.format = meta['format']
+        self.shards = meta['shards']
+        #: int: Number of recorded steps.
+        self.count = meta['count']
+        self._starts = np.cumsum([0] + [shard['rows'] for shard in self.shards])
+        self._cache = (None, None)
+        self._steps = None
+
+    @property
+    def shape(self):
+        return (self.count, self.n_agents, len(self.columns))
+
+    def __len__(self):
+        return self.count
+
+    def _memmap(self, name, dtype, row_shape):
+        if self.count == 0:
+            return np.empty((0, *row_shape), dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode='r', shape=(self.count, *row_shape))
+
+    def _shard(self, i):
+        # (data, steps) of shard i. npy shards are memory-mapped, npz shards are read whole.
+        if self._cache[0] == i:
+            return self._cache[1]
+        if self.format == 'npy':
+            suffix = self.shards[i]['file'][len('data_'):]
+            loaded = (np.load(self.path / f"data_{suffix}", mmap_mode='r'),
+                      np.load(self.path / f"steps_{suffix}", mmap_mode='r'))
+        else:
+            with np.load(self.path / self.shards[i]['file']) as f:
+                loaded = (f['data'], f['steps'])
+        self._cache = (i, loaded)
+        return loaded
+
+    def _rows(self, start, stop, which):
+        if self.format == 'memmap':
+            if which == 0:
+                return np.asarray(self._memmap('data.f4', np.float32, self.shape[1:])[start:stop])
+            return np.asarray(self._memmap('steps.i8', np.int64, ())[start:stop])
+        parts = []
+        first = max(np.searchsorted(self._starts, start, side='right') - 1, 0)
+        for i in range(first, len(self.shards)):
+            lo = self._starts[i]
+            if lo >= stop:
+                break
+            shard = self._shard(i)[which]
+            parts.append(np.asarray(shard[max(start - lo, 0):stop - lo]))
+        if not parts:
+            return np.empty((0, *self.shape[1:]) if which == 0 else (0,), dtype=np.float32 if which == 0 else np.int64)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def __getitem__(self, index):
+        """Get recorded steps by time index. A slice with a step other than 1 is read whole, then stepped."""
+        if isinstance(index, tuple):  # index time first, then the rest
+            rows = self[index[0]]
+            return rows[index[1:]] if isinstance(index[0], (int, np.integer)) else rows[(slice(None), *index[1:])]
+        if isinstance(index, (int, np.integer)):
+            i = index + self.count if index < 0 else index
+            if not 0 <= i < self.count:
+                msg = f"index {index} is out of range for {self.count} recorded steps"
+                raise IndexError(msg)
+            return self._rows(i, i + 1, 0)[0]
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step == 1:
+                return self._rows(start, max(stop, start), 0)
+            return self.to_numpy()[index]
+        return self.to_numpy()[index]
+
+    @property
+    def steps(self) -> np.ndarray:
+        """``(T,)`` world step number of each recorded step."""
+        if self._steps is None:
+            self._steps = self._rows(0, self.count, 1)
+        return self._steps
+
+    def column(self, name):
+        """Get the ``(T, N)`` values of one column."""
+        return self.to_numpy()[:, :, self.columns.index(name)]
+
+    def iter_chunks(self):
+        """Iterate over ``(steps, data)`` chunks, one shard at a time, without reading everything at once."""
+        if self.format == 'memmap':
+            for lo, hi in zip(self._starts[:-1], self._starts[1:]):
+                yield self._rows(lo, hi, 1), self._rows(lo, hi, 0)
+            return
+        for i in range(len(self.shards)):
+            data, steps = self._shard(i)
+            yield np.asarray(steps), np.asarray(data)
+
+    def to_numpy(self):
+        """Read every recorded step into one ``(T, N, k)`` array."""
+        return self._rows(0, self.count, 0)
+
+    def __repr__(self):
+        return f"RecordedTrajectory({str(self.path)!r}, shape={self.shape}, columns={self.columns})"